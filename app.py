@@ -1,14 +1,49 @@
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for, send_from_directory, abort
+from flask import Flask, request, jsonify, render_template, session, redirect, url_for, send_file, abort, Response, stream_with_context
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from flask_mail import Mail, Message
+from flask_mail import Mail, Message, BadHeaderError
 from dotenv import load_dotenv
 import os
 from datetime import datetime
 import re
 from functools import wraps
+from collections import OrderedDict, deque
+import base64
+import csv
 import hashlib
+import io
+import json
+import gzip
+import mimetypes
+import random
+import smtplib
+import sqlite3
+import stat
+import threading
+import time
+import unicodedata
+import zipfile
+import zlib
+from types import SimpleNamespace
+from werkzeug.security import safe_join
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError, OperationalError, InterfaceError, SQLAlchemyError
+from urllib.parse import quote
+from xml.sax.saxutils import escape as xml_escape
+import xml.etree.ElementTree as ElementTree
 import os
+try:
+    import brotli
+except ImportError:
+    brotli = None
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
 os.environ["LANG"] = "C.UTF-8"
 os.environ["LC_ALL"] = "C.UTF-8"
 
@@ -50,6 +85,106 @@ app.config['MAIL_USE_SSL'] = os.getenv('MAIL_USE_SSL', 'False').lower() == 'true
 app.config['MAIL_USERNAME'] = os.getenv('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.getenv('MAIL_PASSWORD')
 
+# Page cache configuration
+# Pages are re-stat'ed at most once per interval; set MAX_BYTES to 0 to disable caching
+app.config['PAGE_CACHE_CHECK_INTERVAL'] = float(os.getenv('PAGE_CACHE_CHECK_INTERVAL', 2))
+app.config['PAGE_CACHE_MAX_BYTES'] = int(os.getenv('PAGE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+# Browser caching configuration (seconds)
+app.config['HTML_CACHE_MAX_AGE'] = int(os.getenv('HTML_CACHE_MAX_AGE', 60))
+app.config['HTML_STALE_WHILE_REVALIDATE'] = int(os.getenv('HTML_STALE_WHILE_REVALIDATE', 86400))
+app.config['STATIC_CACHE_MAX_AGE'] = int(os.getenv('STATIC_CACHE_MAX_AGE', 86400))
+
+# Text files up to this size are compressed on the fly when no .br/.gz sidecar exists
+app.config['COMPRESS_MAX_BYTES'] = int(os.getenv('COMPRESS_MAX_BYTES', 4 * 1024 * 1024))
+
+# Static file delivery mode:
+#   sendfile         - wsgi.file_wrapper (zero-copy sendfile under gunicorn, including ranges)
+#   x-sendfile       - hand the file to Apache mod_xsendfile / LiteSpeed via X-Sendfile
+#   x-accel-redirect - hand the file to an nginx internal location via X-Accel-Redirect
+app.config['STATIC_DELIVERY'] = os.getenv('STATIC_DELIVERY', 'sendfile').lower()
+app.config['X_ACCEL_REDIRECT_PREFIX'] = os.getenv('X_ACCEL_REDIRECT_PREFIX', '/_static_files').rstrip('/')
+app.config['USE_X_SENDFILE'] = app.config['STATIC_DELIVERY'] == 'x-sendfile'
+
+# Static mount router caches: stat results and 404 lookups (TTL in seconds)
+app.config['STATIC_STAT_CACHE_TTL'] = float(os.getenv('STATIC_STAT_CACHE_TTL', 5))
+app.config['STATIC_STAT_CACHE_SIZE'] = int(os.getenv('STATIC_STAT_CACHE_SIZE', 8192))
+app.config['STATIC_NEGATIVE_CACHE_TTL'] = float(os.getenv('STATIC_NEGATIVE_CACHE_TTL', 60))
+app.config['STATIC_NEGATIVE_CACHE_SIZE'] = int(os.getenv('STATIC_NEGATIVE_CACHE_SIZE', 4096))
+
+# Content-hashed asset manifest written by tools/build_assets.py (empty to disable)
+app.config['ASSET_MANIFEST'] = os.getenv('ASSET_MANIFEST', 'build/asset-manifest.json')
+
+# Responsive image variants written by tools/optimize_images.py (empty to disable)
+app.config['RESPONSIVE_IMAGE_MANIFEST'] = os.getenv('RESPONSIVE_IMAGE_MANIFEST', 'assets/img/_responsive/manifest.json')
+
+# On-demand image resizing (/img/<width>/<path>), cached on disk with LRU eviction
+app.config['IMAGE_RESIZE_WIDTHS'] = sorted(
+    int(w) for w in os.getenv('IMAGE_RESIZE_WIDTHS', '160,320,480,640,768,960,1200,1600,1920').split(',') if w.strip()
+)
+app.config['IMAGE_CACHE_DIR'] = os.getenv('IMAGE_CACHE_DIR', os.path.join(app.instance_path, 'image-cache'))
+app.config['IMAGE_CACHE_MAX_BYTES'] = int(os.getenv('IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
+# Admin list pagination: largest cursor-mode page, and how long row count estimates are reused (seconds)
+app.config['ADMIN_PAGE_MAX'] = int(os.getenv('ADMIN_PAGE_MAX', 100))
+app.config['ADMIN_COUNT_ESTIMATE_TTL'] = float(os.getenv('ADMIN_COUNT_ESTIMATE_TTL', 30))
+
+# Shared cache for admin read endpoints:
+#   memory - per process (default)
+#   sqlite - one SQLite file shared by every worker on the host (use with gunicorn)
+app.config['ADMIN_CACHE_BACKEND'] = os.getenv('ADMIN_CACHE_BACKEND', 'memory').lower()
+app.config['ADMIN_CACHE_PATH'] = os.getenv('ADMIN_CACHE_PATH', os.path.join(app.instance_path, 'admin-cache.sqlite3'))
+app.config['ADMIN_CACHE_TTL'] = float(os.getenv('ADMIN_CACHE_TTL', 30))
+app.config['ADMIN_CACHE_MAX_ENTRIES'] = int(os.getenv('ADMIN_CACHE_MAX_ENTRIES', 1024))
+# Concurrent identical cache misses in a worker share one computation; waiters give
+# up after this many seconds and compute for themselves
+app.config['ADMIN_COALESCE_TIMEOUT'] = float(os.getenv('ADMIN_COALESCE_TIMEOUT', 10))
+
+# Email outbox: emails are stored in the same transaction as the change that causes
+# them and delivered by background threads (0 workers = run `flask email-worker` instead)
+app.config['EMAIL_OUTBOX_WORKERS'] = int(os.getenv('EMAIL_OUTBOX_WORKERS', 2))
+app.config['EMAIL_OUTBOX_BATCH'] = int(os.getenv('EMAIL_OUTBOX_BATCH', 20))
+app.config['EMAIL_OUTBOX_POLL_INTERVAL'] = float(os.getenv('EMAIL_OUTBOX_POLL_INTERVAL', 5))
+# A claimed message is retried by another worker if not finished within this many seconds
+app.config['EMAIL_OUTBOX_LEASE'] = int(os.getenv('EMAIL_OUTBOX_LEASE', 120))
+# Failed sends are retried after BACKOFF_BASE * 2^(attempt-1) seconds (capped), then dead-lettered
+app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'] = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', 8))
+app.config['EMAIL_OUTBOX_BACKOFF_BASE'] = float(os.getenv('EMAIL_OUTBOX_BACKOFF_BASE', 30))
+app.config['EMAIL_OUTBOX_BACKOFF_MAX'] = float(os.getenv('EMAIL_OUTBOX_BACKOFF_MAX', 3600))
+
+# Pooled SMTP sessions used by the outbox workers: sessions kept open (default one per
+# worker), messages per session before it is recycled, idle seconds before a session
+# is dropped instead of reused, and the socket timeout
+app.config['SMTP_POOL_SIZE'] = int(os.getenv('SMTP_POOL_SIZE', max(app.config['EMAIL_OUTBOX_WORKERS'], 1)))
+app.config['SMTP_MAX_MESSAGES_PER_CONNECTION'] = int(os.getenv('SMTP_MAX_MESSAGES_PER_CONNECTION', 100))
+app.config['SMTP_MAX_IDLE'] = float(os.getenv('SMTP_MAX_IDLE', 60))
+app.config['SMTP_TIMEOUT'] = float(os.getenv('SMTP_TIMEOUT', 30))
+
+# Submission ingestion:
+#   sync         - submit handlers commit each submission before responding (default)
+#   write-behind - validated submissions are appended to a local log, acknowledged with
+#                  202 at once, and group-committed to the database by a background writer
+app.config['INGEST_MODE'] = os.getenv('INGEST_MODE', 'sync').lower()
+app.config['INGEST_LOG_DIR'] = os.getenv('INGEST_LOG_DIR', os.path.join(app.instance_path, 'ingest-log'))
+app.config['INGEST_BATCH_SIZE'] = int(os.getenv('INGEST_BATCH_SIZE', 500))
+app.config['INGEST_FLUSH_INTERVAL'] = float(os.getenv('INGEST_FLUSH_INTERVAL', 0.2))
+app.config['INGEST_SEGMENT_BYTES'] = int(os.getenv('INGEST_SEGMENT_BYTES', 16 * 1024 * 1024))
+# fsync every append (survives power loss); without it a process crash is still safe
+app.config['INGEST_FSYNC'] = os.getenv('INGEST_FSYNC', 'True').lower() == 'true'
+
+# Largest JSON body the public contact/admission endpoints accept
+app.config['SUBMISSION_MAX_BYTES'] = int(os.getenv('SUBMISSION_MAX_BYTES', 64 * 1024))
+
+# Largest number of rows one batch admin operation may touch
+app.config['ADMIN_BATCH_MAX'] = int(os.getenv('ADMIN_BATCH_MAX', 1000))
+
+# Bulk export: rows fetched from the database (and flushed to the client) per batch
+app.config['EXPORT_BATCH_ROWS'] = int(os.getenv('EXPORT_BATCH_ROWS', 1000))
+
+# Bulk import: rows per INSERT statement/transaction, and the largest upload accepted
+app.config['IMPORT_BATCH_ROWS'] = int(os.getenv('IMPORT_BATCH_ROWS', 1000))
+app.config['IMPORT_MAX_BYTES'] = int(os.getenv('IMPORT_MAX_BYTES', 20 * 1024 * 1024))
+
 # Initialize extensions
 db = SQLAlchemy(app)
 mail = Mail(app)
@@ -70,6 +205,13 @@ CORS(app,
 # Database Models
 class ContactSubmission(db.Model):
     __tablename__ = 'contact_submissions'
+    __table_args__ = (
+        # Admin list filtered by status, newest first (keyset on date, id); unfiltered list and counts
+        db.Index('ix_contact_submissions_status_date_id', 'status', 'submission_date', 'id'),
+        db.Index('ix_contact_submissions_date_id', 'submission_date', 'id'),
+        # Write-behind ingestion: replaying the log never inserts a submission twice
+        db.Index('uq_contact_submissions_ingest_id', 'ingest_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -78,6 +220,7 @@ class ContactSubmission(db.Model):
     message = db.Column(db.Text, nullable=False)
     submission_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='new')  # new, read, replied
+    ingest_id = db.Column(db.String(32))
     
     def to_dict(self):
         return {
@@ -92,6 +235,19 @@ class ContactSubmission(db.Model):
 
 class AdmissionApplication(db.Model):
     __tablename__ = 'admission_applications'
+    __table_args__ = (
+        # One application per (normalized) CNIC and email; enforced on insert
+        db.Index('uq_admission_applications_cnic', 'cnic', unique=True),
+        db.Index('uq_admission_applications_email', 'email', unique=True),
+        # Admin list filtered by status, newest first (keyset on date, id); status counts
+        db.Index('ix_admission_applications_status_date_id', 'status', 'application_date', 'id'),
+        # Unfiltered admin list
+        db.Index('ix_admission_applications_date_id', 'application_date', 'id'),
+        # Course distribution on the dashboard
+        db.Index('ix_admission_applications_course', 'course'),
+        # Write-behind ingestion: replaying the log never inserts a submission twice
+        db.Index('uq_admission_applications_ingest_id', 'ingest_id', unique=True),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     first_name = db.Column(db.String(50), nullable=False)
@@ -108,10 +264,11 @@ class AdmissionApplication(db.Model):
     application_date = db.Column(db.DateTime, default=datetime.utcnow)
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
     application_number = db.Column(db.String(20), unique=True)
+    ingest_id = db.Column(db.String(32))
     
     def __init__(self, **kwargs):
         super(AdmissionApplication, self).__init__(**kwargs)
-        # Application number will be set after database flush to get proper ID
+        # Application number is assigned on INSERT by a database trigger (migration 0002)
     
     def to_dict(self):
         return {
@@ -132,108 +289,2599 @@ class AdmissionApplication(db.Model):
             'status': self.status
         }
 
+class AdminCounter(db.Model):
+    """One dashboard number, e.g. applications.status.pending"""
+    __tablename__ = 'admin_counters'
+
+    name = db.Column(db.String(80), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+class EmailOutbox(db.Model):
+    """An email waiting for, or done with, delivery by the outbox workers"""
+    __tablename__ = 'email_outbox'
+    __table_args__ = (
+        # Workers claim due pending messages oldest first
+        db.Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    to_email = db.Column(db.String(254), nullable=False)
+    subject = db.Column(db.String(300), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    html_body = db.Column(db.Text)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, sent, dead
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    lease = db.Column(db.String(32))
+    locked_until = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+class SchemaMigration(db.Model):
+    __tablename__ = 'schema_migrations'
+
+    version = db.Column(db.String(50), primary_key=True)
+    description = db.Column(db.String(200), nullable=False)
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+# Schema migrations
+# create_all() only creates missing tables, so changes to existing tables
+# (indexes, constraints, triggers) are applied here, once, in version order.
+# Each migration runs in its own transaction together with its bookkeeping row.
+MIGRATIONS = []
+
+def migration(version, description):
+    """Register an upgrade function taking a SQLAlchemy connection"""
+    def register(upgrade):
+        MIGRATIONS.append((version, description, upgrade))
+        return upgrade
+    return register
+
+# Migrations spell out their DDL instead of reading the models, so they keep
+# doing the same thing after the models move on.
+def create_index(conn, name, table, columns, unique=False):
+    """CREATE [UNIQUE] INDEX IF NOT EXISTS (SQLite and PostgreSQL)"""
+    kind = 'UNIQUE INDEX' if unique else 'INDEX'
+    conn.exec_driver_sql(f"CREATE {kind} IF NOT EXISTS {name} ON {table} ({', '.join(columns)})")
+
+@migration('0001', 'Indexes for admission and contact query shapes')
+def add_query_indexes(conn):
+    create_index(conn, 'ix_admission_applications_cnic', 'admission_applications', ['cnic'])
+    create_index(conn, 'ix_admission_applications_email', 'admission_applications', ['email'])
+    create_index(conn, 'ix_admission_applications_status_date', 'admission_applications', ['status', 'application_date'])
+    create_index(conn, 'ix_admission_applications_application_date', 'admission_applications', ['application_date'])
+    create_index(conn, 'ix_admission_applications_course', 'admission_applications', ['course'])
+    create_index(conn, 'ix_contact_submissions_status_date', 'contact_submissions', ['status', 'submission_date'])
+    create_index(conn, 'ix_contact_submissions_submission_date', 'contact_submissions', ['submission_date'])
+    # Refresh planner statistics so the new indexes are used right away
+    conn.exec_driver_sql('ANALYZE')
+
+# Application numbers (VIU-<year>-<id:06d>) are filled in by the database in the
+# same INSERT; format_application_number() mirrors these expressions.
+APPLICATION_NUMBER_TRIGGERS = {
+    'sqlite': [
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_admission_applications_number
+        AFTER INSERT ON admission_applications
+        FOR EACH ROW WHEN NEW.application_number IS NULL
+        BEGIN
+            UPDATE admission_applications
+            SET application_number = 'VIU-' || substr(COALESCE(NEW.application_date, CURRENT_TIMESTAMP), 1, 4)
+                                     || '-' || printf('%06d', NEW.id)
+            WHERE id = NEW.id;
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        CREATE OR REPLACE FUNCTION admission_application_number() RETURNS trigger AS $$
+        BEGIN
+            IF NEW.application_number IS NULL THEN
+                NEW.application_number := 'VIU-' || to_char(COALESCE(NEW.application_date, now()), 'YYYY') || '-' ||
+                    CASE WHEN NEW.id < 1000000 THEN lpad(NEW.id::text, 6, '0') ELSE NEW.id::text END;
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        "DROP TRIGGER IF EXISTS trg_admission_applications_number ON admission_applications",
+        """
+        CREATE TRIGGER trg_admission_applications_number
+        BEFORE INSERT ON admission_applications
+        FOR EACH ROW EXECUTE PROCEDURE admission_application_number()
+        """,
+    ],
+}
+
+@migration('0002', 'Unique normalized CNIC/email and database-assigned application numbers')
+def add_admission_uniqueness(conn):
+    conn.exec_driver_sql(
+        "UPDATE admission_applications SET email = lower(trim(email)), cnic = trim(cnic) "
+        "WHERE email <> lower(trim(email)) OR cnic <> trim(cnic)"
+    )
+    for column in ('cnic', 'email'):
+        duplicates = conn.exec_driver_sql(
+            f"SELECT {column}, count(*) FROM admission_applications "
+            f"GROUP BY {column} HAVING count(*) > 1 ORDER BY count(*) DESC LIMIT 10"
+        ).all()
+        if duplicates:
+            listed = ', '.join(f'{value} ({count}x)' for value, count in duplicates)
+            raise RuntimeError(
+                f"Cannot make admission_applications.{column} unique; resolve these duplicates first: {listed}"
+            )
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS ix_admission_applications_{column}")
+        create_index(conn, f'uq_admission_applications_{column}', 'admission_applications', [column], unique=True)
+
+    statements = APPLICATION_NUMBER_TRIGGERS.get(conn.dialect.name)
+    if statements is None:
+        print(f"No application number trigger for {conn.dialect.name}; numbers are assigned by the app")
+        return
+    for statement in statements:
+        conn.exec_driver_sql(statement)
+
+@migration('0003', 'Keyset pagination indexes on (status, date, id) and (date, id)')
+def add_keyset_indexes(conn):
+    create_index(conn, 'ix_admission_applications_status_date_id', 'admission_applications', ['status', 'application_date', 'id'])
+    create_index(conn, 'ix_admission_applications_date_id', 'admission_applications', ['application_date', 'id'])
+    create_index(conn, 'ix_contact_submissions_status_date_id', 'contact_submissions', ['status', 'submission_date', 'id'])
+    create_index(conn, 'ix_contact_submissions_date_id', 'contact_submissions', ['submission_date', 'id'])
+    for name in ('ix_admission_applications_status_date', 'ix_admission_applications_application_date',
+                 'ix_contact_submissions_status_date', 'ix_contact_submissions_submission_date'):
+        conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+
+@migration('0004', 'Admin dashboard counters')
+def add_admin_counters(conn):
+    conn.exec_driver_sql(
+        "CREATE TABLE IF NOT EXISTS admin_counters (name VARCHAR(80) PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)"
+    )
+    reconcile_counters(conn)
+
+@migration('0005', 'Full-text search index over applications and contact messages')
+def add_search_index(conn):
+    dialect = conn.dialect.name
+    if dialect == 'sqlite' and conn.exec_driver_sql("SELECT sqlite_compileoption_used('ENABLE_FTS5')").scalar():
+        conn.exec_driver_sql("CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(content)")
+    elif dialect == 'postgresql':
+        conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS search_index (doc_id BIGINT PRIMARY KEY, content TEXT NOT NULL)")
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_search_index_content ON search_index "
+            "USING GIN (to_tsvector('simple', content))"
+        )
+    else:
+        conn.exec_driver_sql("CREATE TABLE IF NOT EXISTS search_index (doc_id INTEGER PRIMARY KEY, content TEXT NOT NULL)")
+    rebuild_search_index(conn)
+
+@migration('0006', 'Email outbox')
+def add_email_outbox(conn):
+    id_column = 'SERIAL PRIMARY KEY' if conn.dialect.name == 'postgresql' else 'INTEGER PRIMARY KEY'
+    conn.exec_driver_sql(f"""
+        CREATE TABLE IF NOT EXISTS email_outbox (
+            id {id_column},
+            to_email VARCHAR(254) NOT NULL,
+            subject VARCHAR(300) NOT NULL,
+            body TEXT NOT NULL,
+            html_body TEXT,
+            status VARCHAR(20) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP NOT NULL,
+            lease VARCHAR(32),
+            locked_until TIMESTAMP,
+            last_error TEXT,
+            created_at TIMESTAMP NOT NULL,
+            sent_at TIMESTAMP
+        )
+    """)
+    create_index(conn, 'ix_email_outbox_status_next_attempt', 'email_outbox', ['status', 'next_attempt_at'])
+
+@migration('0007', 'Ingest ids for write-behind submissions')
+def add_ingest_ids(conn):
+    for table in ('admission_applications', 'contact_submissions'):
+        columns = {column['name'] for column in db.inspect(conn).get_columns(table)}
+        if 'ingest_id' not in columns:
+            conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN ingest_id VARCHAR(32)")
+        create_index(conn, f'uq_{table}_ingest_id', table, ['ingest_id'], unique=True)
+
+def run_migrations():
+    """Apply pending migrations in order and return the versions applied"""
+    SchemaMigration.__table__.create(db.engine, checkfirst=True)
+    with db.engine.connect() as conn:
+        applied = set(conn.execute(db.select(SchemaMigration.version)).scalars())
+
+    done = []
+    for version, description, upgrade in sorted(MIGRATIONS, key=lambda m: m[0]):
+        if version in applied:
+            continue
+        with db.engine.begin() as conn:
+            upgrade(conn)
+            conn.execute(SchemaMigration.__table__.insert().values(
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow()
+            ))
+        print(f"Applied migration {version}: {description}")
+        done.append(version)
+    return done
+
 # Admin authentication
 ADMIN_CREDENTIALS = {
     'username': os.getenv('ADMIN_USERNAME', 'admin'),
     'password': os.getenv('ADMIN_PASSWORD', 'admin@123')
 }
 
-# Authentication decorator with session timeout check
-def require_admin_auth(f):
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        # Check if user is logged in
-        if not session.get('admin_logged_in'):
-            # For HTML requests, redirect to login page
-            if request.endpoint in ['admin_dashboard']:
-                return redirect('/admin_login.html')
-            # For API requests, return JSON error
-            return jsonify({
-                'success': False,
-                'error': 'Unauthorized access. Please login as admin.',
-                'redirect': '/admin_login.html',
-                'reason': 'not_logged_in'
-            }), 401
-        
-        # Check session timeout
-        last_activity_str = session.get('last_activity')
-        if last_activity_str:
-            try:
-                last_activity = datetime.fromisoformat(last_activity_str)
-                time_diff = datetime.now() - last_activity
-                
-                # Session timeout after 30 minutes of inactivity
-                if time_diff.total_seconds() > 1800:  # 30 minutes
-                    session.clear()
-                    # For HTML requests, redirect to login page
-                    if request.endpoint in ['admin_dashboard']:
-                        return redirect('/admin_login.html')
-                    # For API requests, return JSON error
-                    return jsonify({
-                        'success': False,
-                        'error': 'Session expired. Please login again.',
-                        'redirect': '/admin_login.html',
-                        'reason': 'session_expired'
-                    }), 401
-                
-                # Update last activity timestamp
-                session['last_activity'] = datetime.now().isoformat()
-                
-            except ValueError:
-                # Invalid timestamp, clear session
-                session.clear()
-                # For HTML requests, redirect to login page
-                if request.endpoint in ['admin_dashboard']:
-                    return redirect('/admin_login.html')
-                # For API requests, return JSON error
-                return jsonify({
-                    'success': False,
-                    'error': 'Invalid session. Please login again.',
-                    'redirect': '/admin_login.html',
-                    'reason': 'invalid_session'
-                }), 401
-        
-        return f(*args, **kwargs)
-    return decorated_function
+# Authentication decorator with session timeout check
+def require_admin_auth(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        # Check if user is logged in
+        if not session.get('admin_logged_in'):
+            # For HTML requests, redirect to login page
+            if request.endpoint in ['admin_dashboard']:
+                return redirect('/admin_login.html')
+            # For API requests, return JSON error
+            return jsonify({
+                'success': False,
+                'error': 'Unauthorized access. Please login as admin.',
+                'redirect': '/admin_login.html',
+                'reason': 'not_logged_in'
+            }), 401
+        
+        # Check session timeout
+        last_activity_str = session.get('last_activity')
+        if last_activity_str:
+            try:
+                last_activity = datetime.fromisoformat(last_activity_str)
+                time_diff = datetime.now() - last_activity
+                
+                # Session timeout after 30 minutes of inactivity
+                if time_diff.total_seconds() > 1800:  # 30 minutes
+                    session.clear()
+                    # For HTML requests, redirect to login page
+                    if request.endpoint in ['admin_dashboard']:
+                        return redirect('/admin_login.html')
+                    # For API requests, return JSON error
+                    return jsonify({
+                        'success': False,
+                        'error': 'Session expired. Please login again.',
+                        'redirect': '/admin_login.html',
+                        'reason': 'session_expired'
+                    }), 401
+                
+                # Update last activity timestamp
+                session['last_activity'] = datetime.now().isoformat()
+                
+            except ValueError:
+                # Invalid timestamp, clear session
+                session.clear()
+                # For HTML requests, redirect to login page
+                if request.endpoint in ['admin_dashboard']:
+                    return redirect('/admin_login.html')
+                # For API requests, return JSON error
+                return jsonify({
+                    'success': False,
+                    'error': 'Invalid session. Please login again.',
+                    'redirect': '/admin_login.html',
+                    'reason': 'invalid_session'
+                }), 401
+        
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Utility Functions
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+CNIC_PATTERN = re.compile(r'^\d{5}-\d{7}-\d$')
+PHONE_PATTERN = re.compile(r'^\+92[0-9]{10}$')
+DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+CNIC_SEPARATORS = re.compile(r'[\s-]')
+
+def validate_email(email):
+    return EMAIL_PATTERN.match(email) is not None
+
+def validate_cnic(cnic):
+    return CNIC_PATTERN.match(cnic) is not None
+
+def validate_phone(phone):
+    return PHONE_PATTERN.match(phone) is not None
+
+def normalize_email(email):
+    return email.strip().lower()
+
+def normalize_cnic(cnic):
+    """Canonical 12345-1234567-1 form, also accepting 13 bare digits or stray spaces"""
+    digits = CNIC_SEPARATORS.sub('', cnic)
+    if len(digits) == 13 and digits.isdigit():
+        return f"{digits[:5]}-{digits[5:12]}-{digits[12]}"
+    return cnic.strip()
+
+def parse_iso_date(value):
+    """date from YYYY-MM-DD (ValueError for anything else, including impossible dates)"""
+    if not DATE_PATTERN.match(value):
+        raise ValueError(value)
+    return datetime.fromisoformat(value).date()
+
+# Request validation
+# Submission payloads are described declaratively. Each Field normalizes and
+# checks one key with precompiled patterns, and Schema.validate() goes over the
+# whole payload once, returning the cleaned column values together with every
+# field error, so the form can show all problems in one round trip.
+class Field:
+    """One payload key: where it is stored, how it is normalized and what makes it invalid"""
+    __slots__ = ('key', 'column', 'normalize', 'pattern', 'parse', 'message', 'max_length')
+    
+    def __init__(self, key, column, normalize=str.strip, pattern=None, parse=None, message=None, max_length=None):
+        self.key = key
+        self.column = column
+        self.normalize = normalize
+        self.pattern = pattern
+        self.parse = parse
+        self.message = message
+        self.max_length = max_length
+    
+    def clean(self, raw):
+        """(value, None) or (None, Urdu error message)"""
+        if isinstance(raw, (int, float)) and not isinstance(raw, bool):
+            raw = str(raw)
+        if not isinstance(raw, str) or not raw.strip():
+            return None, f'فیلڈ {self.key} لازمی ہے'
+        value = self.normalize(raw)
+        if self.max_length is not None and len(value) > self.max_length:
+            return None, f'فیلڈ {self.key} زیادہ سے زیادہ {self.max_length} حروف کی ہو سکتی ہے'
+        if self.pattern is not None and self.pattern.match(value) is None:
+            return None, self.message
+        if self.parse is not None:
+            try:
+                value = self.parse(value)
+            except ValueError:
+                return None, self.message
+        return value, None
+
+class Schema:
+    """Required fields of one submission; string lengths default to the model's column sizes"""
+    __slots__ = ('fields',)
+    
+    def __init__(self, model, *fields):
+        columns = model.__table__.c
+        for field in fields:
+            if field.max_length is None:
+                field.max_length = getattr(columns[field.column].type, 'length', None)
+        self.fields = fields
+    
+    def validate(self, data):
+        """(values by column, {payload key: error}) for a decoded JSON body"""
+        if not isinstance(data, dict):
+            return {}, {'': 'درخواست کا ڈیٹا درست نہیں'}
+        values, errors = {}, {}
+        for field in self.fields:
+            value, error = field.clean(data.get(field.key))
+            if error is None:
+                values[field.column] = value
+            else:
+                errors[field.key] = error
+        return values, errors
+
+CONTACT_SCHEMA = Schema(
+    ContactSubmission,
+    Field('name', 'name'),
+    Field('email', 'email', normalize_email, EMAIL_PATTERN, message='براہ کرم صحیح ای میل ایڈریس درج کریں'),
+    Field('subject', 'subject'),
+    Field('message', 'message')
+)
+
+ADMISSION_SCHEMA = Schema(
+    AdmissionApplication,
+    Field('firstName', 'first_name'),
+    Field('lastName', 'last_name'),
+    Field('fatherName', 'father_name'),
+    Field('cnic', 'cnic', normalize_cnic, CNIC_PATTERN,
+          message='براہ کرم CNIC صحیح فارمیٹ میں درج کریں (12345-1234567-1)'),
+    Field('email', 'email', normalize_email, EMAIL_PATTERN, message='براہ کرم صحیح ای میل ایڈریس درج کریں'),
+    Field('phone', 'phone', pattern=PHONE_PATTERN,
+          message='براہ کرم فون نمبر صحیح فارمیٹ میں درج کریں (+923001234567)'),
+    Field('dateOfBirth', 'date_of_birth', parse=parse_iso_date, message='براہ کرم صحیح تاریخ پیدائش درج کریں'),
+    Field('gender', 'gender'),
+    Field('address', 'address'),
+    Field('education', 'education'),
+    Field('course', 'course')
+)
+
+def validation_error(errors):
+    """400 listing every field error; 'error' joins them for forms that show a single message"""
+    return jsonify({
+        'success': False,
+        'error': '، '.join(errors.values()),
+        'errors': errors
+    }), 400
+
+def submission_payload():
+    """Decoded JSON body of a public submission, or None if it is not JSON
+
+    Bodies over SUBMISSION_MAX_BYTES get a 413 before anything is read or parsed,
+    including chunked uploads that send no Content-Length. Call it outside the
+    handler's try/except so the 413 is not turned into a 500.
+    """
+    max_bytes = app.config['SUBMISSION_MAX_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes:
+        abort(413)
+    request.max_content_length = max_bytes
+    return request.get_json(silent=True)
+
+def format_application_number(application_id, application_date):
+    """Same format the database trigger writes (see APPLICATION_NUMBER_TRIGGERS)"""
+    return f"VIU-{application_date.year}-{application_id:06d}"
+
+# INSERT ... ON CONFLICT DO NOTHING RETURNING, per dialect
+CONFLICT_INSERTS = {
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+def insert_admission_application(values):
+    """Insert an application in a single statement
+
+    Returns (id, application_date), or None when the CNIC or email is already
+    taken. The unique indexes decide, so concurrent submissions cannot both win.
+    The caller commits.
+    """
+    table = AdmissionApplication.__table__
+    values.setdefault('application_date', datetime.utcnow())
+    dialect = db.session.get_bind().dialect
+    conflict_insert = CONFLICT_INSERTS.get(dialect.name)
+    if conflict_insert is not None and dialect.insert_returning:
+        stmt = conflict_insert(table).values(**values).on_conflict_do_nothing().returning(
+            table.c.id, table.c.application_date
+        )
+        return db.session.execute(stmt).first()
+
+    # Other databases: plain INSERT, duplicate reported by the unique index
+    try:
+        with db.session.begin_nested():
+            result = db.session.execute(table.insert().values(**values))
+    except IntegrityError:
+        return None
+    application_id = result.inserted_primary_key[0]
+    db.session.execute(table.update().where(table.c.id == application_id).values(
+        application_number=format_application_number(application_id, values['application_date'])
+    ))
+    return application_id, values['application_date']
+
+# Admin dashboard counters
+# admin_counters keeps every number get_stats() shows. Write handlers adjust it
+# in the same transaction as their change; reconcile_counters() recomputes it
+# from the tables to repair drift (e.g. two admins approving the same row).
+def application_counts(status, course, sign=1):
+    return {
+        'applications.total': sign,
+        f'applications.status.{status}': sign,
+        f'applications.course.{course}': sign
+    }
+
+def contact_counts(status, sign=1):
+    return {'contacts.total': sign, f'contacts.status.{status}': sign}
+
+def status_change(prefix, old_status, new_status):
+    if old_status == new_status:
+        return {}
+    return {f'{prefix}.status.{old_status}': -1, f'{prefix}.status.{new_status}': 1}
+
+def bump_counters(deltas):
+    """Add {counter name: change} to admin_counters within the current transaction"""
+    deltas = sorted((name, change) for name, change in deltas.items() if change)
+    if not deltas:
+        return
+    table = AdminCounter.__table__
+    conflict_insert = CONFLICT_INSERTS.get(db.session.get_bind().dialect.name)
+    if conflict_insert is not None:
+        stmt = conflict_insert(table).values([{'name': name, 'value': change} for name, change in deltas])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={'value': table.c.value + stmt.excluded.value}
+        )
+        db.session.execute(stmt)
+        return
+    for name, change in deltas:
+        updated = db.session.execute(table.update().where(table.c.name == name).values(value=table.c.value + change))
+        if updated.rowcount == 0:
+            db.session.execute(table.insert().values(name=name, value=change))
+
+# Admin search
+# search_index holds one normalized text document per application and contact
+# message: an FTS5 table on SQLite, a GIN-indexed tsvector on PostgreSQL, and a
+# plain table searched with LIKE elsewhere. Handlers update it in the same
+# transaction as the row; the same normalization runs on documents and queries.
+SEARCH_KINDS = {'application': 0, 'contact': 1}
+
+URDU_SEARCH_FOLDS = str.maketrans({
+    # Alef with hamza / madda / wasla
+    '\u0623': '\u0627', '\u0625': '\u0627', '\u0622': '\u0627', '\u0671': '\u0627',
+    # Hamza carriers
+    '\u0624': '\u0648', '\u0626': '\u06cc',
+    # Ye variants (Arabic ye, alef maksura, bari ye)
+    '\u064a': '\u06cc', '\u0649': '\u06cc', '\u06d2': '\u06cc', '\u06d3': '\u06cc',
+    # Kaf
+    '\u0643': '\u06a9',
+    # Heh / teh marbuta variants (do-chashmi heh stays distinct)
+    '\u0647': '\u06c1', '\u06d5': '\u06c1', '\u06c2': '\u06c1', '\u06c3': '\u06c1', '\u0629': '\u06c1',
+    # Arabic-Indic and Extended Arabic-Indic digits
+    **{chr(0x0660 + i): str(i) for i in range(10)},
+    **{chr(0x06f0 + i): str(i) for i in range(10)},
+})
+URDU_SEARCH_MARKS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+SEARCH_TOKEN = re.compile(r'\w+')
+
+def normalize_search_text(text):
+    """Fold case, presentation forms, diacritics and Urdu/Arabic letter variants"""
+    text = unicodedata.normalize('NFKC', text or '')
+    text = URDU_SEARCH_MARKS.sub('', text)
+    return text.translate(URDU_SEARCH_FOLDS).casefold()
+
+def search_document_text(text):
+    """Normalized document text, plus each al- prefixed word without its article
+    so that a search for کریم also finds عبد الکریم"""
+    text = normalize_search_text(text)
+    stripped = [token[2:] for token in SEARCH_TOKEN.findall(text) if token.startswith('\u0627\u0644') and len(token) > 3]
+    return ' '.join([text] + stripped)
+
+def search_doc_id(kind, ref_id):
+    return ref_id * len(SEARCH_KINDS) + SEARCH_KINDS[kind]
+
+def application_search_text(row):
+    cnic_digits = re.sub(r'\D', '', row.cnic or '')
+    return ' '.join(str(part or '') for part in (
+        row.application_number, row.first_name, row.last_name, row.father_name,
+        row.cnic, cnic_digits, row.email, row.phone
+    ))
+
+def contact_search_text(row):
+    return ' '.join(str(part or '') for part in (row.name, row.email, row.subject, row.message))
+
+def search_id_column(dialect_name):
+    # FTS5 documents are keyed by rowid; the plain SQLite table aliases it
+    return 'rowid' if dialect_name == 'sqlite' else 'doc_id'
+
+def index_search_document(kind, ref_id, text, conn=None):
+    """Insert or replace one document (on the session's connection unless conn is given)"""
+    execute = conn.execute if conn is not None else db.session.execute
+    dialect_name = (conn or db.session.get_bind()).dialect.name
+    id_column = search_id_column(dialect_name)
+    doc_id = search_doc_id(kind, ref_id)
+    execute(db.text(f"DELETE FROM search_index WHERE {id_column} = :doc_id"), {'doc_id': doc_id})
+    execute(
+        db.text(f"INSERT INTO search_index ({id_column}, content) VALUES (:doc_id, :content)"),
+        {'doc_id': doc_id, 'content': search_document_text(text)}
+    )
+
+def index_search_documents(kind, documents):
+    """Insert or replace many (ref_id, text) documents with one DELETE and one multi-row INSERT"""
+    if not documents:
+        return
+    id_column = search_id_column(db.session.get_bind().dialect.name)
+    unindex_search_documents(kind, [ref_id for ref_id, _ in documents])
+    db.session.execute(
+        db.text(f"INSERT INTO search_index ({id_column}, content) VALUES (:doc_id, :content)"),
+        [{'doc_id': search_doc_id(kind, ref_id), 'content': search_document_text(text)} for ref_id, text in documents]
+    )
+
+def unindex_search_document(kind, ref_id):
+    unindex_search_documents(kind, [ref_id])
+
+def unindex_search_documents(kind, ref_ids):
+    if not ref_ids:
+        return
+    id_column = search_id_column(db.session.get_bind().dialect.name)
+    db.session.execute(
+        db.text(f"DELETE FROM search_index WHERE {id_column} IN :doc_ids").bindparams(
+            db.bindparam('doc_ids', expanding=True)
+        ),
+        {'doc_ids': [search_doc_id(kind, ref_id) for ref_id in ref_ids]}
+    )
+
+# Columns the search documents are built from. Migration 0005 calls
+# rebuild_search_index(), so it must not select columns added by later migrations.
+SEARCH_SOURCE_COLUMNS = {
+    'application': ('admission_applications', application_search_text, (
+        'id', 'application_number', 'first_name', 'last_name', 'father_name', 'cnic', 'email', 'phone'
+    )),
+    'contact': ('contact_submissions', contact_search_text, ('id', 'name', 'email', 'subject', 'message')),
+}
+
+def rebuild_search_index(conn):
+    """Re-index every application and contact message; returns the document count"""
+    conn.exec_driver_sql("DELETE FROM search_index")
+    count = 0
+    for kind, (table, to_text, columns) in SEARCH_SOURCE_COLUMNS.items():
+        rows = conn.execution_options(yield_per=1000).exec_driver_sql(f"SELECT {', '.join(columns)} FROM {table}")
+        for row in rows:
+            index_search_document(kind, row.id, to_text(row), conn=conn)
+            count += 1
+    return count
+
+def search_mode():
+    """'fts5', 'tsvector' or 'like', depending on how search_index was created"""
+    bind = db.session.get_bind()
+    if bind.dialect.name == 'postgresql':
+        return 'tsvector'
+    if bind.dialect.name == 'sqlite':
+        sql = db.session.execute(
+            db.text("SELECT sql FROM sqlite_master WHERE name = 'search_index'")
+        ).scalar() or ''
+        if 'fts5' in sql.lower():
+            return 'fts5'
+    return 'like'
+
+def search_documents(query_text, kind, limit, offset):
+    """Ranked [(kind, ref_id, score)] for documents containing every query word (as a prefix)"""
+    tokens = SEARCH_TOKEN.findall(normalize_search_text(query_text))[:8]
+    if not tokens:
+        return []
+    mode = search_mode()
+    id_column = search_id_column(db.session.get_bind().dialect.name)
+    params = {'limit': limit, 'offset': offset}
+    kind_filter = ''
+    if kind is not None:
+        kind_filter = f" AND {id_column} % {len(SEARCH_KINDS)} = :kind_code"
+        params['kind_code'] = SEARCH_KINDS[kind]
+
+    if mode == 'fts5':
+        params['match'] = ' '.join(f'"{token}"*' for token in tokens)
+        sql = (f"SELECT rowid, -bm25(search_index) AS score FROM search_index "
+               f"WHERE search_index MATCH :match{kind_filter} ORDER BY score DESC, rowid DESC")
+    elif mode == 'tsvector':
+        params['tsquery'] = ' & '.join(f'{token}:*' for token in tokens)
+        sql = (f"SELECT doc_id, ts_rank(to_tsvector('simple', content), query) AS score "
+               f"FROM search_index, to_tsquery('simple', :tsquery) AS query "
+               f"WHERE to_tsvector('simple', content) @@ query{kind_filter} ORDER BY score DESC, doc_id DESC")
+    else:
+        conditions = []
+        for i, token in enumerate(tokens):
+            params[f'token{i}'] = f'%{token}%'
+            conditions.append(f'content LIKE :token{i}')
+        sql = (f"SELECT {id_column}, 0 AS score FROM search_index "
+               f"WHERE {' AND '.join(conditions)}{kind_filter} ORDER BY {id_column} DESC")
+
+    rows = db.session.execute(db.text(f"{sql} LIMIT :limit OFFSET :offset"), params).all()
+    kinds_by_code = {code: name for name, code in SEARCH_KINDS.items()}
+    return [
+        (kinds_by_code[doc_id % len(SEARCH_KINDS)], doc_id // len(SEARCH_KINDS), float(score))
+        for doc_id, score in rows
+    ]
+
+COUNTER_SOURCE_SQL = """
+    SELECT 'applications.total', count(*) FROM admission_applications
+    UNION ALL
+    SELECT 'applications.status.' || status, count(*) FROM admission_applications
+    WHERE status IS NOT NULL GROUP BY status
+    UNION ALL
+    SELECT 'applications.course.' || course, count(*) FROM admission_applications GROUP BY course
+    UNION ALL
+    SELECT 'contacts.total', count(*) FROM contact_submissions
+    UNION ALL
+    SELECT 'contacts.status.' || status, count(*) FROM contact_submissions
+    WHERE status IS NOT NULL GROUP BY status
+"""
+
+def reconcile_counters(conn):
+    """Recompute admin_counters from the tables; returns {name: (stored, actual)} for drifted counters
+
+    Writers are held off while it runs (table lock on PostgreSQL, the write lock
+    taken by the DELETE on SQLite), so a concurrent submission is counted exactly once.
+    """
+    if conn.dialect.name == 'postgresql':
+        conn.exec_driver_sql('LOCK TABLE admin_counters IN EXCLUSIVE MODE')
+    stored = dict(conn.exec_driver_sql('SELECT name, value FROM admin_counters').all())
+    conn.exec_driver_sql('DELETE FROM admin_counters')
+    conn.exec_driver_sql(f'INSERT INTO admin_counters (name, value) {COUNTER_SOURCE_SQL}')
+    actual = dict(conn.exec_driver_sql('SELECT name, value FROM admin_counters').all())
+    return {
+        name: (stored.get(name, 0), actual.get(name, 0))
+        for name in sorted(stored.keys() | actual.keys())
+        if stored.get(name, 0) != actual.get(name, 0)
+    }
+
+def email_config_problem():
+    """Why email cannot be sent with the current configuration, or None"""
+    if not app.config['MAIL_USERNAME'] or not app.config['MAIL_PASSWORD']:
+        return "Email configuration is not properly set up"
+    if app.config['MAIL_USERNAME'] == 'your-email@gmail.com' or app.config['MAIL_PASSWORD'] == 'your-gmail-app-password-here':
+        return "Email configuration contains placeholder values. Please update your .env file with actual Gmail credentials."
+    return None
+
+# Pooled SMTP sessions
+# Opening a session costs a TCP connect, STARTTLS and a login, often more than
+# the message itself. The pool keeps authenticated sessions open and sends many
+# messages over each, recycling a session after max_messages (servers cap
+# messages per connection) or when it has idled past max_idle, and dropping it
+# on any connection-level error or a 421 reply.
+class SMTPConnectionPool:
+    """Up to size authenticated SMTP sessions shared by the threads of one process"""
+    class ConnectError(Exception):
+        """No session could be opened or logged in"""
+    
+    def __init__(self, size, max_messages, max_idle, timeout):
+        self.size = size
+        self.max_messages = max_messages
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self.opened = 0
+        self.reused = 0
+        self.recycled = 0
+        self.discarded = 0
+        self.sent = 0
+        self.retried = 0
+    
+    def _connect(self):
+        config = app.config
+        try:
+            if config['MAIL_USE_SSL']:
+                host = smtplib.SMTP_SSL(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=self.timeout)
+            else:
+                host = smtplib.SMTP(config['MAIL_SERVER'], config['MAIL_PORT'], timeout=self.timeout)
+            if config['MAIL_USE_TLS']:
+                host.starttls()
+            if config['MAIL_USERNAME'] and config['MAIL_PASSWORD']:
+                host.login(config['MAIL_USERNAME'], config['MAIL_PASSWORD'])
+        except (smtplib.SMTPException, OSError) as e:
+            raise self.ConnectError(f"{type(e).__name__}: {e}") from e
+        with self._lock:
+            self.opened += 1
+        return SimpleNamespace(host=host, sent=0, last_used=time.monotonic())
+    
+    def _close(self, session):
+        try:
+            session.host.quit()
+        except (smtplib.SMTPException, OSError):
+            session.host.close()
+    
+    def _checkout(self):
+        """(session, reused): the most recently used idle session, else a new one"""
+        expired = []
+        session = None
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.pop()
+                if now - candidate.last_used <= self.max_idle:
+                    session = candidate
+                    self.reused += 1
+                    break
+                expired.append(candidate)
+            self.recycled += len(expired)
+        for old in expired:
+            self._close(old)
+        if session is not None:
+            return session, True
+        return self._connect(), False
+    
+    def _checkin(self, session):
+        if session.sent >= self.max_messages:
+            with self._lock:
+                self.recycled += 1
+            self._close(session)
+            return
+        session.last_used = time.monotonic()
+        with self._lock:
+            self._idle.append(session)
+    
+    @staticmethod
+    def session_broken(error):
+        """True when the session cannot carry another message after error"""
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return any(code == 421 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code == 421
+        # smtplib resets the session after other refusals; anything else is the socket
+        return not isinstance(error, smtplib.SMTPException) or isinstance(error, smtplib.SMTPServerDisconnected)
+    
+    def send(self, message):
+        """Send a flask_mail Message; a reused session that turns out dead is replaced once"""
+        if mail.state.suppress:
+            return
+        if message.has_bad_headers():
+            raise BadHeaderError
+        data = message.as_bytes()
+        with self._slots:
+            while True:
+                session, reused = self._checkout()
+                try:
+                    session.host.sendmail(
+                        message.sender, list(message.send_to), data, message.mail_options, message.rcpt_options
+                    )
+                except Exception as e:
+                    if not self.session_broken(e):
+                        session.sent += 1
+                        self._checkin(session)
+                        raise
+                    session.host.close()
+                    with self._lock:
+                        self.discarded += 1
+                    # A pooled session may have been closed by the server while idle
+                    if reused:
+                        with self._lock:
+                            self.retried += 1
+                        continue
+                    raise
+                session.sent += 1
+                with self._lock:
+                    self.sent += 1
+                self._checkin(session)
+                return
+    
+    def close(self):
+        """Quit every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            self._close(session)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'opened': self.opened,
+                'reused': self.reused,
+                'recycled': self.recycled,
+                'discarded': self.discarded,
+                'retried': self.retried,
+                'sent': self.sent
+            }
+
+smtp_pool = SMTPConnectionPool(
+    app.config['SMTP_POOL_SIZE'],
+    app.config['SMTP_MAX_MESSAGES_PER_CONNECTION'],
+    app.config['SMTP_MAX_IDLE'],
+    app.config['SMTP_TIMEOUT']
+)
+
+# Email outbox
+# Handlers call enqueue_email() before their commit, so an email exists exactly
+# when the change that caused it does, then wake the dispatcher after commit.
+# Worker threads claim due messages with a lease (SKIP LOCKED on PostgreSQL),
+# send them over pooled SMTP sessions (smtp_pool), and reschedule failures with
+# exponential backoff until EMAIL_OUTBOX_MAX_ATTEMPTS, after which the message is
+# dead-lettered (status 'dead') for an admin to retry. Delivery is at least once:
+# a worker that dies mid-batch leaves its lease to expire and the batch is resent.
+def enqueue_email(to_email, subject, body, html_body=None):
+    """Add an email to the outbox in the current transaction"""
+    if not to_email:
+        print(f"Email not queued (no recipient): {subject}")
+        return None
+    message = EmailOutbox(to_email=to_email, subject=subject, body=body, html_body=html_body)
+    db.session.add(message)
+    return message
+
+def enqueue_emails(messages):
+    """Add many (to_email, subject, body) emails to the outbox with one multi-row INSERT"""
+    rows = [{'to_email': to_email, 'subject': subject, 'body': body} for to_email, subject, body in messages if to_email]
+    if rows:
+        db.session.execute(EmailOutbox.__table__.insert(), rows)
+
+class EmailOutboxDispatcher:
+    """Background threads draining email_outbox; one set per process"""
+    def __init__(self, workers, batch_size, poll_interval, lease_seconds, max_attempts, backoff_base, backoff_max):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.threads = []
+        self.claimed = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+    
+    def start(self, workers=None):
+        """Start the worker threads once per process (again after a fork)"""
+        workers = self.workers if workers is None else workers
+        if self._pid == os.getpid() or workers <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self.threads = [
+                threading.Thread(target=self._run, name=f'email-outbox-{i}', daemon=True)
+                for i in range(workers)
+            ]
+            for thread in self.threads:
+                thread.start()
+    
+    def wake(self):
+        self._wakeup.set()
+    
+    def _run(self):
+        while True:
+            try:
+                with app.app_context():
+                    handled = self.drain_once()
+            except Exception as e:
+                print(f"Email outbox worker error: {e}")
+                handled = 0
+            if not handled:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+    
+    def backoff(self, attempts):
+        delay = min(self.backoff_base * 2 ** (attempts - 1), self.backoff_max)
+        # Jitter keeps retries of a failed batch from arriving together
+        return delay * random.uniform(0.8, 1.2)
+    
+    def claim(self):
+        """Lease up to batch_size due messages; returns the claimed rows"""
+        table = EmailOutbox.__table__
+        now = datetime.utcnow()
+        lease = os.urandom(16).hex()
+        unleased = db.or_(table.c.locked_until.is_(None), table.c.locked_until < now)
+        due = db.select(table.c.id).where(
+            table.c.status == 'pending', table.c.next_attempt_at <= now, unleased
+        ).order_by(table.c.next_attempt_at, table.c.id).limit(self.batch_size)
+        with db.engine.begin() as conn:
+            if conn.dialect.name == 'postgresql':
+                due = due.with_for_update(skip_locked=True)
+            # The outer condition is re-checked per row, so two workers never hold the same message
+            conn.execute(table.update().where(table.c.id.in_(due), unleased).values(
+                lease=lease,
+                locked_until=now + timedelta(seconds=self.lease_seconds),
+                attempts=table.c.attempts + 1
+            ))
+            return conn.execute(db.select(table).where(table.c.lease == lease).order_by(table.c.id)).all()
+    
+    def finish(self, row, error=None, permanent=False):
+        """Record the outcome of one send attempt, if this worker still holds the lease"""
+        table = EmailOutbox.__table__
+        now = datetime.utcnow()
+        if error is None:
+            values = {'status': 'sent', 'sent_at': now, 'last_error': None}
+        elif permanent or row.attempts >= self.max_attempts:
+            values = {'status': 'dead', 'last_error': error}
+        else:
+            values = {'next_attempt_at': now + timedelta(seconds=self.backoff(row.attempts)), 'last_error': error}
+        with db.engine.begin() as conn:
+            conn.execute(
+                table.update().where(table.c.id == row.id, table.c.lease == row.lease)
+                .values(lease=None, locked_until=None, **values)
+            )
+        with self._lock:
+            if error is None:
+                self.sent += 1
+            elif values.get('status') == 'dead':
+                self.dead += 1
+                print(f"Email {row.id} to {row.to_email} dead-lettered after {row.attempts} attempt(s): {error}")
+            else:
+                self.retried += 1
+    
+    def drain_once(self):
+        """Claim and send one batch; returns how many messages were handled"""
+        if email_config_problem():
+            # Leave messages pending (and their attempts untouched) until email is configured
+            return 0
+        rows = self.claim()
+        if not rows:
+            return 0
+        with self._lock:
+            self.claimed += len(rows)
+        
+        for index, row in enumerate(rows):
+            try:
+                smtp_pool.send(Message(
+                    subject=row.subject,
+                    sender=app.config['MAIL_USERNAME'],
+                    recipients=[row.to_email],
+                    body=row.body,
+                    html=row.html_body
+                ))
+            except SMTPConnectionPool.ConnectError as e:
+                # Server unreachable or login failed: every message not yet handled is retried later
+                for pending in rows[index:]:
+                    self.finish(pending, str(e))
+                break
+            except smtplib.SMTPRecipientsRefused as e:
+                # 5xx for the recipient will not change on retry
+                permanent = all(code >= 500 for code, _ in e.recipients.values())
+                self.finish(row, f"{type(e).__name__}: {e}", permanent)
+            except Exception as e:
+                self.finish(row, f"{type(e).__name__}: {e}")
+            else:
+                self.finish(row)
+        return len(rows)
+    
+    def stats(self):
+        """Queue depth from the table, plus this process's worker counters"""
+        table = EmailOutbox.__table__
+        now = datetime.utcnow()
+        depth = dict(db.session.execute(
+            db.select(table.c.status, db.func.count()).group_by(table.c.status)
+        ).all())
+        due = db.session.execute(
+            db.select(db.func.count()).select_from(table)
+            .where(table.c.status == 'pending', table.c.next_attempt_at <= now)
+        ).scalar()
+        oldest = db.session.execute(
+            db.select(db.func.min(table.c.created_at)).where(table.c.status == 'pending')
+        ).scalar()
+        with self._lock:
+            workers = {
+                'threads': sum(thread.is_alive() for thread in self.threads),
+                'claimed': self.claimed,
+                'sent': self.sent,
+                'retried': self.retried,
+                'dead_lettered': self.dead
+            }
+        return {
+            'pending': depth.get('pending', 0),
+            'due': due,
+            'sent': depth.get('sent', 0),
+            'dead': depth.get('dead', 0),
+            'oldest_pending_age_seconds': round((now - oldest).total_seconds(), 1) if oldest else None,
+            'email_configured': email_config_problem() is None,
+            'workers': workers
+        }
+
+email_outbox = EmailOutboxDispatcher(
+    app.config['EMAIL_OUTBOX_WORKERS'],
+    app.config['EMAIL_OUTBOX_BATCH'],
+    app.config['EMAIL_OUTBOX_POLL_INTERVAL'],
+    app.config['EMAIL_OUTBOX_LEASE'],
+    app.config['EMAIL_OUTBOX_MAX_ATTEMPTS'],
+    app.config['EMAIL_OUTBOX_BACKOFF_BASE'],
+    app.config['EMAIL_OUTBOX_BACKOFF_MAX']
+)
+
+@app.before_request
+def start_email_outbox():
+    email_outbox.start()
+
+COURSE_NAMES = {
+    'quran': 'فہم القرآن',
+    'arabic': 'اللغة العربية',
+    'islamic-studies': 'علوم الدین'
+}
+
+def admission_emails(values, application_number):
+    """[(to_email, subject, body)] for a new application: the admin notice and the applicant's confirmation"""
+    admin_subject = f"نئی داخلہ درخواست - {values['first_name']} {values['last_name']}"
+    admin_body = f"""
+نئی داخلہ درخواست موصول ہوئی:
+
+Application Number: {application_number}
+
+طالب علم کی تفصیلات:
+نام: {values['first_name']} {values['last_name']}
+والد کا نام: {values['father_name']}
+CNIC: {values['cnic']}
+ای میل: {values['email']}
+فون: {values['phone']}
+تاریخ پیدائش: {values['date_of_birth'].isoformat()}
+جنس: {values['gender']}
+پتہ: {values['address']}
+تعلیمی قابلیت: {values['education']}
+منتخب کردہ کورس: {values['course']}
+
+درخواست کی تاریخ: {values['application_date'].strftime('%Y-%m-%d %H:%M:%S')}
+
+Virtual Islamic University Admissions
+        """
+    user_subject = "داخلہ درخواست موصول ہوئی - Virtual Islamic University"
+    user_body = f"""
+السلام علیکم {values['first_name']} {values['last_name']},
+
+آپ کی داخلہ درخواست کامیابی سے موصول ہوئی ہے۔
+
+Application Number: {application_number}
+منتخب کردہ کورس: {COURSE_NAMES.get(values['course'], values['course'])}
+
+ہم جلد ہی آپ کی درخواست کا جائزہ لے کر آپ سے رابطہ کریں گے۔
+اپنا Application Number محفوظ رکھیں۔
+
+شکریہ!
+Virtual Islamic University Admissions Team
+{os.getenv('UNIVERSITY_EMAIL')}
+{os.getenv('UNIVERSITY_PHONE')}
+        """
+    return [(os.getenv('ADMIN_EMAIL'), admin_subject, admin_body), (values['email'], user_subject, user_body)]
+
+def contact_emails(contact):
+    """[(to_email, subject, body)] for a new contact message: the admin notice and the sender's confirmation"""
+    admin_subject = f"نیا رابطہ پیغام - {contact.subject}"
+    admin_body = f"""
+نیا رابطہ پیغام موصول ہوا:
+
+نام: {contact.name}
+ای میل: {contact.email}
+موضوع: {contact.subject}
+پیغام: {contact.message}
+
+Submission ID: {contact.id}
+        """
+    user_subject = "آپ کا پیغام موصول ہوا - Virtual Islamic University"
+    user_body = f"""
+السلام علیکم {contact.name},
+
+آپ کا پیغام کامیابی سے موصول ہوا ہے۔
+موضوع: {contact.subject}
+
+ہم جلد ہی آپ سے رابطہ کریں گے۔
+
+شکریہ!
+Virtual Islamic University Team
+{os.getenv('UNIVERSITY_EMAIL')}
+{os.getenv('UNIVERSITY_PHONE')}
+        """
+    return [(os.getenv('ADMIN_EMAIL'), admin_subject, admin_body), (contact.email, user_subject, user_body)]
+
+def approval_email(application):
+    """(subject, body) telling an applicant their application was approved"""
+    subject = "داخلہ منظور! - Virtual Islamic University"
+    body = f"""
+السلام علیکم {application.first_name} {application.last_name},
+
+مبارک ہو! آپ کی داخلہ درخواست منظور ہو گئی ہے۔
+
+Application Number: {application.application_number}
+منتخب کردہ کورس: {COURSE_NAMES.get(application.course, application.course)}
+
+ہم جلد ہی آپ کو کورس کی تفصیلات اور شروعات کی تاریخ کے بارے میں مطلع کریں گے۔
+
+خوش آمدید Virtual Islamic University میں!
+
+Virtual Islamic University Admissions Team
+{os.getenv('UNIVERSITY_EMAIL')}
+{os.getenv('UNIVERSITY_PHONE')}
+        """
+    return subject, body
+
+def rejection_email(application, rejection_reason):
+    """(subject, body) telling an applicant their application was rejected"""
+    subject = "داخلہ درخواست - Virtual Islamic University"
+    body = f"""
+السلام علیکم {application.first_name} {application.last_name},
+
+ہمیں افسوس ہے کہ اس وقت آپ کی داخلہ درخواست منظور نہیں کی جا سکی۔
+
+Application Number: {application.application_number}
+وجہ: {rejection_reason}
+
+آپ مستقبل میں دوبارہ درخواست دے سکتے ہیں۔
+
+شکریہ!
+Virtual Islamic University Admissions Team
+{os.getenv('UNIVERSITY_EMAIL')}
+{os.getenv('UNIVERSITY_PHONE')}
+        """
+    return subject, body
+
+# Static mount router
+class TTLCache:
+    """Bounded LRU mapping whose entries expire ttl seconds after being set"""
+    MISSING = object()
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                expires_at, value = item
+                if expires_at > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+class StaticMount:
+    """A directory served under a URL prefix"""
+    __slots__ = ('prefix', 'directory', 'pages_only')
+
+    def __init__(self, prefix, directory, pages_only=False):
+        self.prefix = prefix
+        self.directory = directory
+        self.pages_only = pages_only
+
+class MountTrie:
+    """Prefix trie over URL path segments; lookup returns the deepest mount"""
+
+    def __init__(self):
+        self._root = {'children': {}, 'mount': None}
+
+    def insert(self, prefix, mount):
+        node = self._root
+        for segment in filter(None, prefix.split('/')):
+            node = node['children'].setdefault(segment, {'children': {}, 'mount': None})
+        node['mount'] = mount
+
+    def lookup(self, segments):
+        node = self._root
+        best, best_depth = node['mount'], 0
+        for depth, segment in enumerate(segments, 1):
+            node = node['children'].get(segment)
+            if node is None:
+                break
+            if node['mount'] is not None:
+                best, best_depth = node['mount'], depth
+        return best, segments[best_depth:]
+
+class StaticRouter:
+    """Resolve request paths to files through the mount table
+
+    Stat results (including misses) are cached for STATIC_STAT_CACHE_TTL seconds,
+    and request paths that resolved to nothing are kept in a bounded negative
+    cache so repeated probes (wp-login.php and friends) never touch the disk.
+    """
+
+    def __init__(self, root_path, stat_cache, negative_cache):
+        self.root_path = root_path
+        self._trie = MountTrie()
+        self._aliases = {}
+        self._stats = stat_cache
+        self._negative = negative_cache
+        self.resolved = 0
+        self.not_found = 0
+
+    def mount(self, prefix, directory, pages_only=False):
+        mount = StaticMount(prefix, os.path.join(self.root_path, directory), pages_only)
+        self._trie.insert(prefix, mount)
+        return mount
+
+    def alias(self, url_path, file_path, source_path=None):
+        """Serve file_path for exactly url_path (hashed assets, built pages)
+
+        A built page passes its source_path, which is served instead whenever it
+        is newer than the build (edited without re-running build_assets.py).
+        """
+        if not os.path.isfile(file_path):
+            return False
+        self._aliases[url_path] = (file_path, source_path)
+        self._negative.discard(url_path)
+        return True
+
+    def aliased(self, url_path):
+        """File aliased to url_path, or None"""
+        alias = self._aliases.get(url_path)
+        if alias is None:
+            return None
+        path, source_path = alias
+        if source_path is not None:
+            built, source = self.stat(path), self.stat(source_path)
+            if built is None or source is None or source.st_mtime_ns > built.st_mtime_ns:
+                return source_path
+        return path
+
+    def page_path(self, filename):
+        """File to serve for a top-level page: its built copy if up to date, else the source"""
+        return self.aliased(filename) or safe_join(self.root_path, filename)
+
+    def stat(self, path):
+        """Cached os.stat(); returns None for missing paths"""
+        st = self._stats.get(path, TTLCache.MISSING)
+        if st is TTLCache.MISSING:
+            try:
+                st = os.stat(path)
+            except OSError:
+                st = None
+            self._stats.set(path, st)
+        return st
+
+    def resolve(self, url_path):
+        """Return (mount, file path, stat) for a request path, or None"""
+        if self._negative.get(url_path):
+            self.not_found += 1
+            return None
+
+        mount, rest = self._trie.lookup(url_path.split('/'))
+        path = self.aliased(url_path)
+        if path is None and mount is not None and rest:
+            rel_path = '/'.join(rest)
+            # A pages-only mount serves its own top-level pages, never build/pages/ or other subdirectories
+            if not mount.pages_only or (len(rest) == 1 and rel_path.endswith('.html')):
+                path = safe_join(mount.directory, rel_path)
+
+        st = self.stat(path) if path else None
+        if st is None or not stat.S_ISREG(st.st_mode):
+            self._negative.set(url_path, True)
+            self.not_found += 1
+            return None
+
+        self.resolved += 1
+        return mount, path, st
+
+    def forget(self, url_path):
+        self._negative.discard(url_path)
+
+    def stats(self):
+        return {
+            'resolved': self.resolved,
+            'not_found': self.not_found,
+            'aliases': len(self._aliases),
+            'stat_cache': self._stats.stats(),
+            'negative_cache': self._negative.stats()
+        }
+
+static_router = StaticRouter(
+    app.root_path,
+    TTLCache(app.config['STATIC_STAT_CACHE_SIZE'], app.config['STATIC_STAT_CACHE_TTL']),
+    TTLCache(app.config['STATIC_NEGATIVE_CACHE_SIZE'], app.config['STATIC_NEGATIVE_CACHE_TTL'])
+)
+
+# Mount table: URL prefix -> directory under the project root.
+# The root mount only serves the top-level .html pages (no subdirectories, so
+# not build/pages/ either; see StaticRouter.resolve).
+static_router.mount('', '.', pages_only=True)
+static_router.mount('assets', 'assets')
+static_router.mount('Images', 'Images')
+static_router.mount('static', 'static')
+static_router.mount('mehr-nastaliq-web-font-v2.0', 'mehr-nastaliq-web-font-v2.0')
+static_router.mount('mehr nastaliq web font v 2.0', 'mehr nastaliq web font v 2.0')
+static_router.mount('jameel-noori-nastaleeq', 'jameel-noori-nastaleeq')
+
+def load_asset_manifest(manifest_path):
+    """Register hashed asset URLs and minified pages from the build manifest"""
+    if not manifest_path:
+        return
+    path = os.path.join(app.root_path, manifest_path)
+    if not os.path.isfile(path):
+        return
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Asset manifest error: {e}")
+        return
+
+    files = 0
+    for url_path, file_path in manifest.get('files', {}).items():
+        if static_router.alias(url_path, os.path.join(app.root_path, file_path)):
+            files += 1
+
+    pages = 0
+    for page, built in manifest.get('pages', {}).items():
+        built_path = os.path.join(app.root_path, built)
+        # Pages edited after the build are served from source (checked per request, see StaticRouter.aliased)
+        if not static_router.alias(page, built_path, os.path.join(app.root_path, page)):
+            continue
+        pages += 1
+        if static_router.aliased(page) != built_path:
+            print(f"Asset manifest: {page} changed since the last build, serving the source")
+
+    print(f"Asset manifest loaded: {files} hashed files, {pages} built pages")
+
+load_asset_manifest(app.config['ASSET_MANIFEST'])
+
+# Responsive image variants
+class ImageVariantIndex:
+    """Precomputed lookup of responsive variants by absolute source path"""
+
+    def __init__(self):
+        self._images = {}
+
+    def load(self, root_path, manifest_path):
+        if not manifest_path:
+            return
+        path = os.path.join(root_path, manifest_path)
+        if not os.path.isfile(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Image manifest error: {e}")
+            return
+
+        images = {}
+        for rel_path, entry in manifest.get('images', {}).items():
+            formats = {}
+            for variant in entry.get('variants', []):
+                formats.setdefault(variant['format'], []).append(
+                    (variant['width'], os.path.join(root_path, variant['path']), variant['bytes'])
+                )
+            for candidates in formats.values():
+                candidates.sort()
+            images[os.path.join(root_path, rel_path)] = (entry['bytes'], formats)
+        self._images = images
+        print(f"Image manifest loaded: {len(images)} images with responsive variants")
+
+    def __contains__(self, path):
+        return path in self._images
+
+    def choose(self, path, formats, width=None):
+        """Smallest variant at least width wide (largest if none) in the first usable format
+
+        Returns None when the original is already the better choice.
+        """
+        original_bytes, variants = self._images[path]
+        for fmt in formats:
+            candidates = variants.get(fmt)
+            if not candidates:
+                continue
+            chosen = candidates[-1]
+            if width:
+                chosen = next((c for c in candidates if c[0] >= width), chosen)
+            if chosen[2] < original_bytes:
+                return chosen[1]
+        return None
+
+    def __len__(self):
+        return len(self._images)
+
+image_variants = ImageVariantIndex()
+image_variants.load(app.root_path, app.config['RESPONSIVE_IMAGE_MANIFEST'])
+
+# Request headers that influence which image variant is served
+IMAGE_VARY_HEADERS = ('Accept', 'Sec-CH-Width', 'Sec-CH-DPR')
+# Sent on pages so browsers start sending width/DPR client hints
+ACCEPT_CH = 'Sec-CH-Width, Sec-CH-DPR'
+
+def accepted_image_formats():
+    """Modern formats the client lists explicitly in Accept, then the original formats"""
+    explicit = {value for value, quality in request.accept_mimetypes if quality > 0}
+    return [fmt for fmt in ('avif', 'webp') if f'image/{fmt}' in explicit] + ['jpeg', 'png']
+
+def requested_image_width():
+    """Target width in device pixels from ?w= (scaled by DPR) or the Sec-CH-Width hint"""
+    width = request.args.get('w', type=int)
+    if width:
+        try:
+            dpr = float(request.headers.get('Sec-CH-DPR') or request.headers.get('DPR') or 1)
+        except ValueError:
+            dpr = 1
+        width = round(width * min(max(dpr, 1), 4))
+    else:
+        width = request.headers.get('Sec-CH-Width', type=int) or request.headers.get('Width', type=int)
+    return width if width and width > 0 else None
+
+# Single-flight execution
+class SingleFlight:
+    """Run one computation per key at a time; concurrent callers share its outcome
+
+    Followers wait up to timeout seconds for the leader and get its result or its
+    exception. Nothing is remembered once the leader finishes.
+    """
+
+    class Timeout(TimeoutError):
+        """A follower gave up waiting; the leader's own errors are never this type"""
+
+    class _Call:
+        __slots__ = ('event', 'result', 'error')
+
+        def __init__(self):
+            self.event = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.followers = 0
+        self.timeouts = 0
+
+    def do(self, key, fn, timeout=None):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+                self.leaders += 1
+            else:
+                self.followers += 1
+
+        if leader:
+            try:
+                call.result = fn()
+                return call.result
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.event.set()
+
+        if not call.event.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise self.Timeout(f"Timed out waiting for in-flight call {key!r}")
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'in_flight': len(self._calls),
+                'leaders': self.leaders,
+                'followers': self.followers,
+                'timeouts': self.timeouts
+            }
+
+# On-demand image resizing
+IMAGE_RESIZE_ROOTS = ('Images', 'assets/img', 'Teacher Data')
+IMAGE_RESIZE_FORMATS = {
+    'avif': ('AVIF', '.avif', 'image/avif'),
+    'webp': ('WEBP', '.webp', 'image/webp'),
+    'jpeg': ('JPEG', '.jpg', 'image/jpeg'),
+    'png': ('PNG', '.png', 'image/png'),
+}
+
+class ImageDiskCache:
+    """Size-capped directory of encoded variants, evicting least recently used files
+
+    Recency is tracked through atime (set explicitly, so noatime mounts are fine)
+    because mtime feeds the ETag. Concurrent identical encodes inside a worker are
+    collapsed by a single-flight lock; across workers, atomic renames make a
+    duplicate encode harmless.
+    """
+
+    # Refresh a hit's atime at most this often (seconds)
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key, extension):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], digest + extension)
+
+    def get_or_create(self, key, extension, encode):
+        """Return the cached file for key, calling encode(tmp_path) to create it"""
+        path = self.path_for(key, extension)
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return self.flight.do(path, lambda: self._create(path, encode))
+        with self._lock:
+            self.hits += 1
+        if time.time() - st.st_atime > self.TOUCH_INTERVAL:
+            os.utime(path, (time.time(), st.st_mtime))
+        return path
+
+    def _create(self, path, encode):
+        if os.path.exists(path):  # another worker process finished first
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            encode(tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self.misses += 1
+            if self._bytes is not None:
+                self._bytes += size
+            over = self._bytes is None or self._bytes > self.max_bytes
+        if over:
+            self.evict(keep=path)
+        return path
+
+    def evict(self, keep=None):
+        """Recount the cache and delete least recently used files down to 90% of the cap"""
+        files = []
+        for dirpath, _, filenames in os.walk(self.directory):
+            for name in filenames:
+                full = os.path.join(dirpath, name)
+                if name.endswith('.tmp') or full == keep:
+                    continue
+                try:
+                    st = os.stat(full)
+                except FileNotFoundError:
+                    continue
+                files.append((st.st_atime, st.st_size, full))
+        total = sum(size for _, size, _ in files)
+        if keep is not None and os.path.exists(keep):
+            total += os.path.getsize(keep)
+        if total > self.max_bytes:
+            files.sort()
+            target = self.max_bytes * 0.9
+            for _, size, full in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(full)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                with self._lock:
+                    self.evictions += 1
+        with self._lock:
+            self._bytes = total
+
+    def stats(self):
+        with self._lock:
+            return {
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'single_flight': self.flight.stats()
+            }
+
+image_cache = ImageDiskCache(app.config['IMAGE_CACHE_DIR'], app.config['IMAGE_CACHE_MAX_BYTES'])
+
+def resolve_resizable_image(path):
+    """Map a /img/ request path like 'Images/x.jpg' to a source file, or None"""
+    for root in IMAGE_RESIZE_ROOTS:
+        if path.startswith(root + '/'):
+            source = safe_join(os.path.join(app.root_path, root), path[len(root) + 1:])
+            if source and os.path.splitext(source)[1].lower() in ('.jpg', '.jpeg', '.png', '.webp'):
+                st = static_router.stat(source)
+                if st is not None and stat.S_ISREG(st.st_mode):
+                    return source, st
+    return None
+
+def encode_resized_image(source, width, fmt, tmp_path):
+    """Resize source to at most width pixels wide and save it as fmt"""
+    pil_format = IMAGE_RESIZE_FORMATS[fmt][0]
+    with Image.open(source) as opened:
+        im = ImageOps.exif_transpose(opened)
+        if im.width > width:
+            height = max(1, round(im.height * width / im.width))
+            im = im.resize((width, height), Image.Resampling.LANCZOS)
+        if pil_format == 'JPEG':
+            im.convert('RGB').save(tmp_path, format='JPEG', quality=78, optimize=True, progressive=True)
+        elif pil_format == 'PNG':
+            im.save(tmp_path, format='PNG', optimize=True)
+        else:
+            if im.mode not in ('RGB', 'RGBA'):
+                im = im.convert('RGBA')
+            im.save(tmp_path, format=pil_format, quality=50 if pil_format == 'AVIF' else 75)
+
+def send_image(path):
+    """Send the best responsive variant of an image for this request"""
+    variant = image_variants.choose(path, accepted_image_formats(), requested_image_width())
+    response = deliver_file(variant or path)
+    response.vary.update(IMAGE_VARY_HEADERS)
+    return response
+
+# Precompressed sidecars written by tools/precompress.py, in order of preference
+SIDECAR_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+# Extensions worth compressing (fonts other than WOFF/WOFF2 are uncompressed)
+COMPRESSIBLE_EXTENSIONS = {
+    '.html', '.css', '.js', '.mjs', '.json', '.map', '.svg', '.txt', '.xml',
+    '.ttf', '.otf', '.eot', '.ico'
+}
+
+def fresh_sidecar(path, suffix, mtime_ns):
+    """Return the sidecar path if it exists and is not older than its source"""
+    sidecar = path + suffix
+    st = static_router.stat(sidecar)
+    if st is not None and st.st_mtime_ns >= mtime_ns:
+        return sidecar
+    return None
+
+# In-memory page cache
+class CachedPage:
+    """Encoded bytes of one file plus its compressed copies, keyed by content-coding"""
+    __slots__ = ('body', 'encoded', 'etag', 'mtime_ns', 'size', 'checked_at')
+
+    def __init__(self, path, body, mtime_ns, size, checked_at):
+        self.body = body
+        self.encoded = {}
+        for encoding, suffix in SIDECAR_SUFFIXES:
+            sidecar = fresh_sidecar(path, suffix, mtime_ns)
+            if sidecar:
+                with open(sidecar, 'rb') as f:
+                    self.encoded[encoding] = f.read()
+        if 'gzip' not in self.encoded:
+            self.encoded['gzip'] = gzip.compress(body, compresslevel=6, mtime=0)
+        if 'br' not in self.encoded and brotli is not None:
+            self.encoded['br'] = brotli.compress(body, quality=5)
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.checked_at = checked_at
+
+    @property
+    def nbytes(self):
+        return len(self.body) + sum(len(data) for data in self.encoded.values())
+
+class PageCache:
+    """LRU cache of page files, revalidated by stat/mtime at most once per interval"""
+
+    def __init__(self, check_interval, max_bytes):
+        self.check_interval = check_interval
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path):
+        """Return the CachedPage for path, raising FileNotFoundError if it is gone"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and now - entry.checked_at < self.check_interval:
+                self._entries.move_to_end(path)
+                self.hits += 1
+                return entry
+
+        try:
+            st = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            self.discard(path)
+            raise FileNotFoundError(path)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+
+        if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+            with self._lock:
+                entry.checked_at = now
+                if path in self._entries:
+                    self._entries.move_to_end(path)
+                self.hits += 1
+            return entry
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        entry = CachedPage(path, body, st.st_mtime_ns, st.st_size, now)
+
+        with self._lock:
+            self.misses += 1
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if entry.nbytes <= self.max_bytes:
+                self._entries[path] = entry
+                self._bytes += entry.nbytes
+                while self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.nbytes
+                    self.evictions += 1
+        return entry
+
+    def discard(self, path):
+        with self._lock:
+            old = self._entries.pop(path, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+page_cache = PageCache(
+    app.config['PAGE_CACHE_CHECK_INTERVAL'],
+    app.config['PAGE_CACHE_MAX_BYTES']
+)
+
+def negotiate_encoding(available):
+    """Pick the content-coding from available that the client ranks highest"""
+    best, best_quality = None, 0
+    for encoding, _ in SIDECAR_SUFFIXES:
+        if encoding in available:
+            quality = request.accept_encodings[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+    return best
+
+def serve_cached_file(path, mimetype):
+    """Serve a file from the page cache in the best encoding the client accepts"""
+    page = page_cache.get(path)
+    encoding = negotiate_encoding(page.encoded)
+    if encoding:
+        response = app.response_class(page.encoded[encoding], mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f'{page.etag}-{encoding}')
+    else:
+        response = app.response_class(page.body, mimetype=mimetype)
+        response.set_etag(page.etag)
+    response.vary.add('Accept-Encoding')
+    response.last_modified = page.mtime_ns // 1_000_000_000
+    return response.make_conditional(request)
+
+def serve_page(filename, not_found_message=None):
+    """Serve an HTML page from the page cache"""
+    path = static_router.page_path(filename)
+    try:
+        if path is None:
+            raise FileNotFoundError(filename)
+        response = serve_cached_file(path, 'text/html')
+        response.headers['Accept-CH'] = ACCEPT_CH
+        return response
+    except FileNotFoundError:
+        if not_found_message is None:
+            abort(404)
+        return not_found_message, 404
+
+def zero_copy_range(response, path):
+    """Let gunicorn sendfile() a 206 slice instead of reading it into Python
+
+    send_file() already validated Range/If-Range and set Content-Range and
+    Content-Length, but serves the slice through a generic iterator. Gunicorn's
+    file wrapper sends exactly Content-Length bytes from the file's current
+    offset, so a file seeked to the range start keeps the transfer in the kernel.
+    """
+    environ = request.environ
+    if (response.status_code != 206
+            or 'X-Sendfile' in response.headers
+            or not environ.get('SERVER_SOFTWARE', '').startswith('gunicorn')
+            or 'wsgi.file_wrapper' not in environ):
+        return response
+
+    start = response.content_range.start
+    response.close()
+    f = open(path, 'rb')
+    f.seek(start)
+    response.response = environ['wsgi.file_wrapper'](f)
+    return response
+
+def deliver_file(path, mimetype=None):
+    """Send a file using the configured STATIC_DELIVERY mode, honouring Range requests"""
+    if app.config['STATIC_DELIVERY'] == 'x-accel-redirect':
+        rel_path = os.path.relpath(path, app.root_path).replace(os.sep, '/')
+        response = app.response_class(
+            mimetype=mimetype or mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        )
+        response.headers['X-Accel-Redirect'] = f"{app.config['X_ACCEL_REDIRECT_PREFIX']}/{quote(rel_path)}"
+        return response
+
+    response = send_file(path, mimetype=mimetype)
+    return zero_copy_range(response, path)
+
+def send_static(path, st):
+    """Send a resolved static file, preferring precompressed sidecars"""
+    if path in image_variants:
+        return send_image(path)
+    if os.path.splitext(path)[1].lower() not in COMPRESSIBLE_EXTENSIONS:
+        return deliver_file(path)
+
+    mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    sidecars = {}
+    for encoding, suffix in SIDECAR_SUFFIXES:
+        sidecar = fresh_sidecar(path, suffix, st.st_mtime_ns)
+        if sidecar:
+            sidecars[encoding] = sidecar
+
+    on_the_fly = st.st_size <= app.config['COMPRESS_MAX_BYTES']
+    available = set(sidecars)
+    if on_the_fly:
+        available.add('gzip')
+        if brotli is not None:
+            available.add('br')
+    encoding = negotiate_encoding(available)
+
+    if encoding in sidecars:
+        response = send_file(sidecars[encoding], mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    elif encoding:
+        try:
+            return serve_cached_file(path, mimetype)
+        except FileNotFoundError:
+            abort(404)
+    else:
+        response = deliver_file(path, mimetype=mimetype)
+    response.vary.add('Accept-Encoding')
+    return response
+
+# Browser cache policies
+ONE_YEAR = 365 * 24 * 3600
+IMMUTABLE_CACHE_CONTROL = f'public, max-age={ONE_YEAR}, immutable'
+HTML_CACHE_CONTROL = (
+    f"public, max-age={app.config['HTML_CACHE_MAX_AGE']}, "
+    f"stale-while-revalidate={app.config['HTML_STALE_WHILE_REVALIDATE']}"
+)
+STATIC_CACHE_CONTROL = f"public, max-age={app.config['STATIC_CACHE_MAX_AGE']}"
+
+# Fingerprinted file names carry a content hash, e.g. main.3f2a1b9c.css
+FINGERPRINT_PATTERN = re.compile(r'\.[0-9a-f]{8,32}\.[A-Za-z0-9]+$')
+
+# Per-prefix Cache-Control policies (longest prefix wins)
+CACHE_POLICIES = {
+    '/admin_dashboard.html': 'private, no-store',
+    '/assets/': STATIC_CACHE_CONTROL,
+    '/assets/img/': 'public, max-age=604800',
+    '/assets/vendor/': 'public, max-age=2592000',
+    '/Images/': 'public, max-age=604800',
+    '/static/': STATIC_CACHE_CONTROL,
+    '/mehr-nastaliq-web-font-v2.0/': 'public, max-age=2592000',
+    '/mehr nastaliq web font v 2.0/': 'public, max-age=2592000',
+    '/jameel-noori-nastaleeq/': 'public, max-age=2592000',
+    '/img/': 'public, max-age=604800',
+}
+_CACHE_POLICY_PREFIXES = sorted(CACHE_POLICIES, key=len, reverse=True)
+
+def cache_policy_for(path):
+    """Return the Cache-Control value for a request path, or None for no policy"""
+    if path.startswith('/api/'):
+        return None
+    for prefix in _CACHE_POLICY_PREFIXES:
+        if path.startswith(prefix):
+            if FINGERPRINT_PATTERN.search(path):
+                return IMMUTABLE_CACHE_CONTROL
+            return CACHE_POLICIES[prefix]
+    if path == '/' or path.endswith('.html'):
+        return HTML_CACHE_CONTROL
+    return None
+
+@app.after_request
+def apply_cache_policy(response):
+    """Attach the Cache-Control policy to successful static and page responses"""
+    if request.method not in ('GET', 'HEAD') or response.status_code not in (200, 206, 304):
+        return response
+    policy = cache_policy_for(request.path)
+    if policy:
+        response.headers['Cache-Control'] = policy
+        response.headers.pop('Expires', None)
+    return response
+
+# Shared admin cache
+# Payloads are cached under keys that embed the current version of each tag they
+# depend on ('applications', 'contacts', 'stats'). Writers bump tag versions, so
+# every worker sharing the backend stops using old entries immediately; the
+# orphaned entries simply expire.
+class MemoryCacheBackend:
+    """Per-process backend: fastest, but every worker keeps its own copy"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return TTLCache.MISSING
+            expires_at, value = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return TTLCache.MISSING
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def get_versions(self, tags):
+        with self._lock:
+            return {tag: self._versions.get(tag, 0) for tag in tags}
+
+    def bump_versions(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._data), 'max_entries': self.max_entries}
+
+class SQLiteCacheBackend:
+    """Backend shared by every worker process on the host through one SQLite file (WAL)
+
+    Values are stored as JSON. Each thread opens its own connection, reopened
+    after a fork so gunicorn workers never share a handle with the master.
+    """
+
+    # Delete expired rows after this many writes
+    PRUNE_EVERY = 500
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        conn = self._connect()
+        conn.execute('CREATE TABLE IF NOT EXISTS cache_entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)')
+        conn.execute('CREATE TABLE IF NOT EXISTS cache_versions (tag TEXT PRIMARY KEY, version INTEGER NOT NULL)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connect().execute(
+            'SELECT value FROM cache_entries WHERE key = ? AND expires_at > ?', (key, time.time())
+        ).fetchone()
+        return TTLCache.MISSING if row is None else json.loads(row[0])
+
+    def set(self, key, value, ttl):
+        conn = self._connect()
+        now = time.time()
+        conn.execute(
+            'INSERT OR REPLACE INTO cache_entries (key, value, expires_at) VALUES (?, ?, ?)',
+            (key, json.dumps(value, ensure_ascii=False, separators=(',', ':')), now + ttl)
+        )
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY == 0
+        if prune:
+            conn.execute('DELETE FROM cache_entries WHERE expires_at <= ?', (now,))
+            conn.execute(
+                'DELETE FROM cache_entries WHERE key NOT IN '
+                '(SELECT key FROM cache_entries ORDER BY expires_at DESC LIMIT ?)', (self.max_entries,)
+            )
+
+    def get_versions(self, tags):
+        placeholders = ','.join('?' * len(tags))
+        rows = self._connect().execute(
+            f'SELECT tag, version FROM cache_versions WHERE tag IN ({placeholders})', list(tags)
+        ).fetchall()
+        versions = dict(rows)
+        return {tag: versions.get(tag, 0) for tag in tags}
+
+    def bump_versions(self, tags):
+        self._connect().executemany(
+            'INSERT INTO cache_versions (tag, version) VALUES (?, 1) '
+            'ON CONFLICT(tag) DO UPDATE SET version = version + 1',
+            [(tag,) for tag in tags]
+        )
+
+    def stats(self):
+        conn = self._connect()
+        entries = conn.execute('SELECT count(*) FROM cache_entries WHERE expires_at > ?', (time.time(),)).fetchone()[0]
+        with self._lock:
+            writes = self._writes
+        return {'backend': 'sqlite', 'path': self.path, 'entries': entries, 'max_entries': self.max_entries, 'writes': writes}
+
+class SharedCache:
+    """get-or-compute over a pluggable backend with tag invalidation and hit-rate stats
+
+    Misses are coalesced: while one thread computes a key, other threads in the
+    same worker asking for it wait and share the result (or the exception; failures
+    are never cached). A waiter that times out computes the value itself.
+    """
+
+    def __init__(self, backend, default_ttl, coalesce_timeout):
+        self.backend = backend
+        self.default_ttl = default_ttl
+        self.coalesce_timeout = coalesce_timeout
+        self.flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def key_for(self, name, params, tags):
+        versions = self.backend.get_versions(tags)
+        tag_part = ','.join(f'{tag}={versions[tag]}' for tag in tags)
+        return f"{name}:{json.dumps(params, sort_keys=True, separators=(',', ':'))}:{tag_part}"
+
+    def get_or_compute(self, name, params, tags, compute, ttl=None):
+        key = self.key_for(name, params, tags)
+        value = self.backend.get(key)
+        hit = value is not TTLCache.MISSING
+        self._count(name, hit)
+        if hit:
+            return value
+
+        def fill():
+            value = compute()
+            self.backend.set(key, value, ttl or self.default_ttl)
+            return value
+
+        try:
+            return self.flight.do(key, fill, timeout=self.coalesce_timeout)
+        except SingleFlight.Timeout:
+            return compute()
+
+    def invalidate(self, *tags):
+        self.backend.bump_versions(tags)
+
+    def _count(self, name, hit):
+        with self._lock:
+            counts = self._counts.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def stats(self):
+        with self._lock:
+            endpoints = {
+                name: {'hits': hits, 'misses': misses, 'hit_rate': round(hits / (hits + misses), 3)}
+                for name, (hits, misses) in self._counts.items()
+            }
+        return dict(self.backend.stats(), ttl=self.default_ttl, endpoints=endpoints, single_flight=self.flight.stats())
+
+def create_admin_cache():
+    if app.config['ADMIN_CACHE_BACKEND'] == 'sqlite':
+        backend = SQLiteCacheBackend(app.config['ADMIN_CACHE_PATH'], app.config['ADMIN_CACHE_MAX_ENTRIES'])
+    else:
+        backend = MemoryCacheBackend(app.config['ADMIN_CACHE_MAX_ENTRIES'])
+    return SharedCache(backend, app.config['ADMIN_CACHE_TTL'], app.config['ADMIN_COALESCE_TIMEOUT'])
+
+admin_cache = create_admin_cache()
+
+# Admin list pagination
+# Cursor mode walks (date, id) newest first with a range predicate on the
+# (status, date, id) / (date, id) indexes, so page 1000 costs the same as page 1.
+admin_count_estimates = TTLCache(256, app.config['ADMIN_COUNT_ESTIMATE_TTL'])
+
+def encode_cursor(date_value, row_id):
+    raw = json.dumps([date_value.isoformat(), row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+class InvalidCursor(ValueError):
+    pass
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises InvalidCursor for anything malformed"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        date_text, row_id = json.loads(raw)
+        return datetime.fromisoformat(date_text), int(row_id)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+def count_estimate(key, query):
+    """Row count for query, reused for ADMIN_COUNT_ESTIMATE_TTL seconds"""
+    count = admin_count_estimates.get(key)
+    if count is None:
+        count = query.order_by(None).count()
+        admin_count_estimates.set(key, count)
+    return count
+
+def keyset_listing(items_key, query, date_column, id_column, per_page, cursor, include_total, count_key):
+    """Cursor-mode response body for an admin list"""
+    per_page = min(max(per_page, 1), app.config['ADMIN_PAGE_MAX'])
+    page_query = query
+    if cursor:
+        after_date, after_id = decode_cursor(cursor)
+        page_query = page_query.filter(db.tuple_(date_column, id_column) < (after_date, after_id))
+    rows = page_query.order_by(date_column.desc(), id_column.desc()).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        next_cursor = encode_cursor(getattr(rows[-1], date_column.key), getattr(rows[-1], id_column.key))
+
+    result = {
+        'success': True,
+        items_key: [row.to_dict() for row in rows],
+        'next_cursor': next_cursor,
+        'has_more': next_cursor is not None,
+        'per_page': per_page
+    }
+    if include_total:
+        result['total'] = query.count()
+    else:
+        result['total_estimate'] = count_estimate(count_key, query)
+    return result
+
+# Bulk export
+# Rows are read in EXPORT_BATCH_ROWS batches (yield_per: a server-side cursor on
+# PostgreSQL) and each batch is encoded and sent before the next is fetched, so
+# memory stays flat and the first bytes go out as soon as the first batch is read.
+EXPORT_KINDS = {
+    'applications': (AdmissionApplication, 'application_date', (
+        'id', 'application_number', 'first_name', 'last_name', 'father_name', 'cnic', 'email', 'phone',
+        'date_of_birth', 'gender', 'address', 'education', 'course', 'application_date', 'status',
+    )),
+    'contacts': (ContactSubmission, 'submission_date', (
+        'id', 'name', 'email', 'subject', 'message', 'submission_date', 'status',
+    )),
+}
+
+# Spreadsheet apps run cells starting with these as formulas; phone numbers are left alone
+CSV_FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+CSV_PLAIN_NUMBER = re.compile(r'[+-]?[\d\s-]+$')
+# Control characters XML 1.0 cannot carry
+XML_ILLEGAL_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+def export_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+def csv_cell(value):
+    value = export_value(value)
+    if isinstance(value, str) and value.startswith(CSV_FORMULA_PREFIXES) and not CSV_PLAIN_NUMBER.match(value):
+        return "'" + value
+    return value
+
+def export_rows(kind, filters):
+    """Yield lists of result rows for an export, EXPORT_BATCH_ROWS at a time"""
+    model, date_attr, columns = EXPORT_KINDS[kind]
+    date_column = getattr(model, date_attr)
+    stmt = db.select(*(getattr(model, name) for name in columns))
+    if filters.get('status'):
+        stmt = stmt.where(model.status == filters['status'])
+    if filters.get('course') and kind == 'applications':
+        stmt = stmt.where(model.course == filters['course'])
+    if filters.get('date_from'):
+        stmt = stmt.where(date_column >= filters['date_from'])
+    if filters.get('date_to'):
+        stmt = stmt.where(date_column < filters['date_to'])
+    # Same order as the (status, date, id) / (date, id) indexes, so no sort step
+    stmt = stmt.order_by(date_column, model.id).execution_options(yield_per=app.config['EXPORT_BATCH_ROWS'])
+    result = db.session.execute(stmt)
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+def csv_export(columns, batches):
+    # The BOM makes Excel read the file as UTF-8 (Urdu text)
+    yield '\ufeff'.encode('utf-8')
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([csv_cell(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+def ndjson_export(columns, batches):
+    for rows in batches:
+        yield ''.join(
+            json.dumps(dict(zip(columns, map(export_value, row))), ensure_ascii=False) + '\n' for row in rows
+        ).encode('utf-8')
+
+class ChunkSink(io.RawIOBase):
+    """Write-only, unseekable file that collects what zipfile writes until drained"""
+    def __init__(self):
+        self.chunks = []
+    
+    def writable(self):
+        return True
+    
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="xl/workbook.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{sheet}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+        '</Relationships>'
+    ),
+}
+
+def xlsx_cell(value):
+    value = export_value(value)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value}</v></c>'
+    text = xml_escape(XML_ILLEGAL_CHARS.sub('', str(value)))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+def xlsx_export(columns, batches, sheet):
+    """Stream a one-sheet workbook; strings are inline so no shared-strings table is held in memory"""
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, xml in XLSX_PARTS.items():
+            workbook.writestr(name, xml.format(sheet=sheet))
+        with workbook.open('xl/worksheets/sheet1.xml', 'w') as part:
+            part.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                '<row>{}</row>'.format(''.join(map(xlsx_cell, columns))).encode('utf-8')
+            )
+            yield sink.drain()
+            for rows in batches:
+                part.write(''.join(
+                    '<row>' + ''.join(map(xlsx_cell, row)) + '</row>' for row in rows
+                ).encode('utf-8'))
+                yield sink.drain()
+            part.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', lambda kind, columns, batches: csv_export(columns, batches)),
+    'ndjson': ('application/x-ndjson; charset=utf-8', lambda kind, columns, batches: ndjson_export(columns, batches)),
+    'xlsx': (
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        lambda kind, columns, batches: xlsx_export(columns, batches, kind)
+    ),
+}
+
+def parse_export_date(value, end_of_day=False):
+    """YYYY-MM-DD to a datetime bound; the end of a range includes that whole day"""
+    if not value:
+        return None
+    day = datetime.strptime(value, '%Y-%m-%d')
+    return day + timedelta(days=1) if end_of_day else day
+
+# Bulk admission import
+# Enrolment centres upload a CSV or XLSX sheet of admission forms. The file is
+# read row by row (csv.reader over the spooled upload, or iterparse over the
+# worksheet inside the XLSX zip), every row goes through ADMISSION_SCHEMA like a
+# form submission, and CNIC/email duplicates are caught against sets loaded
+# with one query. Valid rows are inserted IMPORT_BATCH_ROWS at a time with one
+# multi-row INSERT per transaction, together with their counters, search
+# documents and confirmation emails.
+class ImportFileError(ValueError):
+    """The upload as a whole cannot be imported; the message is shown to the admin"""
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+XLSX_CELL_COLUMN = re.compile(r'[A-Z]+')
+EXCEL_DATE_SERIAL = re.compile(r'^\d{4,5}(\.\d+)?$')
+EXCEL_EPOCH = datetime(1899, 12, 30)
+HEADER_NOISE = re.compile(r'[^a-z0-9]')
+
+def import_header_key(name):
+    return HEADER_NOISE.sub('', name.lower())
+
+# Accepted headers: the form's keys (firstName) or the column names (first_name), in any case or spacing
+IMPORT_HEADERS = {
+    import_header_key(name): field.key for field in ADMISSION_SCHEMA.fields for name in (field.key, field.column)
+}
+
+def xlsx_first_sheet(archive):
+    """Path of the workbook's first worksheet inside the zip"""
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    sheet = workbook.find(f'{XLSX_NS}sheets/{XLSX_NS}sheet')
+    if sheet is None:
+        raise ImportFileError('XLSX فائل میں کوئی شیٹ موجود نہیں')
+    relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    for relation in relations:
+        if relation.get('Id') == sheet.get(f'{XLSX_REL_NS}id'):
+            target = relation.get('Target')
+            return target.lstrip('/') if target.startswith('/') else 'xl/' + target
+    raise ImportFileError('XLSX فائل میں کوئی شیٹ موجود نہیں')
+
+def xlsx_cell_value(cell, shared_strings):
+    kind = cell.get('t')
+    if kind == 'inlineStr':
+        return ''.join(text.text or '' for text in cell.iter(f'{XLSX_NS}t'))
+    value = cell.findtext(f'{XLSX_NS}v') or ''
+    if kind == 's':
+        return shared_strings[int(value)] if value else ''
+    if kind in (None, 'n') and value:
+        # CNICs and phone numbers typed as numbers come back as 3.5202123456781E12
+        number = float(value)
+        if number.is_integer():
+            return str(int(number))
+    return value
+
+def xlsx_rows(upload):
+    """(row number, cells as strings) for the first worksheet, parsed incrementally"""
+    with zipfile.ZipFile(upload) as archive:
+        shared_strings = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            with archive.open('xl/sharedStrings.xml') as f:
+                for _, element in ElementTree.iterparse(f):
+                    if element.tag == f'{XLSX_NS}si':
+                        # Plain text is a <t>; formatted text is split into <r><t> runs
+                        parts = element.findall(f'{XLSX_NS}t') + element.findall(f'{XLSX_NS}r/{XLSX_NS}t')
+                        shared_strings.append(''.join(part.text or '' for part in parts))
+                        element.clear()
+        with archive.open(xlsx_first_sheet(archive)) as f:
+            number = 0
+            for _, element in ElementTree.iterparse(f):
+                if element.tag != f'{XLSX_NS}row':
+                    continue
+                # Excel leaves empty rows out, so count from the row's own number
+                number = int(element.get('r') or number + 1)
+                row = []
+                for cell in element.iter(f'{XLSX_NS}c'):
+                    # Empty cells are left out of the XML; the reference says which column this is
+                    column = XLSX_CELL_COLUMN.match(cell.get('r', ''))
+                    if column:
+                        index = 0
+                        for letter in column.group():
+                            index = index * 26 + ord(letter) - 64
+                        row.extend([''] * (index - 1 - len(row)))
+                    row.append(xlsx_cell_value(cell, shared_strings))
+                element.clear()
+                yield number, row
 
-# Utility Functions
-def validate_email(email):
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return re.match(pattern, email) is not None
+def import_rows(upload, file_format):
+    """(row number, {form key: raw value}) for every non-blank data row; the first row holds the headers"""
+    if file_format == 'csv':
+        rows = enumerate(csv.reader(io.TextIOWrapper(upload, encoding='utf-8-sig', newline='')), start=1)
+    else:
+        rows = xlsx_rows(upload)
+    _, header = next(rows, (None, None))
+    if not header:
+        raise ImportFileError('فائل خالی ہے')
+    keys = [IMPORT_HEADERS.get(import_header_key(name)) for name in header]
+    missing = [field.key for field in ADMISSION_SCHEMA.fields if field.key not in keys]
+    if missing:
+        raise ImportFileError(f"یہ کالم موجود نہیں: {', '.join(missing)}")
+    
+    for number, row in rows:
+        if not any(cell.strip() for cell in row):
+            continue
+        data = {key: value for key, value in zip(keys, row) if key}
+        date_of_birth = data.get('dateOfBirth', '').strip()
+        if file_format == 'xlsx' and EXCEL_DATE_SERIAL.match(date_of_birth):
+            # A date cell holds days since 1899-12-30
+            data['dateOfBirth'] = (EXCEL_EPOCH + timedelta(days=float(date_of_birth))).date().isoformat()
+        yield number, data
 
-def validate_cnic(cnic):
-    pattern = r'^\d{5}-\d{7}-\d{1}$'
-    return re.match(pattern, cnic) is not None
+def insert_application_rows(rows):
+    """Insert many validated applications with one executemany; returns [(id, application_date)] in order
 
-def validate_phone(phone):
-    pattern = r'^\+92[0-9]{10}$'
-    return re.match(pattern, phone) is not None
+    Raises IntegrityError if any CNIC/email is taken. The ids are read back by
+    CNIC (unique) rather than with RETURNING, which SQLite can only do row by row.
+    """
+    table = AdmissionApplication.__table__
+    db.session.execute(table.insert(), rows)
+    ids = dict(db.session.execute(
+        db.select(table.c.cnic, table.c.id).where(table.c.cnic.in_([values['cnic'] for values in rows]))
+    ).all())
+    return [(ids[values['cnic']], values['application_date']) for values in rows]
+
+def save_import_batch(batch, notify):
+    """Commit one batch of (row number, values); returns [(row number, (id, application number) or None)]
 
-def send_email_notification(to_email, subject, body, html_body=None):
-    """Send email notification"""
+    None marks a row whose CNIC/email was registered after the duplicate sets were loaded.
+    """
+    application_date = datetime.utcnow()
+    for _, values in batch:
+        values['application_date'] = application_date
     try:
-        # Check if email configuration is properly set
-        if not app.config['MAIL_USERNAME'] or not app.config['MAIL_PASSWORD']:
-            print("Email configuration missing: MAIL_USERNAME or MAIL_PASSWORD not set")
-            return False, "Email configuration is not properly set up"
-            
-        if app.config['MAIL_USERNAME'] == 'your-email@gmail.com' or app.config['MAIL_PASSWORD'] == 'your-gmail-app-password-here':
-            print("Email configuration contains placeholder values")
-            return False, "Email configuration contains placeholder values. Please update your .env file with actual Gmail credentials."
-        
-        msg = Message(
-            subject=subject,
-            sender=app.config['MAIL_USERNAME'],
-            recipients=[to_email],
-            body=body,
-            html=html_body
-        )
-        mail.send(msg)
-        return True, "Email sent successfully"
-    except Exception as e:
-        error_msg = f"Email error: {str(e)}"
-        print(error_msg)
-        return False, error_msg
+        inserted = insert_application_rows([values for _, values in batch])
+    except IntegrityError:
+        # Someone else registered one of these meanwhile: fall back to row-by-row, skipping duplicates
+        db.session.rollback()
+        inserted = [insert_admission_application(values) for _, values in batch]
+    
+    results, deltas, documents, emails = [], {}, [], []
+    for (number, values), row in zip(batch, inserted):
+        if row is None:
+            results.append((number, None))
+            continue
+        application_id, application_date = row
+        application_number = format_application_number(application_id, application_date)
+        for name, change in application_counts('pending', values['course']).items():
+            deltas[name] = deltas.get(name, 0) + change
+        documents.append((application_id, application_search_text(
+            SimpleNamespace(**values, application_number=application_number)
+        )))
+        if notify:
+            # Only the applicant's confirmation; the admin importing the sheet needs no notice per row
+            emails.append(admission_emails(values, application_number)[1])
+        results.append((number, (application_id, application_number)))
+    
+    bump_counters(deltas)
+    index_search_documents('application', documents)
+    enqueue_emails(emails)
+    db.session.commit()
+    return results
+
+def import_applications(rows, notify=True, dry_run=False):
+    """Validate, deduplicate and insert imported rows; returns the per-row report and a summary"""
+    registered_cnics, registered_emails = set(), set()
+    for cnic, email in db.session.execute(db.select(AdmissionApplication.cnic, AdmissionApplication.email)):
+        registered_cnics.add(cnic)
+        registered_emails.add(email)
+    
+    report, batch = [], []
+    batch_size = app.config['IMPORT_BATCH_ROWS']
+    
+    def flush():
+        for number, saved in save_import_batch(batch, notify):
+            if saved is None:
+                report.append({'row': number, 'status': 'duplicate', 'error': 'اس CNIC یا ای میل سے پہلے سے درخواست موجود ہے'})
+            else:
+                report.append({'row': number, 'status': 'imported', 'application_id': saved[0], 'application_number': saved[1]})
+        batch.clear()
+    
+    for number, data in rows:
+        values, errors = ADMISSION_SCHEMA.validate(data)
+        if errors:
+            report.append({'row': number, 'status': 'invalid', 'errors': errors})
+            continue
+        if values['cnic'] in registered_cnics or values['email'] in registered_emails:
+            report.append({'row': number, 'status': 'duplicate', 'error': 'اس CNIC یا ای میل سے پہلے سے درخواست موجود ہے'})
+            continue
+        # Later rows of the same file count as duplicates too
+        registered_cnics.add(values['cnic'])
+        registered_emails.add(values['email'])
+        if dry_run:
+            report.append({'row': number, 'status': 'valid'})
+            continue
+        batch.append((number, values))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    
+    report.sort(key=lambda entry: entry['row'])
+    summary = {}
+    for entry in report:
+        summary[entry['status']] = summary.get(entry['status'], 0) + 1
+    return report, summary
 
 # Routes
 @app.route('/api')
@@ -251,6 +2899,11 @@ def api_home():
             "applications": "/api/admin/applications",
             "contacts": "/api/admin/contacts",
             "stats": "/api/admin/stats",
+            "search": "/api/admin/search",
+            "email_outbox": "/api/admin/email-outbox",
+            "export": "/api/admin/export/<applications|contacts>?format=csv|ndjson|xlsx",
+            "import": "/api/admin/applications/import (multipart file=.csv|.xlsx)",
+            "cache_stats": "/api/admin/cache-stats",
             "login": "/api/admin/login",
             "logout": "/api/admin/logout"
         }
@@ -261,11 +2914,7 @@ def api_home():
 @app.route('/index.html')
 def index():
     """Serve main index page"""
-    try:
-        with open('index.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Index page not found", 404
+    return serve_page('index.html', "Index page not found")
 
 # Admin Authentication Routes
 @app.route('/api/admin/login', methods=['POST'])
@@ -370,105 +3019,529 @@ def clear_session():
 @require_admin_auth
 def admin_dashboard():
     """Serve admin dashboard with authentication check"""
-    try:
-        with open('admin_dashboard.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Admin dashboard file not found", 404
+    return serve_page('admin_dashboard.html', "Admin dashboard file not found")
 
 @app.route('/admin_login.html')
 def admin_login_page():
     """Serve admin login page"""
-    try:
-        with open('admin_login.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Admin login file not found", 404
+    return serve_page('admin_login.html', "Admin login file not found")
 
 @app.route('/admission.html')
 def admission():
     """Serve admission page"""
-    try:
-        with open('admission.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Admission page not found", 404
+    return serve_page('admission.html', "Admission page not found")
 
 @app.route('/courses.html')
 def courses():
     """Serve courses page"""
-    try:
-        with open('courses.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Courses page not found", 404
+    return serve_page('courses.html', "Courses page not found")
 
 @app.route('/faculty.html')
 def faculty():
     """Serve faculty page"""
-    try:
-        with open('faculty.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Faculty page not found", 404
+    return serve_page('faculty.html', "Faculty page not found")
 
 @app.route('/donation.html')
 def donation():
     """Serve donation page"""
+    return serve_page('donation.html', "Donation page not found")
+
+# Saving submissions
+# Shared by the submit handlers (sync mode) and the ingest writer (write-behind
+# mode); neither commits, so the caller decides the transaction boundaries.
+def save_contact(values):
+    """Insert a validated contact message with its counters, search document and emails; returns its id"""
+    contact = ContactSubmission(**values)
+    db.session.add(contact)
+    db.session.flush()  # To get the ID for the search index
+    bump_counters(contact_counts('new'))
+    index_search_document('contact', contact.id, contact_search_text(contact))
+    
+    # Notify the admin and confirm to the sender; delivered by the outbox workers
+    for to_email, subject, body in contact_emails(contact):
+        enqueue_email(to_email, subject, body)
+    return contact.id
+
+def save_admission(values):
+    """Insert a validated application with its counters, search document and emails
+
+    Returns (application_id, application_number), or None if the CNIC or email is already registered.
+    """
+    inserted = insert_admission_application(values)
+    if inserted is None:
+        return None
+    
+    application_id, application_date = inserted
+    application_number = format_application_number(application_id, application_date)
+    bump_counters(application_counts('pending', values['course']))
+    index_search_document('application', application_id, application_search_text(
+        SimpleNamespace(**values, application_number=application_number)
+    ))
+    
+    # Notify the admin and confirm to the applicant; delivered by the outbox workers
+    for to_email, subject, body in admission_emails(values, application_number):
+        enqueue_email(to_email, subject, body)
+    return application_id, application_number
+
+# Write-behind ingestion
+# In write-behind mode the submit handlers validate a submission, append it to a
+# local append-only log (fsync'd, under an flock shared by every worker process
+# on the host) and answer 202 straight away. A background writer in whichever
+# process holds writer.lock reads the log from its checkpoint and commits up to
+# INGEST_BATCH_SIZE submissions per transaction, so throughput is not capped by
+# per-row commit latency and a database outage only delays the inserts.
+#
+# Every record carries an ingest_id with a unique index, so replaying the log
+# after a crash (from the last checkpoint) skips rows already committed.
+# CNIC/email duplicates are refused before the acknowledgement, against the
+# database and against submissions still waiting in the log. One that slips
+# through anyway is rejected by the writer and written to rejected.log.
+def ingest_enabled():
+    return app.config['INGEST_MODE'] == 'write-behind' and fcntl is not None
+
+def new_ingest_id():
+    return os.urandom(12).hex()
+
+INGEST_ID_PATTERN = re.compile(r'^[0-9a-f]{24}$')
+
+class IngestLog:
+    """Segmented append-only log of accepted submissions, one checksummed JSON line each"""
+    SEGMENT_PATTERN = re.compile(r'^segment-(\d{10})\.log$')
+    
+    def __init__(self, directory, segment_bytes, fsync):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._position = None  # (segment, offset) this process has read up to
+        self._claims = {}       # CNIC/email claim -> log position just after the record holding it
+        self._pending = deque() # (position, claims) in log order, dropped once the writer is past them
+        self.appended = 0
+    
+    def path(self, name):
+        return os.path.join(self.directory, name)
+    
+    def segment_path(self, segment):
+        return self.path(f'segment-{segment:010d}.log')
+    
+    def segments(self):
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(match.group(1)) for match in map(self.SEGMENT_PATTERN.match, names) if match)
+    
+    def read_checkpoint(self):
+        """(segment, offset) up to which the writer has committed everything"""
+        try:
+            with open(self.path('checkpoint.json'), encoding='utf-8') as f:
+                checkpoint = json.load(f)
+            return checkpoint['segment'], checkpoint['offset']
+        except (OSError, ValueError, KeyError):
+            segments = self.segments()
+            return (segments[0] if segments else 1), 0
+    
+    def write_checkpoint(self, position):
+        path = self.path('checkpoint.json')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'segment': position[0], 'offset': position[1]}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def encode(record):
+        payload = json.dumps(
+            record, ensure_ascii=False, separators=(',', ':'), default=lambda value: value.isoformat()
+        ).encode('utf-8')
+        return b'%08x ' % zlib.crc32(payload) + payload + b'\n'
+    
+    @staticmethod
+    def decode(line):
+        """Record from one complete line, or None if its checksum does not match"""
+        checksum, _, payload = line.rstrip(b'\n').partition(b' ')
+        try:
+            if int(checksum, 16) != zlib.crc32(payload):
+                return None
+            return json.loads(payload)
+        except ValueError:
+            return None
+    
+    def read(self, position, limit):
+        """Up to limit (end position, record, line) entries from position, continuing into later segments
+
+        Returns the entries and the position after them. An incomplete last line
+        (an append in progress, or one cut short by a crash) is left unread.
+        """
+        segment, offset = position
+        entries = []
+        while len(entries) < limit:
+            try:
+                with open(self.segment_path(segment), 'rb') as f:
+                    f.seek(offset)
+                    while len(entries) < limit:
+                        line = f.readline()
+                        if not line.endswith(b'\n'):
+                            break
+                        offset += len(line)
+                        entries.append(((segment, offset), self.decode(line), line))
+            except FileNotFoundError:
+                pass
+            if len(entries) >= limit:
+                break
+            # A later segment is only started once this one is complete
+            later = [s for s in self.segments() if s > segment]
+            if not later:
+                break
+            segment, offset = later[0], 0
+        return entries, (segment, offset)
+    
+    def _catch_up(self):
+        """Pick up claims appended by other processes and cut off a torn tail (append lock held)
+
+        Returns (segment, size) of the segment appends go to.
+        """
+        checkpoint = self.read_checkpoint()
+        if self._position is None or self._position < checkpoint:
+            self._position = checkpoint
+        # The writer has committed or rejected everything before the checkpoint;
+        # from there on the database's unique indexes decide duplicates
+        while self._pending and self._pending[0][0] <= checkpoint:
+            position, keys = self._pending.popleft()
+            for key in keys:
+                if self._claims.get(key) == position:
+                    del self._claims[key]
+        while True:
+            entries, self._position = self.read(self._position, 1000)
+            for position, record, _ in entries:
+                self._claim(position, (record or {}).get('claims', ()))
+            if not entries:
+                break
+        
+        segment, offset = self._position
+        path = self.segment_path(segment)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = 0
+        if size > offset:
+            # Half a line left by a crash mid-append; it was never acknowledged
+            os.truncate(path, offset)
+        return segment, offset
+    
+    def _claim(self, position, keys):
+        if keys:
+            self._pending.append((position, keys))
+            for key in keys:
+                self._claims[key] = position
+    
+    def append(self, record, claims=()):
+        """Durably add record; returns False, writing nothing, if one of its claims is still pending"""
+        os.makedirs(self.directory, exist_ok=True)
+        data = self.encode(dict(record, claims=list(claims)))
+        with self._lock, open(self.path('append.lock'), 'a+b') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)  # released when the file is closed
+            segment, size = self._catch_up()
+            if any(key in self._claims for key in claims):
+                return False
+            if size and size + len(data) > self.segment_bytes:
+                segment, size = segment + 1, 0
+            
+            fd = os.open(self.segment_path(segment), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            try:
+                view = memoryview(data)
+                while view:
+                    view = view[os.write(fd, view):]
+                if self.fsync:
+                    os.fsync(fd)
+            finally:
+                os.close(fd)
+            if size == 0 and self.fsync:
+                # Make the new segment's directory entry durable too
+                dir_fd = os.open(self.directory, os.O_RDONLY)
+                try:
+                    os.fsync(dir_fd)
+                finally:
+                    os.close(dir_fd)
+            
+            self._position = (segment, size + len(data))
+            self._claim(self._position, claims)
+            self.appended += 1
+        return True
+    
+    def remove_applied_segments(self, checkpoint_segment):
+        for segment in self.segments():
+            if segment < checkpoint_segment:
+                os.remove(self.segment_path(segment))
+    
+    def backlog_bytes(self):
+        """Bytes appended but not yet committed by the writer"""
+        segment, offset = self.read_checkpoint()
+        total = 0
+        for s in self.segments():
+            if s >= segment:
+                try:
+                    total += os.path.getsize(self.segment_path(s)) - (offset if s == segment else 0)
+                except FileNotFoundError:
+                    pass
+        return max(total, 0)
+    
+    def write_rejected(self, rejected):
+        if not rejected:
+            return
+        with open(self.path('rejected.log'), 'ab') as f:
+            for record, error in rejected:
+                f.write(json.dumps({'id': (record or {}).get('id'), 'error': error, 'record': record},
+                                   ensure_ascii=False).encode('utf-8') + b'\n')
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def find_rejected(self, ingest_id):
+        try:
+            with open(self.path('rejected.log'), 'rb') as f:
+                for line in f:
+                    if ingest_id.encode('ascii') in line:
+                        entry = json.loads(line)
+                        if entry['id'] == ingest_id:
+                            return entry
+        except (OSError, ValueError):
+            pass
+        return None
+
+def apply_ingest_record(record):
+    """Save one logged submission (no commit); returns None for a duplicate CNIC/email"""
+    values = dict(record['values'], ingest_id=record['id'])
+    if record['kind'] == 'admission':
+        values['date_of_birth'] = datetime.fromisoformat(values['date_of_birth']).date()
+        values['application_date'] = datetime.fromisoformat(values['application_date'])
+        return save_admission(values)
+    values['submission_date'] = datetime.fromisoformat(values['submission_date'])
+    return save_contact(values)
+
+# Tags to invalidate after committing each kind of submission
+INGEST_CACHE_TAGS = {'admission': ('applications', 'stats'), 'contact': ('contacts', 'stats')}
+
+class IngestWriter:
+    """Commits the ingest log to the database; runs in one process per host (the holder of writer.lock)"""
+    def __init__(self, log, batch_size, flush_interval):
+        self.log = log
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+        self.is_writer = False
+        self.batches = 0
+        self.applied = 0
+        self.replayed = 0
+        self.rejected = 0
+        self.failures = 0
+        self.last_batch = None
+        self.last_error = None
+    
+    def start(self):
+        """Start the writer thread once per process (again after a fork)"""
+        if fcntl is None or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='ingest-writer', daemon=True).start()
+    
+    def wake(self):
+        self._wakeup.set()
+    
+    def acquire(self, blocking=False):
+        """The open writer.lock file if this process became the writer, else None"""
+        os.makedirs(self.log.directory, exist_ok=True)
+        lock_file = open(self.log.path('writer.lock'), 'a+b')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            lock_file.close()
+            return None
+        self.is_writer = True
+        return lock_file
+    
+    def _run(self):
+        lock_file = None
+        failures = 0
+        while True:
+            if lock_file is None:
+                lock_file = self.acquire()
+                if lock_file is None:
+                    # Another process is the writer; take over if it goes away
+                    time.sleep(5)
+                    continue
+            try:
+                with app.app_context():
+                    handled = self.apply_once()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                with self._lock:
+                    self.failures += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                print(f"Ingest writer error (retry {failures}): {e}")
+                # Submissions keep being accepted into the log while the database is away
+                time.sleep(min(30, self.flush_interval * 2 ** failures))
+                continue
+            if not handled:
+                self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+    
+    def _commit(self, records):
+        """Save records in one transaction; returns (applied kinds, rejected)"""
+        kinds, rejected = set(), []
+        for record in records:
+            if apply_ingest_record(record) is None:
+                rejected.append((record, 'duplicate'))
+            else:
+                kinds.add(record['kind'])
+        db.session.commit()
+        return kinds, rejected
+    
+    def apply_once(self):
+        """Commit the next batch of logged submissions; returns how many log entries were consumed"""
+        checkpoint = self.log.read_checkpoint()
+        entries, position = self.log.read(checkpoint, self.batch_size)
+        if not entries:
+            self.log.remove_applied_segments(checkpoint[0])
+            return 0
+        started = time.perf_counter()
+        
+        records = [record for _, record, _ in entries if record]
+        rejected = [(None, f"corrupt log line: {line[:200]!r}") for _, record, line in entries if not record]
+        # Rows committed before a crash, replayed from the last checkpoint
+        ids = [record['id'] for record in records]
+        done = set()
+        for model in (AdmissionApplication, ContactSubmission):
+            done.update(db.session.execute(db.select(model.ingest_id).where(model.ingest_id.in_(ids))).scalars())
+        pending = [record for record in records if record['id'] not in done]
+        
+        try:
+            kinds, batch_rejected = self._commit(pending)
+            rejected += batch_rejected
+        except (OperationalError, InterfaceError):
+            db.session.rollback()
+            raise
+        except Exception as e:
+            # One bad record must not block the log: retry them one per transaction
+            db.session.rollback()
+            print(f"Ingest batch failed ({e}); applying records one at a time")
+            kinds = set()
+            for record in pending:
+                try:
+                    applied_kinds, record_rejected = self._commit([record])
+                except (OperationalError, InterfaceError):
+                    db.session.rollback()
+                    raise
+                except Exception as record_error:
+                    db.session.rollback()
+                    record_rejected = [(record, f"{type(record_error).__name__}: {record_error}")]
+                    applied_kinds = set()
+                kinds |= applied_kinds
+                rejected += record_rejected
+        
+        self.log.write_rejected(rejected)
+        self.log.write_checkpoint(position)
+        for kind in kinds:
+            admin_cache.invalidate(*INGEST_CACHE_TAGS[kind])
+        if kinds:
+            email_outbox.wake()
+        for record, error in rejected:
+            print(f"Ingest record {(record or {}).get('id')} rejected: {error}")
+        
+        with self._lock:
+            self.batches += 1
+            self.applied += len(pending) - len([r for r in rejected if r[0] is not None])
+            self.replayed += len(done)
+            self.rejected += len(rejected)
+            self.last_batch = {
+                'records': len(entries),
+                'seconds': round(time.perf_counter() - started, 4),
+                'at': datetime.utcnow().isoformat()
+            }
+            self.last_error = None
+        return len(entries)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                'is_writer': self.is_writer,
+                'batches': self.batches,
+                'applied': self.applied,
+                'replayed': self.replayed,
+                'rejected': self.rejected,
+                'failures': self.failures,
+                'last_batch': self.last_batch,
+                'last_error': self.last_error
+            }
+
+ingest_log = IngestLog(app.config['INGEST_LOG_DIR'], app.config['INGEST_SEGMENT_BYTES'], app.config['INGEST_FSYNC'])
+ingest_writer = IngestWriter(ingest_log, app.config['INGEST_BATCH_SIZE'], app.config['INGEST_FLUSH_INTERVAL'])
+
+if app.config['INGEST_MODE'] == 'write-behind' and fcntl is None:
+    print("INGEST_MODE=write-behind needs fcntl (Linux/macOS); submissions are committed synchronously")
+
+# The writer also runs in sync mode while an earlier write-behind backlog remains
+INGEST_WRITER_NEEDED = ingest_enabled() or (fcntl is not None and ingest_log.backlog_bytes() > 0)
+
+@app.before_request
+def start_ingest_writer():
+    if INGEST_WRITER_NEEDED:
+        ingest_writer.start()
+
+def ingest_submission(kind, values, claims=()):
+    """Log a submission for the writer; returns its ingest id, None for a pending duplicate claim,
+    or False if the log could not be written (the caller then commits synchronously)"""
+    ingest_id = new_ingest_id()
     try:
-        with open('donation.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return "Donation page not found", 404
+        appended = ingest_log.append({'id': ingest_id, 'kind': kind, 'values': values}, claims)
+    except OSError as e:
+        print(f"Ingest log write failed, committing synchronously: {e}")
+        return False
+    if not appended:
+        return None
+    ingest_writer.wake()
+    return ingest_id
 
 @app.route('/api/submit-contact', methods=['POST'])
 def submit_contact():
     """Handle contact form submissions from index.html"""
+    # Debug logging to confirm requests reach the server
+    print("/api/submit-contact called | Origin:", request.headers.get('Origin'), "| IP:", request.remote_addr)
+    data = submission_payload()
     try:
-        # Debug logging to confirm requests reach the server
-        print("/api/submit-contact called | Origin:", request.headers.get('Origin'), "| IP:", request.remote_addr)
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = ['name', 'email', 'subject', 'message']
-        for field in required_fields:
-            if field not in data or not data[field].strip():
-                return jsonify({
-                    'success': False,
-                    'error': f'فیلڈ {field} لازمی ہے'
-                }), 400
-        
-        # Validate email format
-        if not validate_email(data['email']):
-            return jsonify({
-                'success': False,
-                'error': 'براہ کرم صحیح ای میل ایڈریس درج کریں'
-            }), 400
+        values, errors = CONTACT_SCHEMA.validate(data)
+        if errors:
+            return validation_error(errors)
         
         # Create contact submission
-        contact = ContactSubmission(
-            name=data['name'].strip(),
-            email=data['email'].strip().lower(),
-            subject=data['subject'].strip(),
-            message=data['message'].strip()
-        )
-        
-        db.session.add(contact)
-        db.session.commit()
+        print(f"Contact form submitted by {values['name']} <{values['email']}>: {values['subject']}")
         
-        # Email notifications disabled temporarily to prevent timeout
-        # TODO: Configure email settings properly and re-enable
-        print(f"Contact form submitted by {data['name']} <{data['email']}>: {data['subject']}")
-        print(f"Message: {data['message']}")
+        if ingest_enabled():
+            values['submission_date'] = datetime.utcnow()
+            ingest_id = ingest_submission('contact', values)
+            if ingest_id:
+                return jsonify({
+                    'success': True,
+                    'message': 'آپ کا پیغام کامیابی سے بھیج دیا گیا',
+                    'reference': ingest_id,
+                    'status_url': f'/api/submissions/{ingest_id}'
+                }), 202
         
-        # You can uncomment these lines once email is properly configured:
-        # send_email_notification(os.getenv('ADMIN_EMAIL'), admin_subject, admin_body)
-        # send_email_notification(data['email'], user_subject, user_body)
+        contact_id = save_contact(values)
+        db.session.commit()
+        admin_cache.invalidate('contacts', 'stats')
+        email_outbox.wake()
         
         return jsonify({
             'success': True,
             'message': 'آپ کا پیغام کامیابی سے بھیج دیا گیا',
-            'submission_id': contact.id
+            'submission_id': contact_id
         })
         
     except Exception as e:
@@ -479,188 +3552,204 @@ def submit_contact():
             'error': 'سرور میں خرابی، براہ کرم دوبارہ کوشش کریں'
         }), 500
 
+def ingest_admission(values):
+    """Write-behind response for a validated application, or None to commit it synchronously"""
+    duplicate = jsonify({
+        'success': False,
+        'error': 'اس CNIC یا ای میل سے پہلے سے درخواست موجود ہے'
+    }), 400
+    try:
+        registered = db.session.execute(db.select(AdmissionApplication.id).where(db.or_(
+            AdmissionApplication.cnic == values['cnic'], AdmissionApplication.email == values['email']
+        )).limit(1)).first()
+    except SQLAlchemyError as e:
+        # Database unreachable: still accept; the writer rejects a duplicate when it applies it
+        db.session.rollback()
+        print(f"Duplicate check skipped, database unavailable: {e}")
+        registered = None
+    if registered:
+        return duplicate
+    
+    values['application_date'] = datetime.utcnow()
+    ingest_id = ingest_submission('admission', values, claims=(f"cnic:{values['cnic']}", f"email:{values['email']}"))
+    if ingest_id is None:
+        return duplicate
+    if ingest_id is False:
+        return None
+    return jsonify({
+        'success': True,
+        'message': 'آپ کی داخلہ درخواست موصول ہو گئی، Application Number ای میل کے ذریعے بھیج دیا جائے گا',
+        'application_number': None,
+        'reference': ingest_id,
+        'status_url': f'/api/submissions/{ingest_id}'
+    }), 202
+
 @app.route('/api/submit-admission', methods=['POST'])
 def submit_admission():
     """Handle admission form submissions from admission.html"""
+    data = submission_payload()
     try:
-        data = request.get_json()
-        
-        # Validate required fields
-        required_fields = [
-            'firstName', 'lastName', 'fatherName', 'cnic', 'email',
-            'phone', 'dateOfBirth', 'gender', 'address', 'education', 'course'
-        ]
-        
-        for field in required_fields:
-            if field not in data or not str(data[field]).strip():
-                return jsonify({
-                    'success': False,
-                    'error': f'فیلڈ {field} لازمی ہے'
-                }), 400
-        
-        # Validate email format
-        if not validate_email(data['email']):
-            return jsonify({
-                'success': False,
-                'error': 'براہ کرم صحیح ای میل ایڈریس درج کریں'
-            }), 400
-        
-        # Validate CNIC format
-        if not validate_cnic(data['cnic']):
-            return jsonify({
-                'success': False,
-                'error': 'براہ کرم CNIC صحیح فارمیٹ میں درج کریں (12345-1234567-1)'
-            }), 400
-        
-        # Validate phone format
-        if not validate_phone(data['phone']):
-            return jsonify({
-                'success': False,
-                'error': 'براہ کرم فون نمبر صحیح فارمیٹ میں درج کریں (+923001234567)'
-            }), 400
+        values, errors = ADMISSION_SCHEMA.validate(data)
+        if errors:
+            return validation_error(errors)
         
-        # Check if CNIC or email already exists
-        existing_app = AdmissionApplication.query.filter(
-            (AdmissionApplication.cnic == data['cnic']) |
-            (AdmissionApplication.email == data['email'].lower())
-        ).first()
+        # Create admission application; the unique CNIC/email indexes reject duplicates
+        if ingest_enabled():
+            response = ingest_admission(values)
+            if response is not None:
+                return response
         
-        if existing_app:
+        saved = save_admission(values)
+        if saved is None:
+            db.session.rollback()
             return jsonify({
                 'success': False,
                 'error': 'اس CNIC یا ای میل سے پہلے سے درخواست موجود ہے'
             }), 400
         
-        # Parse date
-        try:
-            dob = datetime.strptime(data['dateOfBirth'], '%Y-%m-%d').date()
-        except ValueError:
-            return jsonify({
-                'success': False,
-                'error': 'براہ کرم صحیح تاریخ پیدائش درج کریں'
-            }), 400
-        
-        # Create admission application
-        application = AdmissionApplication(
-            first_name=data['firstName'].strip(),
-            last_name=data['lastName'].strip(),
-            father_name=data['fatherName'].strip(),
-            cnic=data['cnic'].strip(),
-            email=data['email'].strip().lower(),
-            phone=data['phone'].strip(),
-            date_of_birth=dob,
-            gender=data['gender'],
-            address=data['address'].strip(),
-            education=data['education'],
-            course=data['course']
-        )
-        
-        db.session.add(application)
-        db.session.flush()  # To get the ID
-        
-        # Generate application number with correct format
-        application.application_number = f"VIU-{datetime.now().year}-{application.id:06d}"
-        
+        application_id, application_number = saved
         db.session.commit()
+        admin_cache.invalidate('applications', 'stats')
+        email_outbox.wake()
         
-        # Send notification email to admin
-        admin_subject = f"نئی داخلہ درخواست - {data['firstName']} {data['lastName']}"
-        admin_body = f"""
-نئی داخلہ درخواست موصول ہوئی:
-
-Application Number: {application.application_number}
-
-طالب علم کی تفصیلات:
-نام: {data['firstName']} {data['lastName']}
-والد کا نام: {data['fatherName']}
-CNIC: {data['cnic']}
-ای میل: {data['email']}
-فون: {data['phone']}
-تاریخ پیدائش: {data['dateOfBirth']}
-جنس: {data['gender']}
-پتہ: {data['address']}
-تعلیمی قابلیت: {data['education']}
-منتخب کردہ کورس: {data['course']}
-
-درخواست کی تاریخ: {application.application_date.strftime('%Y-%m-%d %H:%M:%S')}
-
-Virtual Islamic University Admissions
-        """
-        
-        send_email_notification(
-            os.getenv('ADMIN_EMAIL'),
-            admin_subject,
-            admin_body
-        )
-        
-        # Send confirmation email to applicant
-        course_names = {
-            'quran': 'فہم القرآن',
-            'arabic': 'اللغة العربية',
-            'islamic-studies': 'علوم الدین'
-        }
+        return jsonify({
+            'success': True,
+            'message': 'آپ کی داخلہ درخواست کامیابی سے جمع ہوئی',
+            'application_number': application_number,
+            'application_id': application_id
+        })
         
-        user_subject = "داخلہ درخواست موصول ہوئی - Virtual Islamic University"
-        user_body = f"""
-السلام علیکم {data['firstName']} {data['lastName']},
+    except Exception as e:
+        db.session.rollback()
+        print(f"Admission submission error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'سرور میں خرابی، براہ کرم دوبارہ کوشش کریں'
+        }), 500
 
-آپ کی داخلہ درخواست کامیابی سے موصول ہوئی ہے۔
+@app.route('/api/submissions/<ingest_id>', methods=['GET'])
+def submission_status(ingest_id):
+    """Status of a submission accepted in write-behind mode (queued, applied or rejected)"""
+    if not INGEST_ID_PATTERN.match(ingest_id):
+        abort(404)
+    application = AdmissionApplication.query.filter_by(ingest_id=ingest_id).first()
+    if application:
+        return jsonify({
+            'success': True,
+            'status': 'applied',
+            'application_number': application.application_number
+        })
+    contact = ContactSubmission.query.filter_by(ingest_id=ingest_id).first()
+    if contact:
+        return jsonify({
+            'success': True,
+            'status': 'applied',
+            'submission_id': contact.id
+        })
+    rejected = ingest_log.find_rejected(ingest_id)
+    if rejected:
+        return jsonify({
+            'success': True,
+            'status': 'rejected',
+            'error': 'اس CNIC یا ای میل سے پہلے سے درخواست موجود ہے' if rejected['error'] == 'duplicate'
+                     else 'درخواست محفوظ نہیں ہو سکی'
+        })
+    return jsonify({
+        'success': True,
+        'status': 'queued'
+    })
 
-Application Number: {application.application_number}
-منتخب کردہ کورس: {course_names.get(data['course'], data['course'])}
+@app.route('/api/admin/ingest', methods=['GET'])
+@require_admin_auth
+def get_ingest_stats():
+    """Write-behind ingestion backlog and writer counters (Admin endpoint)"""
+    return jsonify({
+        'success': True,
+        'mode': 'write-behind' if ingest_enabled() else 'sync',
+        'backlog_bytes': ingest_log.backlog_bytes() if fcntl is not None else 0,
+        'segments': len(ingest_log.segments()),
+        'appended': ingest_log.appended,
+        'writer': ingest_writer.stats()
+    })
 
-ہم جلد ہی آپ کی درخواست کا جائزہ لے کر آپ سے رابطہ کریں گے۔
-اپنا Application Number محفوظ رکھیں۔
+def admin_list_params():
+    """Request arguments that select an admin list page; also the cache key"""
+    return {
+        'page': request.args.get('page', 1, type=int),
+        'per_page': request.args.get('per_page', 10, type=int),
+        'status': request.args.get('status', None),
+        # Cursor mode (?cursor=, then ?cursor=<next_cursor>): no OFFSET, total optional
+        'cursor': request.args.get('cursor'),
+        'include_total': request.args.get('include_total', '').lower() in ('1', 'true')
+    }
+
+def admin_list_payload(items_key, model, date_column, page, per_page, status, cursor, include_total):
+    """Response body for an admin list in page-number or cursor mode"""
+    query = model.query
+    
+    if status:
+        query = query.filter(model.status == status)
+    
+    if cursor is not None:
+        return keyset_listing(
+            items_key, query, date_column, model.id, per_page, cursor, include_total, (items_key, status)
+        )
+    
+    items = query.order_by(date_column.desc())\
+                 .paginate(page=page, per_page=per_page, error_out=False)
+    
+    return {
+        'success': True,
+        items_key: [item.to_dict() for item in items.items],
+        'total': items.total,
+        'pages': items.pages,
+        'current_page': page,
+        'per_page': per_page
+    }
 
-شکریہ!
-Virtual Islamic University Admissions Team
-{os.getenv('UNIVERSITY_EMAIL')}
-{os.getenv('UNIVERSITY_PHONE')}
-        """
-        
-        send_email_notification(data['email'], user_subject, user_body)
-        
-        return jsonify({
-            'success': True,
-            'message': 'آپ کی داخلہ درخواست کامیابی سے جمع ہوئی',
-            'application_number': application.application_number,
-            'application_id': application.id
-        })
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"Admission submission error: {e}")
-        return jsonify({
-            'success': False,
-            'error': 'سرور میں خرابی، براہ کرم دوبارہ کوشش کریں'
-        }), 500
+def stats_payload():
+    """Dashboard statistics; every number comes from the maintained counters (one small read)"""
+    counters = dict(db.session.execute(db.select(AdminCounter.name, AdminCounter.value)).all())
+    course_prefix = 'applications.course.'
+    course_stats = sorted(
+        ((name[len(course_prefix):], count) for name, count in counters.items()
+         if name.startswith(course_prefix) and count > 0),
+        key=lambda item: (-item[1], item[0])
+    )
+    
+    return {
+        'success': True,
+        'stats': {
+            'total_applications': counters.get('applications.total', 0),
+            'pending_applications': counters.get('applications.status.pending', 0),
+            'approved_applications': counters.get('applications.status.approved', 0),
+            'rejected_applications': counters.get('applications.status.rejected', 0),
+            'total_contacts': counters.get('contacts.total', 0),
+            'new_contacts': counters.get('contacts.status.new', 0),
+            'course_distribution': [
+                {'course': course, 'count': count} for course, count in course_stats
+            ]
+        }
+    }
 
 @app.route('/api/admin/applications', methods=['GET'])
 @require_admin_auth
 def get_applications():
     """Get all admission applications (Admin endpoint)"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        status = request.args.get('status', None)
-        
-        query = AdmissionApplication.query
-        
-        if status:
-            query = query.filter(AdmissionApplication.status == status)
-        
-        applications = query.order_by(AdmissionApplication.application_date.desc())\
-                          .paginate(page=page, per_page=per_page, error_out=False)
+        params = admin_list_params()
+        return jsonify(admin_cache.get_or_compute(
+            'applications', params, ('applications',),
+            lambda: admin_list_payload(
+                'applications', AdmissionApplication, AdmissionApplication.application_date, **params
+            )
+        ))
         
+    except InvalidCursor:
         return jsonify({
-            'success': True,
-            'applications': [app.to_dict() for app in applications.items],
-            'total': applications.total,
-            'pages': applications.pages,
-            'current_page': page,
-            'per_page': per_page
-        })
-        
+            'success': False,
+            'error': 'غلط cursor'
+        }), 400
     except Exception as e:
         print(f"Get applications error: {e}")
         return jsonify({
@@ -673,27 +3762,19 @@ def get_applications():
 def get_contacts():
     """Get all contact submissions (Admin endpoint)"""
     try:
-        page = request.args.get('page', 1, type=int)
-        per_page = request.args.get('per_page', 10, type=int)
-        status = request.args.get('status', None)
-        
-        query = ContactSubmission.query
-        
-        if status:
-            query = query.filter(ContactSubmission.status == status)
-        
-        contacts = query.order_by(ContactSubmission.submission_date.desc())\
-                       .paginate(page=page, per_page=per_page, error_out=False)
+        params = admin_list_params()
+        return jsonify(admin_cache.get_or_compute(
+            'contacts', params, ('contacts',),
+            lambda: admin_list_payload(
+                'contacts', ContactSubmission, ContactSubmission.submission_date, **params
+            )
+        ))
         
+    except InvalidCursor:
         return jsonify({
-            'success': True,
-            'contacts': [contact.to_dict() for contact in contacts.items],
-            'total': contacts.total,
-            'pages': contacts.pages,
-            'current_page': page,
-            'per_page': per_page
-        })
-        
+            'success': False,
+            'error': 'غلط cursor'
+        }), 400
     except Exception as e:
         print(f"Get contacts error: {e}")
         return jsonify({
@@ -706,33 +3787,7 @@ def get_contacts():
 def get_stats():
     """Get dashboard statistics (Admin endpoint)"""
     try:
-        total_applications = AdmissionApplication.query.count()
-        pending_applications = AdmissionApplication.query.filter_by(status='pending').count()
-        approved_applications = AdmissionApplication.query.filter_by(status='approved').count()
-        rejected_applications = AdmissionApplication.query.filter_by(status='rejected').count()
-        total_contacts = ContactSubmission.query.count()
-        new_contacts = ContactSubmission.query.filter_by(status='new').count()
-        
-        # Applications by course
-        course_stats = db.session.query(
-            AdmissionApplication.course,
-            db.func.count(AdmissionApplication.id)
-        ).group_by(AdmissionApplication.course).all()
-        
-        return jsonify({
-            'success': True,
-            'stats': {
-                'total_applications': total_applications,
-                'pending_applications': pending_applications,
-                'approved_applications': approved_applications,
-                'rejected_applications': rejected_applications,
-                'total_contacts': total_contacts,
-                'new_contacts': new_contacts,
-                'course_distribution': [
-                    {'course': course, 'count': count} for course, count in course_stats
-                ]
-            }
-        })
+        return jsonify(admin_cache.get_or_compute('stats', {}, ('stats',), stats_payload))
         
     except Exception as e:
         print(f"Get stats error: {e}")
@@ -741,41 +3796,204 @@ def get_stats():
             'error': 'اعداد و شمار لوڈ کرنے میں خرابی'
         }), 500
 
-@app.route('/api/admin/applications/<int:app_id>/approve', methods=['POST'])
+SEARCH_KIND_PARAMS = {'applications': 'application', 'contacts': 'contact'}
+
+def search_payload(q, kind, page, per_page):
+    """Ranked search results with the matching rows, one page at a time"""
+    per_page = min(max(per_page, 1), app.config['ADMIN_PAGE_MAX'])
+    page = max(page, 1)
+    hits = search_documents(q, kind, per_page + 1, (page - 1) * per_page)
+    has_more = len(hits) > per_page
+    hits = hits[:per_page]
+    
+    # Load the matching rows with one query per kind
+    rows = {}
+    for row_kind, model in (('application', AdmissionApplication), ('contact', ContactSubmission)):
+        ids = [ref_id for hit_kind, ref_id, _ in hits if hit_kind == row_kind]
+        if ids:
+            rows[row_kind] = {row.id: row for row in model.query.filter(model.id.in_(ids))}
+    
+    return {
+        'success': True,
+        'query': q,
+        'results': [
+            {'kind': hit_kind, 'id': ref_id, 'score': round(score, 4), 'item': rows[hit_kind][ref_id].to_dict()}
+            for hit_kind, ref_id, score in hits
+            if ref_id in rows.get(hit_kind, {})
+        ],
+        'page': page,
+        'per_page': per_page,
+        'has_more': has_more
+    }
+
+@app.route('/api/admin/search', methods=['GET'])
 @require_admin_auth
-def approve_application(app_id):
-    """Approve an admission application"""
+def search_admin():
+    """Search applications and contact messages by name, CNIC, email, subject or text (Admin endpoint)"""
     try:
-        application = AdmissionApplication.query.get_or_404(app_id)
-        application.status = 'approved'
-        db.session.commit()
+        q = request.args.get('q', '').strip()
+        if not q:
+            return jsonify({
+                'success': False,
+                'error': 'تلاش کے لیے کوئی لفظ درج کریں'
+            }), 400
         
-        # Send approval email to applicant
-        course_names = {
-            'quran': 'فہم القرآن',
-            'arabic': 'اللغة العربية',
-            'islamic-studies': 'علوم الدین'
+        kind = SEARCH_KIND_PARAMS.get(request.args.get('kind'))
+        params = {
+            'q': q,
+            'kind': kind,
+            'page': request.args.get('page', 1, type=int),
+            'per_page': request.args.get('per_page', 20, type=int)
         }
+        tags = (kind + 's',) if kind else ('applications', 'contacts')
+        return jsonify(admin_cache.get_or_compute('search', params, tags, lambda: search_payload(**params)))
         
-        subject = "داخلہ منظور! - Virtual Islamic University"
-        body = f"""
-السلام علیکم {application.first_name} {application.last_name},
+    except Exception as e:
+        print(f"Search error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'تلاش میں خرابی'
+        }), 500
 
-مبارک ہو! آپ کی داخلہ درخواست منظور ہو گئی ہے۔
+@app.route('/api/admin/export/<kind>', methods=['GET'])
+@require_admin_auth
+def export_admin_data(kind):
+    """Download all applications or contacts as CSV, NDJSON or XLSX (Admin endpoint)
 
-Application Number: {application.application_number}
-منتخب کردہ کورس: {course_names.get(application.course, application.course)}
+    Filters: ?status=, ?course= (applications), ?from=YYYY-MM-DD, ?to=YYYY-MM-DD (inclusive)
+    """
+    fmt = request.args.get('format', 'csv').lower()
+    if kind not in EXPORT_KINDS or fmt not in EXPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'error': 'غلط ایکسپورٹ کی قسم',
+            'kinds': sorted(EXPORT_KINDS),
+            'formats': sorted(EXPORT_FORMATS)
+        }), 400
+    try:
+        filters = {
+            'status': request.args.get('status'),
+            'course': request.args.get('course'),
+            'date_from': parse_export_date(request.args.get('from')),
+            'date_to': parse_export_date(request.args.get('to'), end_of_day=True)
+        }
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'غلط تاریخ، YYYY-MM-DD استعمال کریں'
+        }), 400
+    
+    columns = EXPORT_KINDS[kind][2]
+    mimetype, encode = EXPORT_FORMATS[fmt]
+    filename = f"{kind}-{datetime.utcnow():%Y%m%d-%H%M%S}.{fmt}"
+    
+    def generate():
+        started = time.perf_counter()
+        count = 0
+        def counted(batches):
+            nonlocal count
+            for rows in batches:
+                count += len(rows)
+                yield rows
+        try:
+            yield from encode(kind, columns, counted(export_rows(kind, filters)))
+        except Exception as e:
+            # Headers are already sent; dropping the connection marks the download as incomplete
+            print(f"Export error ({kind}.{fmt} after {count} rows): {e}")
+            raise
+        print(f"Exported {count} {kind} as {fmt} in {time.perf_counter() - started:.2f}s")
+    
+    response = Response(stream_with_context(generate()), content_type=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response.headers['Cache-Control'] = 'no-store'
+    # Ask nginx not to buffer, so the download starts with the first batch
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
-ہم جلد ہی آپ کو کورس کی تفصیلات اور شروعات کی تاریخ کے بارے میں مطلع کریں گے۔
+@app.route('/api/admin/applications/import', methods=['POST'])
+@require_admin_auth
+def import_admin_applications():
+    """Create applications from an uploaded CSV or XLSX sheet (Admin endpoint)
 
-خوش آمدید Virtual Islamic University میں!
+    Multipart field "file" with a header row of form keys (firstName, cnic, ...) or
+    column names (first_name, ...). ?dry_run=1 only validates; ?notify=0 skips the
+    applicants' confirmation emails. Rows are committed in batches, so a failure
+    part-way keeps the batches before it (re-uploading skips them as duplicates).
+    """
+    max_bytes = app.config['IMPORT_MAX_BYTES']
+    if request.content_length is not None and request.content_length > max_bytes:
+        abort(413)
+    request.max_content_length = max_bytes
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({
+            'success': False,
+            'error': 'CSV یا XLSX فائل منتخب کریں'
+        }), 400
+    file_format = request.args.get('format') or upload.filename.rsplit('.', 1)[-1].lower()
+    if file_format not in ('csv', 'xlsx'):
+        return jsonify({
+            'success': False,
+            'error': 'صرف CSV یا XLSX فائل قبول ہے'
+        }), 400
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    notify = request.args.get('notify', '1').lower() not in ('0', 'false', 'no')
+    
+    started = time.perf_counter()
+    try:
+        report, summary = import_applications(import_rows(upload.stream, file_format), notify, dry_run)
+    except ImportFileError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except (UnicodeDecodeError, csv.Error, zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+        db.session.rollback()
+        print(f"Import file error ({upload.filename}): {e}")
+        return jsonify({
+            'success': False,
+            'error': 'فائل پڑھی نہیں جا سکی، UTF-8 CSV یا XLSX فائل استعمال کریں'
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Import error ({upload.filename}): {e}")
+        return jsonify({
+            'success': False,
+            'error': 'سرور میں خرابی، براہ کرم دوبارہ کوشش کریں'
+        }), 500
+    finally:
+        if not dry_run:
+            # Earlier batches may be committed even if a later one failed
+            admin_cache.invalidate('applications', 'stats')
+            email_outbox.wake()
+    
+    elapsed = time.perf_counter() - started
+    print(f"Imported {upload.filename}: {summary} in {elapsed:.2f}s" + (" (dry run)" if dry_run else ""))
+    return jsonify({
+        'success': True,
+        'dry_run': dry_run,
+        'summary': summary,
+        'rows': report,
+        'seconds': round(elapsed, 3)
+    })
 
-Virtual Islamic University Admissions Team
-{os.getenv('UNIVERSITY_EMAIL')}
-{os.getenv('UNIVERSITY_PHONE')}
-        """
+@app.route('/api/admin/applications/<int:app_id>/approve', methods=['POST'])
+@require_admin_auth
+def approve_application(app_id):
+    """Approve an admission application"""
+    try:
+        application = AdmissionApplication.query.get_or_404(app_id)
+        bump_counters(status_change('applications', application.status, 'approved'))
+        application.status = 'approved'
+        
+        # Queue approval email to applicant
+        subject, body = approval_email(application)
+        enqueue_email(application.email, subject, body)
         
-        send_email_notification(application.email, subject, body)
+        db.session.commit()
+        admin_cache.invalidate('applications', 'stats')
+        email_outbox.wake()
         
         return jsonify({
             'success': True,
@@ -799,28 +4017,16 @@ def reject_application(app_id):
         rejection_reason = data.get('reason', 'شرائط پوری نہیں ہونا')
         
         application = AdmissionApplication.query.get_or_404(app_id)
+        bump_counters(status_change('applications', application.status, 'rejected'))
         application.status = 'rejected'
-        db.session.commit()
         
-        # Send rejection email to applicant
-        subject = "داخلہ درخواست - Virtual Islamic University"
-        body = f"""
-السلام علیکم {application.first_name} {application.last_name},
-
-ہمیں افسوس ہے کہ اس وقت آپ کی داخلہ درخواست منظور نہیں کی جا سکی۔
-
-Application Number: {application.application_number}
-وجہ: {rejection_reason}
-
-آپ مستقبل میں دوبارہ درخواست دے سکتے ہیں۔
-
-شکریہ!
-Virtual Islamic University Admissions Team
-{os.getenv('UNIVERSITY_EMAIL')}
-{os.getenv('UNIVERSITY_PHONE')}
-        """
+        # Queue rejection email to applicant
+        subject, body = rejection_email(application, rejection_reason)
+        enqueue_email(application.email, subject, body)
         
-        send_email_notification(application.email, subject, body)
+        db.session.commit()
+        admin_cache.invalidate('applications', 'stats')
+        email_outbox.wake()
         
         return jsonify({
             'success': True,
@@ -841,8 +4047,11 @@ def delete_application(app_id):
     """Delete an admission application"""
     try:
         application = AdmissionApplication.query.get_or_404(app_id)
+        bump_counters(application_counts(application.status, application.course, -1))
+        unindex_search_document('application', application.id)
         db.session.delete(application)
         db.session.commit()
+        admin_cache.invalidate('applications', 'stats')
         
         return jsonify({
             'success': True,
@@ -863,8 +4072,11 @@ def delete_contact(contact_id):
     """Delete a contact message"""
     try:
         contact = ContactSubmission.query.get_or_404(contact_id)
+        bump_counters(contact_counts(contact.status, -1))
+        unindex_search_document('contact', contact.id)
         db.session.delete(contact)
         db.session.commit()
+        admin_cache.invalidate('contacts', 'stats')
         
         return jsonify({
             'success': True,
@@ -885,8 +4097,10 @@ def mark_contact_read(contact_id):
     """Mark a contact message as read"""
     try:
         contact = ContactSubmission.query.get_or_404(contact_id)
+        bump_counters(status_change('contacts', contact.status, 'read'))
         contact.status = 'read'
         db.session.commit()
+        admin_cache.invalidate('contacts', 'stats')
         
         return jsonify({
             'success': True,
@@ -946,24 +4160,27 @@ Virtual Islamic University Team
 {os.getenv('UNIVERSITY_PHONE')}
         """
         
-        # Send the reply email
-        email_sent, email_message = send_email_notification(contact.email, subject, body)
-        
-        if email_sent:
-            # Mark the contact as replied
-            contact.status = 'replied'
-            db.session.commit()
-            
-            return jsonify({
-                'success': True,
-                'message': 'جواب کامیابی سے بھیج دیا گیا'
-            })
-        else:
+        # A reply that can never be sent should not mark the message as replied
+        email_problem = email_config_problem()
+        if email_problem:
             return jsonify({
                 'success': False,
-                'error': email_message or 'ای میل بھیجنے میں خرابی ہوئی'
+                'error': email_problem
             }), 500
         
+        # Queue the reply email and mark the contact as replied in one transaction
+        enqueue_email(contact.email, subject, body)
+        bump_counters(status_change('contacts', contact.status, 'replied'))
+        contact.status = 'replied'
+        db.session.commit()
+        admin_cache.invalidate('contacts', 'stats')
+        email_outbox.wake()
+        
+        return jsonify({
+            'success': True,
+            'message': 'جواب کامیابی سے بھیج دیا گیا'
+        })
+        
     except Exception as e:
         db.session.rollback()
         print(f"Reply to contact error: {e}")
@@ -972,69 +4189,309 @@ Virtual Islamic University Team
             'error': 'جواب بھیجنے میں خرابی'
         }), 500
 
-# Static file serving routes
-@app.route('/assets/<path:filename>')
-def serve_assets(filename):
-    """Serve static assets (CSS, JS, images, fonts)"""
+# Batch admin operations
+# Each batch selects its target rows once, applies one set-based UPDATE or DELETE,
+# and adjusts counters, the search index and the email outbox in the same transaction.
+class BatchRequestError(ValueError):
+    """A batch request body that cannot be applied; the message is shown to the admin"""
+
+# action -> new status (None deletes the rows)
+APPLICATION_BATCH_ACTIONS = {'approve': 'approved', 'reject': 'rejected', 'delete': None}
+CONTACT_BATCH_ACTIONS = {'mark-read': 'read', 'delete': None}
+
+def batch_targets(model, data, filter_fields):
+    """Rows named by data['ids'] or matched by data['filter'], plus the ids that do not exist"""
+    ids, filters = data.get('ids'), data.get('filter')
+    if (ids is None) == (filters is None):
+        raise BatchRequestError('ids یا filter میں سے ایک درج کریں')
+    
+    query = model.query.order_by(model.id)
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            raise BatchRequestError('ids نمبروں کی فہرست ہونی چاہیے')
+        ids = list(dict.fromkeys(ids))
+        if len(ids) > app.config['ADMIN_BATCH_MAX']:
+            raise BatchRequestError(f"ایک وقت میں زیادہ سے زیادہ {app.config['ADMIN_BATCH_MAX']} ریکارڈ")
+        query = query.filter(model.id.in_(ids))
+    else:
+        if not isinstance(filters, dict) or not filters or set(filters) - set(filter_fields):
+            raise BatchRequestError(f"filter میں {', '.join(filter_fields)} میں سے کم از کم ایک درج کریں")
+        if not all(isinstance(value, (str, int)) and not isinstance(value, bool) for value in filters.values()):
+            raise BatchRequestError('filter کی ہر قیمت متن یا نمبر ہونی چاہیے')
+        for field, value in filters.items():
+            query = query.filter(getattr(model, field) == value)
+        query = query.limit(app.config['ADMIN_BATCH_MAX'] + 1)
+    
+    # Lock the rows (PostgreSQL) so the counter adjustments match what the UPDATE changes
+    rows = query.with_for_update().all()
+    if ids is None and len(rows) > app.config['ADMIN_BATCH_MAX']:
+        raise BatchRequestError(f"filter سے {app.config['ADMIN_BATCH_MAX']} سے زیادہ ریکارڈ ملتے ہیں")
+    found = {row.id for row in rows}
+    missing = [i for i in ids if i not in found] if ids is not None else []
+    return rows, missing
+
+def apply_batch(model, kind, rows, new_status, counts):
+    """One UPDATE/DELETE for rows; returns {id: result} and the rows actually changed"""
+    prefix = kind + 's'
+    deltas = {}
+    if new_status is None:
+        changed = rows
+        for row in rows:
+            for name, change in counts(row, -1).items():
+                deltas[name] = deltas.get(name, 0) + change
+        unindex_search_documents(kind, [row.id for row in rows])
+        statement = db.delete(model)
+        result = 'deleted'
+    else:
+        changed = [row for row in rows if row.status != new_status]
+        for row in changed:
+            for name, change in status_change(prefix, row.status, new_status).items():
+                deltas[name] = deltas.get(name, 0) + change
+        statement = db.update(model).values(status=new_status)
+        result = new_status
+    
+    if changed:
+        bump_counters(deltas)
+        db.session.execute(
+            statement.where(model.id.in_([row.id for row in changed])),
+            execution_options={'synchronize_session': False}
+        )
+    results = {row.id: 'unchanged' for row in rows}
+    results.update((row.id, result) for row in changed)
+    return results, changed
+
+def batch_response(results, missing):
+    results = dict(results)
+    results.update((i, 'not_found') for i in missing)
+    summary = {}
+    for result in results.values():
+        summary[result] = summary.get(result, 0) + 1
+    return {
+        'success': True,
+        'results': {str(i): result for i, result in sorted(results.items())},
+        'summary': summary
+    }
+
+@app.route('/api/admin/applications/batch', methods=['POST'])
+@require_admin_auth
+def batch_applications():
+    """Approve, reject or delete many applications at once (Admin endpoint)
+
+    Body: {"action": "approve|reject|delete", "ids": [...]} or {"action": ..., "filter": {"status": ..., "course": ...}},
+    plus "reason" for reject and "notify": false to skip the emails.
+    """
     try:
-        return send_from_directory('assets', filename)
-    except FileNotFoundError:
-        abort(404)
+        data = request.get_json() or {}
+        action = data.get('action')
+        if action not in APPLICATION_BATCH_ACTIONS:
+            raise BatchRequestError(f"action ان میں سے ہو: {', '.join(APPLICATION_BATCH_ACTIONS)}")
+        new_status = APPLICATION_BATCH_ACTIONS[action]
+        rejection_reason = data.get('reason', 'شرائط پوری نہیں ہونا')
+        
+        rows, missing = batch_targets(AdmissionApplication, data, ('status', 'course'))
+        results, changed = apply_batch(
+            AdmissionApplication, 'application', rows, new_status,
+            lambda row, sign: application_counts(row.status, row.course, sign)
+        )
+        
+        emails_queued = 0
+        if data.get('notify', True) and new_status is not None:
+            for row in changed:
+                if new_status == 'approved':
+                    subject, body = approval_email(row)
+                else:
+                    subject, body = rejection_email(row, rejection_reason)
+                enqueue_email(row.email, subject, body)
+                emails_queued += 1
+        
+        db.session.commit()
+        if changed:
+            admin_cache.invalidate('applications', 'stats')
+        if emails_queued:
+            email_outbox.wake()
+        
+        response = batch_response(results, missing)
+        response['emails_queued'] = emails_queued
+        return jsonify(response)
+        
+    except BatchRequestError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Batch applications error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'درخواستیں اپڈیٹ کرنے میں خرابی'
+        }), 500
+
+@app.route('/api/admin/contacts/batch', methods=['POST'])
+@require_admin_auth
+def batch_contacts():
+    """Mark read or delete many contact messages at once (Admin endpoint)
 
-# Serve Mehr Nastaliq Web fonts from hyphenated folder (canonical path used in CSS)
-@app.route('/mehr-nastaliq-web-font-v2.0/<path:filename>')
-def serve_mehr_fonts_hyphenated(filename):
-    """Serve Mehr Nastaliq Web font files from hyphenated folder"""
+    Body: {"action": "mark-read|delete", "ids": [...]} or {"action": ..., "filter": {"status": ...}}
+    """
     try:
-        return send_from_directory('mehr-nastaliq-web-font-v2.0', filename)
-    except FileNotFoundError:
-        abort(404)
+        data = request.get_json() or {}
+        action = data.get('action')
+        if action not in CONTACT_BATCH_ACTIONS:
+            raise BatchRequestError(f"action ان میں سے ہو: {', '.join(CONTACT_BATCH_ACTIONS)}")
+        
+        rows, missing = batch_targets(ContactSubmission, data, ('status',))
+        results, changed = apply_batch(
+            ContactSubmission, 'contact', rows, CONTACT_BATCH_ACTIONS[action],
+            lambda row, sign: contact_counts(row.status, sign)
+        )
+        db.session.commit()
+        if changed:
+            admin_cache.invalidate('contacts', 'stats')
+        
+        return jsonify(batch_response(results, missing))
+        
+    except BatchRequestError as e:
+        db.session.rollback()
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        db.session.rollback()
+        print(f"Batch contacts error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'پیغامات اپڈیٹ کرنے میں خرابی'
+        }), 500
 
-@app.route('/mehr nastaliq web font v 2.0/<path:filename>')
-def serve_fonts(filename):
-    """Serve font files"""
+# Static file serving: one catch-all route resolved through the mount table
+@app.route('/<path:filename>')
+def serve_mounted_file(filename):
+    """Serve assets, images, fonts and HTML pages from the static mount table"""
+    resolved = static_router.resolve(filename)
+    if resolved is None:
+        abort(404)
+    mount, path, st = resolved
     try:
-        return send_from_directory('mehr nastaliq web font v 2.0', filename)
+        if mount.pages_only:
+            response = serve_cached_file(path, 'text/html')
+            response.headers['Accept-CH'] = ACCEPT_CH
+            return response
+        return send_static(path, st)
     except FileNotFoundError:
+        static_router.forget(filename)
         abort(404)
 
-# Serve Jameel Noori Nastaleeq fonts root
-@app.route('/jameel-noori-nastaleeq/<path:filename>')
-def serve_jameel_fonts(filename):
-    """Serve Jameel Noori Nastaleeq font files"""
-    try:
-        return send_from_directory('jameel-noori-nastaleeq', filename)
-    except FileNotFoundError:
+@app.route('/img/<int:width>/<path:filename>')
+def serve_resized_image(width, filename):
+    """Serve a resized/re-encoded image, creating it on first request"""
+    if width not in app.config['IMAGE_RESIZE_WIDTHS']:
+        return jsonify({
+            'success': False,
+            'error': 'تصویر کی یہ چوڑائی دستیاب نہیں',
+            'allowed_widths': app.config['IMAGE_RESIZE_WIDTHS']
+        }), 400
+    if Image is None:
+        return jsonify({
+            'success': False,
+            'error': 'تصویر کا سائز تبدیل کرنے کی سہولت دستیاب نہیں'
+        }), 503
+
+    resolved = resolve_resizable_image(filename)
+    if resolved is None:
         abort(404)
+    source, st = resolved
+
+    fmt = request.args.get('fmt')
+    if fmt not in IMAGE_RESIZE_FORMATS or fmt in ('avif', 'webp') and fmt not in accepted_image_formats():
+        fmt = next(f for f in accepted_image_formats() if f in ('avif', 'webp', 'jpeg'))
+        if fmt == 'jpeg' and source.lower().endswith('.png'):
+            fmt = 'png'
+    _, extension, mimetype = IMAGE_RESIZE_FORMATS[fmt]
 
-@app.route('/static/<path:filename>')
-def serve_static(filename):
-    """Serve static files"""
+    key = f'{source}|{st.st_mtime_ns}|{st.st_size}|{width}|{fmt}'
     try:
-        return send_from_directory('static', filename)
-    except FileNotFoundError:
-        abort(404)
+        cached = image_cache.get_or_create(key, extension, lambda tmp: encode_resized_image(source, width, fmt, tmp))
+    except Exception as e:
+        print(f"Image resize error for {filename}: {e}")
+        abort(500)
+
+    response = deliver_file(cached, mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
 
-@app.route('/Images/<path:filename>')
-def serve_images(filename):
-    """Serve image files from Images directory"""
+@app.route('/api/admin/email-outbox', methods=['GET'])
+@require_admin_auth
+def get_email_outbox():
+    """Email queue depth, worker counters and the latest dead letters (Admin endpoint)"""
     try:
-        return send_from_directory('Images', filename)
-    except FileNotFoundError:
-        abort(404)
+        dead = EmailOutbox.query.filter_by(status='dead')\
+                                .order_by(EmailOutbox.id.desc()).limit(20).all()
+        return jsonify({
+            'success': True,
+            'outbox': email_outbox.stats(),
+            'smtp_pool': smtp_pool.stats(),
+            'dead_letters': [{
+                'id': message.id,
+                'to_email': message.to_email,
+                'subject': message.subject,
+                'attempts': message.attempts,
+                'last_error': message.last_error,
+                'created_at': message.created_at.isoformat()
+            } for message in dead]
+        })
+        
+    except Exception as e:
+        print(f"Email outbox stats error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'ای میل قطار لوڈ کرنے میں خرابی'
+        }), 500
 
-@app.route('/<path:filename>')
-def serve_html_files(filename):
-    """Serve HTML files and other course-related files"""
-    # Only serve .html files and not conflicting paths
-    if filename.endswith('.html') and not filename.startswith('api/'):
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                return f.read()
-        except FileNotFoundError:
-            abort(404)
-    else:
-        abort(404)
+@app.route('/api/admin/email-outbox/retry', methods=['POST'])
+@require_admin_auth
+def retry_dead_emails():
+    """Requeue dead-lettered emails, all or {"ids": [...]} (Admin endpoint)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        query = EmailOutbox.query.filter_by(status='dead')
+        if data.get('ids'):
+            query = query.filter(EmailOutbox.id.in_(data['ids']))
+        requeued = query.update({
+            'status': 'pending',
+            'attempts': 0,
+            'next_attempt_at': datetime.utcnow(),
+            'last_error': None
+        }, synchronize_session=False)
+        db.session.commit()
+        email_outbox.wake()
+        
+        return jsonify({
+            'success': True,
+            'requeued': requeued
+        })
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"Email outbox retry error: {e}")
+        return jsonify({
+            'success': False,
+            'error': 'ای میلز دوبارہ بھیجنے میں خرابی'
+        }), 500
+
+@app.route('/api/admin/cache-stats', methods=['GET'])
+@require_admin_auth
+def get_cache_stats():
+    """Get static router, page, image and admin cache counters (Admin endpoint)"""
+    return jsonify({
+        'success': True,
+        'static_router': static_router.stats(),
+        'page_cache': page_cache.stats(),
+        'image_cache': image_cache.stats(),
+        'admin_cache': admin_cache.stats()
+    })
 
 # Health check endpoint for Railway
 @app.route('/health')
@@ -1063,6 +4520,13 @@ def not_found(error):
         'error': 'صفحہ موجود نہیں'
     }), 404
 
+@app.errorhandler(413)
+def payload_too_large(error):
+    return jsonify({
+        'success': False,
+        'error': 'بھیجا گیا ڈیٹا حد سے زیادہ بڑا ہے'
+    }), 413
+
 @app.errorhandler(500)
 def internal_error(error):
     db.session.rollback()
@@ -1075,11 +4539,66 @@ def internal_error(error):
 
 # Initialize database tables
 def init_db():
-    """Initialize database tables"""
+    """Initialize database tables and apply pending migrations"""
     with app.app_context():
         db.create_all()
+        run_migrations()
         print("Database initialized successfully!")
 
+@app.cli.command('migrate')
+def migrate_command():
+    """Create missing tables and apply pending schema migrations"""
+    init_db()
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every application and contact message for admin search"""
+    with db.engine.begin() as conn:
+        count = rebuild_search_index(conn)
+    print(f"Search index rebuilt ({count} documents)")
+
+@app.cli.command('email-worker')
+def email_worker_command():
+    """Deliver queued emails in the foreground (for EMAIL_OUTBOX_WORKERS=0 deployments)"""
+    workers = max(app.config['EMAIL_OUTBOX_WORKERS'], 1)
+    email_outbox.start(workers)
+    print(f"Email outbox: {workers} worker(s) running, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        pass
+
+@app.cli.command('ingest-drain')
+def ingest_drain_command():
+    """Commit everything in the write-behind ingest log (e.g. before switching back to sync mode)"""
+    if fcntl is None:
+        print("Write-behind ingestion needs fcntl; nothing to drain")
+        return
+    print("Waiting for the writer lock (stop the web processes' writer, or let it finish)...")
+    lock_file = ingest_writer.acquire(blocking=True)
+    try:
+        consumed = 0
+        while True:
+            handled = ingest_writer.apply_once()
+            if not handled:
+                break
+            consumed += handled
+    finally:
+        lock_file.close()
+    stats = ingest_writer.stats()
+    print(f"Ingest log drained: {consumed} record(s), {stats['applied']} applied, "
+          f"{stats['replayed']} already committed, {stats['rejected']} rejected")
+
+@app.cli.command('reconcile-counters')
+def reconcile_counters_command():
+    """Recompute the admin dashboard counters and report any drift"""
+    with db.engine.begin() as conn:
+        drift = reconcile_counters(conn)
+    for name, (stored, actual) in drift.items():
+        print(f"{name}: {stored} -> {actual}")
+    print(f"Counters reconciled ({len(drift)} corrected)")
+
 if __name__ == '__main__':
     # Initialize database
     init_db()
@@ -185,7 +185,15 @@ async function handleAdmissionFormSubmission(event) {
         
         if (result.success) {
             // Show success message with application number
-            showSuccessPopup(`${result.message}<br><strong>Application Number: ${result.application_number}</strong>`);
+            if (result.application_number) {
+                showSuccessPopup(`${result.message}<br><strong>Application Number: ${result.application_number}</strong>`);
+            } else {
+                // Write-behind mode: only a tracking reference until the application is saved
+                const statusUrl = `${API_BASE_URL}${result.status_url.replace(/^\/api/, '')}`;
+                showSuccessPopup(`${result.message}<br>ٹریکنگ ریفرنس (Tracking Reference): <strong>${result.reference}</strong>` +
+                    `<br><a href="${statusUrl}" target="_blank" rel="noopener">درخواست کی حالت دیکھیں</a>` +
+                    `<br>Application Number ای میل کے ذریعے بھیج دیا جائے گا`);
+            }
             
             // Reset form
             form.reset();
@@ -392,7 +392,8 @@ function handleContactForm() {
 // Admission Form Handler (admission.html)
 function handleAdmissionForm() {
     const admissionForm = document.getElementById('admissionForm');
-    if (!admissionForm) return;
+    // admission.html submits the form with its own handler and only borrows watchSubmissionStatus
+    if (!admissionForm || admissionForm.dataset.submitHandler === 'page') return;
 
     // Add validation helpers
     addFormValidation();
@@ -441,8 +442,15 @@ function handleAdmissionForm() {
             
             if (result.success) {
                 // Show success message with application number using popup
-                const successMessage = `آپ کی درخواست کامیابی سے جمع ہو گئی!\n\nApplication Number: ${result.application_number}\n\nہم جلد ہی آپ سے رابطہ کریں گے۔\nاپنا Application Number محفوظ رکھیں۔\n\nشکریہ!`;
-                createAndShowSuccessPopup(successMessage);
+                if (result.application_number) {
+                    const successMessage = `آپ کی درخواست کامیابی سے جمع ہو گئی!\n\nApplication Number: ${result.application_number}\n\nہم جلد ہی آپ سے رابطہ کریں گے۔\nاپنا Application Number محفوظ رکھیں۔\n\nشکریہ!`;
+                    createAndShowSuccessPopup(successMessage);
+                } else {
+                    // Write-behind mode: only a tracking reference until the application is saved
+                    const successMessage = `آپ کی درخواست کامیابی سے جمع ہو گئی!\n\nٹریکنگ ریفرنس (Tracking Reference): ${result.reference}\n<span id="applicationNumberStatus">Application Number تیار ہو رہا ہے...</span>\n\nہم جلد ہی آپ سے رابطہ کریں گے۔\n\nشکریہ!`;
+                    createAndShowSuccessPopup(successMessage);
+                    watchSubmissionStatus(result.status_url, 'applicationNumberStatus');
+                }
                 admissionForm.reset();
                 // Clear form validation styles
                 const inputs = admissionForm.querySelectorAll('input, textarea, select');
@@ -465,6 +473,35 @@ function handleAdmissionForm() {
     });
 }
 
+// Write-behind mode answers before the application is saved: poll until it has its number.
+// Also used by admission.html, which passes its own API base.
+function watchSubmissionStatus(statusUrl, elementId, apiBase = API_BASE_URL, attempts = 20) {
+    const poll = async () => {
+        const target = document.getElementById(elementId);
+        if (!target) return;  // popup closed
+        try {
+            const response = await fetch(`${apiBase}${statusUrl.replace(/^\/api/, '')}`);
+            const status = await response.json();
+            if (status.status === 'applied') {
+                target.innerHTML = `Application Number: <strong>${status.application_number}</strong><br>اپنا Application Number محفوظ رکھیں`;
+                return;
+            }
+            if (status.status === 'rejected') {
+                target.textContent = status.error;
+                return;
+            }
+        } catch (error) {
+            console.error('Submission status error:', error);
+        }
+        if (--attempts > 0) {
+            setTimeout(poll, 3000);
+        } else {
+            target.textContent = 'Application Number ای میل کے ذریعے بھیج دیا جائے گا';
+        }
+    };
+    setTimeout(poll, 1000);
+}
+
 // Form validation for admission form
 function validateAdmissionForm(data) {
     // Check required fields
@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+
+# app.py reads its configuration at import time, and the .env file does not
+# override variables that are already set: point it at a throwaway SQLite
+# database and an unreachable mail server before importing it.
+WORKDIR = tempfile.mkdtemp(prefix="viu-tests-")
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{WORKDIR}/test.db",
+    "MAIL_SERVER": "127.0.0.1",
+    "MAIL_PORT": "1",
+    "MAIL_USE_TLS": "False",
+    "MAIL_USE_SSL": "False",
+    "MAIL_USERNAME": "tests@example.com",
+    "MAIL_PASSWORD": "tests",
+    "ADMIN_EMAIL": "admin@example.com",
+    "ADMIN_CACHE_BACKEND": "memory",
+    "ADMIN_CACHE_PATH": f"{WORKDIR}/admin-cache.sqlite3",
+    "EMAIL_OUTBOX_WORKERS": "0",
+    "INGEST_MODE": "sync",
+    "INGEST_LOG_DIR": f"{WORKDIR}/ingest-log",
+    "IMAGE_CACHE_DIR": f"{WORKDIR}/image-cache",
+})
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app as viu  # noqa: E402
+
+viu.init_db()
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    """Every test starts from empty tables"""
+    with viu.app.app_context():
+        for table in reversed(viu.db.metadata.sorted_tables):
+            if table.name != "schema_migrations":
+                viu.db.session.execute(table.delete())
+        viu.db.session.execute(viu.db.text("DELETE FROM search_index"))
+        viu.db.session.commit()
+    viu.admin_cache.invalidate("applications", "contacts", "stats")
+    yield
+
+
+@pytest.fixture
+def app_context():
+    with viu.app.app_context():
+        yield
+
+
+@pytest.fixture
+def client():
+    return viu.app.test_client()
+
+
+@pytest.fixture
+def admin_client():
+    client = viu.app.test_client()
+    with client.session_transaction() as session:
+        session["admin_logged_in"] = True
+        session["login_time"] = datetime.now().isoformat()
+    return client
+
+
+def admission_form(i: int, **overrides) -> dict:
+    """A valid admission form; i makes the CNIC and email unique"""
+    form = {
+        "firstName": "احمد",
+        "lastName": f"علی {i}",
+        "fatherName": "والد",
+        "cnic": f"35202-{i:07d}-1",
+        "email": f"student{i}@example.com",
+        "phone": "+923001234567",
+        "dateOfBirth": "2001-05-17",
+        "gender": "male",
+        "address": "لاہور",
+        "education": "matric",
+        "course": "quran",
+    }
+    form.update(overrides)
+    return form
+
+
+def counters() -> dict:
+    return dict(viu.db.session.execute(viu.db.text("SELECT name, value FROM admin_counters")).all())
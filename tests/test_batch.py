@@ -0,0 +1,41 @@
+import pytest
+
+import app as viu
+from conftest import admission_form, counters
+
+
+def submit(client, count):
+    for i in range(count):
+        assert client.post("/api/submit-admission", json=admission_form(i)).status_code == 200
+
+
+def test_filter_batch_approves_matching_rows(client, admin_client):
+    submit(client, 3)
+    response = admin_client.post("/api/admin/applications/batch", json={
+        "action": "approve", "filter": {"status": "pending", "course": "quran"}, "notify": False,
+    })
+    assert response.status_code == 200
+    assert response.get_json()["summary"] == {"approved": 3}
+    with viu.app.app_context():
+        assert counters()["applications.status.approved"] == 3
+        assert counters()["applications.status.pending"] == 0
+
+
+@pytest.mark.parametrize("body", [
+    {"action": "approve", "filter": {"status": ["pending"]}},
+    {"action": "approve", "filter": {"status": {"$ne": "x"}}},
+    {"action": "approve", "filter": {"status": None}},
+    {"action": "approve", "filter": {"status": True}},
+    {"action": "approve", "ids": ["1"]},
+    {"action": "approve", "filter": {"email": "x@example.com"}},
+])
+def test_malformed_batch_is_refused(client, admin_client, body):
+    submit(client, 1)
+    response = admin_client.post("/api/admin/applications/batch", json=body)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_contact_filter_values_are_checked(admin_client):
+    response = admin_client.post("/api/admin/contacts/batch", json={"action": "mark-read", "filter": {"status": [1]}})
+    assert response.status_code == 400
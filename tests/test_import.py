@@ -0,0 +1,118 @@
+import csv
+import io
+import zipfile
+
+import app as viu
+from conftest import admission_form, counters
+
+
+HEADER = list(admission_form(0))
+
+
+def csv_upload(rows, header=HEADER):
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(header)
+    for row in rows:
+        writer.writerow([row.get(key, "") for key in header] if isinstance(row, dict) else row)
+    return io.BytesIO(text.getvalue().encode("utf-8")), "applications.csv"
+
+
+def xlsx_upload(rows):
+    """A minimal workbook with inline strings and explicit row numbers: {row number: [cells]}"""
+    def cell(column, value):
+        return f'<c r="{column}" t="inlineStr"><is><t>{value}</t></is></c>'
+
+    sheet = "".join(
+        f'<row r="{number}">' + "".join(cell(f"{chr(65 + i)}{number}", value) for i, value in enumerate(cells)) + "</row>"
+        for number, cells in rows.items()
+    )
+    main = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+    relationships = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w") as workbook:
+        workbook.writestr("xl/workbook.xml", (
+            f'<workbook xmlns="{main}" xmlns:r="{relationships}">'
+            '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        workbook.writestr("xl/_rels/workbook.xml.rels", (
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Target="worksheets/sheet1.xml"/></Relationships>'
+        ))
+        workbook.writestr("xl/worksheets/sheet1.xml", f'<worksheet xmlns="{main}"><sheetData>{sheet}</sheetData></worksheet>')
+    data.seek(0)
+    return data, "applications.xlsx"
+
+
+def upload(admin_client, file, query=""):
+    return admin_client.post(
+        f"/api/admin/applications/import{query}", data={"file": file}, content_type="multipart/form-data"
+    )
+
+
+def statuses(report):
+    return {entry["row"]: entry["status"] for entry in report}
+
+
+def test_report_covers_every_row(admin_client, client):
+    assert client.post("/api/submit-admission", json=admission_form(9)).status_code == 200
+    file = csv_upload([
+        admission_form(1),                           # row 2
+        admission_form(2, cnic="123"),               # row 3: invalid
+        admission_form(3, email=admission_form(9)["email"]),  # row 4: already registered
+        [],                                          # row 5: blank, skipped
+        admission_form(4),                           # row 6
+        admission_form(5, cnic=admission_form(1)["cnic"]),   # row 7: duplicate within the file
+    ])
+    response = upload(admin_client, file)
+    assert response.status_code == 200
+    data = response.get_json()
+    assert statuses(data["rows"]) == {2: "imported", 3: "invalid", 4: "duplicate", 6: "imported", 7: "duplicate"}
+    assert data["summary"] == {"imported": 2, "invalid": 1, "duplicate": 2}
+
+    invalid = next(entry for entry in data["rows"] if entry["status"] == "invalid")
+    assert "cnic" in invalid["errors"]
+    imported = [entry for entry in data["rows"] if entry["status"] == "imported"]
+    assert all(entry["application_number"].startswith("VIU-") for entry in imported)
+
+    with viu.app.app_context():
+        assert viu.AdmissionApplication.query.count() == 3
+        assert counters()["applications.total"] == 3
+        # The form sent two emails; imported rows only notify the applicant
+        assert viu.EmailOutbox.query.count() == 4
+
+
+def test_dry_run_inserts_nothing(admin_client):
+    response = upload(admin_client, csv_upload([admission_form(1), admission_form(2, email="x")]), "?dry_run=1")
+    data = response.get_json()
+    assert data["dry_run"] is True
+    assert statuses(data["rows"]) == {2: "valid", 3: "invalid"}
+    with viu.app.app_context():
+        assert viu.AdmissionApplication.query.count() == 0
+        assert viu.EmailOutbox.query.count() == 0
+
+
+def test_reupload_skips_imported_rows(admin_client):
+    rows = [admission_form(1), admission_form(2)]
+    assert upload(admin_client, csv_upload(rows)).get_json()["summary"] == {"imported": 2}
+    assert upload(admin_client, csv_upload(rows)).get_json()["summary"] == {"duplicate": 2}
+
+
+def test_missing_columns_are_refused(admin_client):
+    header = [key for key in HEADER if key != "cnic"]
+    response = upload(admin_client, csv_upload([admission_form(1)], header=header))
+    assert response.status_code == 400
+    assert "cnic" in response.get_json()["error"]
+
+
+def test_xlsx_rows_keep_their_sheet_numbers(admin_client):
+    # Excel leaves empty rows out of the sheet; the report still uses the numbers the admin sees
+    column_names = [field.column for field in viu.ADMISSION_SCHEMA.fields]
+    file = xlsx_upload({
+        1: column_names,
+        2: list(admission_form(1).values()),
+        5: list(admission_form(2, phone="0300").values()),
+    })
+    response = upload(admin_client, file)
+    assert response.status_code == 200
+    assert statuses(response.get_json()["rows"]) == {2: "imported", 5: "invalid"}
@@ -0,0 +1,122 @@
+import pytest
+
+import app as viu
+from conftest import admission_form, counters
+
+
+@pytest.fixture
+def write_behind(tmp_path, monkeypatch):
+    """Write-behind mode with a fresh log; the test drives the writer by hand"""
+    log = viu.IngestLog(str(tmp_path / "ingest-log"), segment_bytes=2000, fsync=False)
+    writer = viu.IngestWriter(log, batch_size=3, flush_interval=0.01)
+    monkeypatch.setitem(viu.app.config, "INGEST_MODE", "write-behind")
+    monkeypatch.setattr(viu, "ingest_log", log)
+    monkeypatch.setattr(viu, "ingest_writer", writer)
+    monkeypatch.setattr(writer, "wake", lambda: None)
+    lock_file = writer.acquire()
+    assert lock_file is not None
+    yield writer
+    lock_file.close()
+
+
+def drain(writer):
+    with viu.app.app_context():
+        while writer.apply_once():
+            pass
+
+
+def application_count():
+    with viu.app.app_context():
+        return viu.AdmissionApplication.query.count()
+
+
+def test_submission_is_acknowledged_then_applied(client, write_behind):
+    response = client.post("/api/submit-admission", json=admission_form(1))
+    assert response.status_code == 202
+    data = response.get_json()
+    assert data["application_number"] is None
+    assert client.get(data["status_url"]).get_json()["status"] == "queued"
+    assert application_count() == 0
+
+    drain(write_behind)
+    status = client.get(data["status_url"]).get_json()
+    assert status["status"] == "applied"
+    assert status["application_number"].startswith("VIU-")
+    with viu.app.app_context():
+        assert counters()["applications.total"] == 1
+
+
+def test_replay_after_crash_is_idempotent(client, write_behind):
+    for i in range(7):
+        assert client.post("/api/submit-admission", json=admission_form(i)).status_code == 202
+    assert len(write_behind.log.segments()) > 1
+
+    drain(write_behind)
+    assert application_count() == 7
+    # A crash before the checkpoint was written: the writer starts over from the beginning
+    write_behind.log.write_checkpoint((1, 0))
+    drain(write_behind)
+
+    assert application_count() == 7
+    assert write_behind.stats()["replayed"] > 0
+    with viu.app.app_context():
+        assert counters()["applications.total"] == 7
+        assert viu.EmailOutbox.query.count() == 14
+
+
+def test_torn_tail_is_cut_before_the_next_append(client, write_behind):
+    assert client.post("/api/submit-admission", json=admission_form(1)).status_code == 202
+    segment = write_behind.log.segments()[-1]
+    with open(write_behind.log.segment_path(segment), "ab") as f:
+        f.write(b'0badc0de {"id": "half a rec')
+
+    # A new process appends after the crash
+    write_behind.log._position = None
+    assert client.post("/api/submit-admission", json=admission_form(2)).status_code == 202
+    drain(write_behind)
+    assert application_count() == 2
+    assert write_behind.stats()["rejected"] == 0
+
+
+def test_pending_duplicate_is_refused(client, write_behind):
+    assert client.post("/api/submit-admission", json=admission_form(1)).status_code == 202
+    same_cnic = admission_form(2, cnic=admission_form(1)["cnic"])
+    response = client.post("/api/submit-admission", json=same_cnic)
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_claim_is_released_after_delete(client, admin_client, write_behind):
+    form = admission_form(1)
+    assert client.post("/api/submit-admission", json=form).status_code == 202
+    drain(write_behind)
+    # Applied: the database now refuses the duplicate
+    assert client.post("/api/submit-admission", json=form).status_code == 400
+
+    with viu.app.app_context():
+        application_id = viu.AdmissionApplication.query.one().id
+    assert admin_client.delete(f"/api/admin/applications/{application_id}").status_code == 200
+    assert client.post("/api/submit-admission", json=form).status_code == 202
+
+
+def test_claim_is_released_after_reject(client, write_behind):
+    form = admission_form(1)
+    # A duplicate that slipped past the checks (e.g. the database was down) is rejected by the writer
+    record = {"id": viu.new_ingest_id(), "kind": "admission", "values": {
+        "first_name": "a", "last_name": "b", "father_name": "c", "cnic": form["cnic"], "email": form["email"],
+        "phone": form["phone"], "date_of_birth": "2001-05-17", "gender": "male", "address": "L",
+        "education": "matric", "course": "quran", "application_date": "2026-01-01T00:00:00",
+    }}
+    with viu.app.app_context():
+        values, _ = viu.ADMISSION_SCHEMA.validate(form)
+        viu.save_admission(values)
+        viu.db.session.commit()
+    assert write_behind.log.append(record, (f"cnic:{form['cnic']}", f"email:{form['email']}"))
+    drain(write_behind)
+    status = client.get(f"/api/submissions/{record['id']}").get_json()
+    assert status["status"] == "rejected"
+
+    with viu.app.app_context():
+        viu.db.session.execute(viu.AdmissionApplication.__table__.delete())
+        viu.db.session.commit()
+    assert client.post("/api/submit-admission", json=form).status_code == 202
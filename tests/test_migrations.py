@@ -0,0 +1,68 @@
+import os
+import sqlite3
+import subprocess
+import sys
+from pathlib import Path
+
+import app as viu
+
+
+# The tables as the first release created them, before any migration
+BASELINE_SCHEMA = """
+CREATE TABLE contact_submissions (
+    id INTEGER NOT NULL PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    subject VARCHAR(200) NOT NULL,
+    message TEXT NOT NULL,
+    submission_date DATETIME,
+    status VARCHAR(20)
+);
+CREATE TABLE admission_applications (
+    id INTEGER NOT NULL PRIMARY KEY,
+    first_name VARCHAR(50) NOT NULL,
+    last_name VARCHAR(50) NOT NULL,
+    father_name VARCHAR(100) NOT NULL,
+    cnic VARCHAR(15) NOT NULL,
+    email VARCHAR(120) NOT NULL,
+    phone VARCHAR(20) NOT NULL,
+    date_of_birth DATE NOT NULL,
+    gender VARCHAR(10) NOT NULL,
+    address TEXT NOT NULL,
+    education VARCHAR(50) NOT NULL,
+    course VARCHAR(50) NOT NULL,
+    application_date DATETIME,
+    status VARCHAR(20),
+    application_number VARCHAR(20) UNIQUE
+);
+INSERT INTO admission_applications VALUES (
+    1, 'احمد', 'علی', 'والد', '35202-1234567-1', 'Student@Example.com', '+923001234567',
+    '2001-05-17', 'male', 'لاہور', 'matric', 'quran', '2024-03-01 10:00:00', 'approved', 'VIU-2024-000001'
+);
+INSERT INTO contact_submissions VALUES (1, 'زید', 'zaid@example.com', 'داخلہ', 'کورس کب شروع ہوگا؟', '2024-03-02 09:00:00', 'new');
+"""
+
+
+def test_baseline_database_migrates_to_head(tmp_path):
+    database = tmp_path / "baseline.db"
+    with sqlite3.connect(database) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+
+    # The Procfile release step, against the old database
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{database}")
+    result = subprocess.run(
+        [sys.executable, "-m", "flask", "--app", "app", "migrate"],
+        cwd=Path(viu.__file__).parent, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+
+    with sqlite3.connect(database) as conn:
+        applied = [version for (version,) in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+        assert applied == sorted(version for version, _, _ in viu.MIGRATIONS)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(admission_applications)")}
+        assert "ingest_id" in columns
+        assert conn.execute("SELECT email FROM admission_applications").fetchone() == ("student@example.com",)
+        assert conn.execute("SELECT count(*) FROM search_index").fetchone() == (2,)
+        counters = dict(conn.execute("SELECT name, value FROM admin_counters"))
+        assert counters["applications.status.approved"] == 1
+        assert counters["contacts.total"] == 1
@@ -0,0 +1,157 @@
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+
+import app as viu
+
+
+@pytest.fixture
+def outbox(app_context):
+    """A dispatcher with no threads: 3 attempts, 30s first backoff"""
+    return viu.EmailOutboxDispatcher(
+        workers=0, batch_size=10, poll_interval=1, lease_seconds=60,
+        max_attempts=3, backoff_base=30, backoff_max=3600,
+    )
+
+
+class FakeSMTP(list):
+    """Messages handed to the SMTP pool; set error to make every send fail"""
+    error = None
+
+    def send(self, message):
+        if self.error is not None:
+            raise self.error
+        self.append(message)
+
+
+@pytest.fixture
+def sent(monkeypatch):
+    smtp = FakeSMTP()
+    monkeypatch.setattr(viu.smtp_pool, "send", smtp.send)
+    return smtp
+
+
+def queue(count=1):
+    ids = []
+    for i in range(count):
+        ids.append(viu.enqueue_email(f"to{i}@example.com", "موضوع", "پیغام"))
+    viu.db.session.commit()
+    return [message.id for message in ids]
+
+
+def row(message_id):
+    viu.db.session.expire_all()
+    return viu.db.session.get(viu.EmailOutbox, message_id)
+
+
+def make_due(message_id):
+    viu.db.session.execute(
+        viu.EmailOutbox.__table__.update().where(viu.EmailOutbox.id == message_id)
+        .values(next_attempt_at=datetime.utcnow() - timedelta(seconds=1))
+    )
+    viu.db.session.commit()
+
+
+def test_sent_message_is_marked_sent(outbox, sent):
+    (message_id,) = queue()
+    assert outbox.drain_once() == 1
+    assert len(sent) == 1
+    message = row(message_id)
+    assert message.status == "sent"
+    assert message.attempts == 1
+    assert message.lease is None
+
+
+def test_leased_message_is_not_claimed_twice(outbox):
+    queue()
+    assert len(outbox.claim()) == 1
+    assert outbox.claim() == []
+
+
+def test_expired_lease_is_reclaimed(outbox, sent):
+    (message_id,) = queue()
+    # A worker claims the message and dies before finishing it
+    (stale,) = outbox.claim()
+    viu.db.session.execute(
+        viu.EmailOutbox.__table__.update().where(viu.EmailOutbox.id == message_id)
+        .values(locked_until=datetime.utcnow() - timedelta(seconds=1))
+    )
+    viu.db.session.commit()
+
+    assert outbox.drain_once() == 1
+    message = row(message_id)
+    assert message.status == "sent"
+    assert message.attempts == 2
+
+    # The dead worker's late report no longer holds the lease and changes nothing
+    outbox.finish(stale, "too late")
+    assert row(message_id).status == "sent"
+    assert row(message_id).last_error is None
+
+
+def test_failure_is_retried_with_backoff(outbox, sent):
+    (message_id,) = queue()
+    sent.error = smtplib.SMTPServerDisconnected("connection lost")
+    before = datetime.utcnow()
+    outbox.drain_once()
+
+    message = row(message_id)
+    assert message.status == "pending"
+    assert message.attempts == 1
+    assert "connection lost" in message.last_error
+    # 30s with +-20% jitter, and not due yet
+    delay = (message.next_attempt_at - before).total_seconds()
+    assert 24 <= delay <= 37
+    assert outbox.claim() == []
+
+    make_due(message_id)
+    outbox.drain_once()
+    delay = (row(message_id).next_attempt_at - datetime.utcnow()).total_seconds()
+    assert 47 <= delay <= 72  # doubled for the second attempt
+
+
+def test_dead_letter_after_max_attempts(outbox, sent):
+    (message_id,) = queue()
+    sent.error = smtplib.SMTPServerDisconnected("connection lost")
+    for _ in range(3):
+        make_due(message_id)
+        assert outbox.drain_once() == 1
+
+    message = row(message_id)
+    assert message.status == "dead"
+    assert message.attempts == 3
+    make_due(message_id)
+    assert outbox.drain_once() == 0
+
+
+def test_permanent_refusal_is_dead_lettered_at_once(outbox, sent):
+    (message_id,) = queue()
+    sent.error = smtplib.SMTPRecipientsRefused({"to0@example.com": (550, b"Mailbox unavailable")})
+    outbox.drain_once()
+    message = row(message_id)
+    assert message.status == "dead"
+    assert message.attempts == 1
+
+
+def test_unreachable_server_defers_the_whole_batch(outbox, sent):
+    ids = queue(3)
+    sent.error = viu.SMTPConnectionPool.ConnectError("connection refused")
+    assert outbox.drain_once() == 3
+    for message_id in ids:
+        message = row(message_id)
+        assert message.status == "pending"
+        assert message.attempts == 1
+        assert message.lease is None
+
+
+def test_dead_letters_can_be_requeued(admin_client, app_context, outbox, sent):
+    (message_id,) = queue()
+    sent.error = smtplib.SMTPRecipientsRefused({"to0@example.com": (550, b"Mailbox unavailable")})
+    outbox.drain_once()
+    assert row(message_id).status == "dead"
+
+    response = admin_client.post("/api/admin/email-outbox/retry", json={})
+    assert response.status_code == 200
+    message = row(message_id)
+    assert message.status == "pending"
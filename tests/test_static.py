@@ -0,0 +1,41 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+import app as viu
+
+
+ROOT = Path(viu.app.root_path)
+
+
+@pytest.fixture
+def built_admin_page():
+    """build/pages/admin_dashboard.html as tools/build_assets.py leaves it"""
+    built = ROOT / "build" / "pages" / "admin_dashboard.html"
+    created = [path for path in (built.parent.parent, built.parent, built) if not path.exists()]
+    built.parent.mkdir(parents=True, exist_ok=True)
+    if built in created:
+        shutil.copyfile(ROOT / "admin_dashboard.html", built)
+    yield built
+    for path in reversed(created):
+        if path.is_dir():
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            path.unlink(missing_ok=True)
+
+
+def test_admin_page_needs_login(client):
+    response = client.get("/admin_dashboard.html")
+    assert response.status_code == 302
+
+
+def test_built_admin_page_is_not_served(client, built_admin_page):
+    response = client.get("/build/pages/admin_dashboard.html")
+    assert response.status_code == 404
+
+
+def test_root_mount_serves_top_level_pages_only(client):
+    assert client.get("/courses.html").status_code == 200
+    assert client.get("/tests/conftest.py").status_code == 404
+    assert client.get("/jameel-noori-nastaleeq/Jameel-Noori-Nastaleeq-Regular/readme.html").status_code == 200
@@ -0,0 +1,358 @@
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+from pathlib import Path
+from urllib.parse import quote, unquote
+
+
+# Content-hashed asset build.
+#
+# - Fingerprints every file under the static directories below
+#   (assets/css/main.css -> assets/css/main.<hash>.css). Originals are not
+#   renamed; app.py maps hashed URLs back to files through the manifest.
+# - CSS files get their url(...) references rewritten to hashed URLs first,
+#   so their own hash covers the rewritten content. Rewritten copies go to
+#   build/static/.
+# - Top-level HTML pages are minified (markup, inline <style> and <script>)
+#   with asset references rewritten, and written to build/pages/.
+# - build/asset-manifest.json ties it together and is read by app.py at
+#   startup. Re-run this after editing any page or asset.
+#
+# Usage:
+#   python tools/build_assets.py
+
+STATIC_DIRS = [
+    "assets",
+    "static/js",
+    "mehr-nastaliq-web-font-v2.0",
+    "mehr nastaliq web font v 2.0",
+    "jameel-noori-nastaleeq",
+]
+
+SKIP_PARTS = {"_originals", "_responsive", "scss"}
+SKIP_SUFFIXES = {".gz", ".br", ".tmp"}
+
+HASH_LENGTH = 10
+
+BUILD_DIR = "build"
+MANIFEST_NAME = "asset-manifest.json"
+
+EXTERNAL_URL = re.compile(r"^(?:[a-zA-Z][a-zA-Z0-9+.-]*:|//|#)")
+CSS_URL = re.compile(r"""url\(\s*(?P<q>['"]?)(?P<url>[^'")]+)(?P=q)\s*\)""")
+HTML_URL_ATTR = re.compile(
+    r"""(?P<attr>\b(?:src|href|poster|data-src|data-bg)\s*=\s*)(?P<q>["'])(?P<url>[^"']*)(?P=q)""",
+    re.IGNORECASE,
+)
+HTML_SRCSET_ATTR = re.compile(r"""(?P<attr>\bsrcset\s*=\s*)(?P<q>["'])(?P<url>[^"']*)(?P=q)""", re.IGNORECASE)
+
+# Blocks whose content must not be touched by whitespace collapsing
+RAW_BLOCK = re.compile(r"(<(pre|textarea|script|style)\b[^>]*>)(.*?)(</\2\s*>)", re.IGNORECASE | re.DOTALL)
+HTML_COMMENT = re.compile(r"<!--(?!\[if|\s*\[if|<!\[endif).*?-->", re.DOTALL)
+CSS_COMMENT = re.compile(r"/\*.*?\*/", re.DOTALL)
+JS_TYPES = {"", "text/javascript", "application/javascript", "module"}
+
+
+def format_kb(num_bytes: int) -> str:
+    return f"{num_bytes / 1024:.1f}KB"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:HASH_LENGTH]
+
+
+def hashed_name(rel_path: str, digest: str) -> str:
+    root, ext = posixpath.splitext(rel_path)
+    return f"{root}.{digest}{ext}"
+
+
+def find_assets(repo_root: Path) -> list[str]:
+    found = []
+    for name in STATIC_DIRS:
+        root = repo_root / name
+        if not root.is_dir():
+            continue
+        for p in sorted(root.rglob("*")):
+            if p.is_file() and p.suffix.lower() not in SKIP_SUFFIXES and not SKIP_PARTS.intersection(p.parts):
+                found.append(p.relative_to(repo_root).as_posix())
+    return found
+
+
+# ---- Reference rewriting ----
+
+def rewrite_url(url: str, base_dir: str, assets: dict[str, str]) -> str:
+    """Map one reference to its hashed URL, keeping its relative/absolute form."""
+    if not url.strip() or EXTERNAL_URL.match(url.strip()):
+        return url
+
+    path, tail = re.match(r"([^?#]*)(.*)", url, re.DOTALL).groups()
+    clean = unquote(path)
+    rooted = clean.startswith("/")
+    resolved = posixpath.normpath(clean.lstrip("/") if rooted else posixpath.join(base_dir, clean))
+
+    hashed = assets.get(resolved)
+    if hashed is None:
+        return url
+
+    new_path = "/" + hashed if rooted else posixpath.relpath(hashed, base_dir or ".")
+    if "%" in path:
+        new_path = quote(new_path, safe="/")
+    return new_path + tail
+
+
+def rewrite_css_urls(css: str, base_dir: str, assets: dict[str, str]) -> str:
+    def repl(m):
+        return f"url({m.group('q')}{rewrite_url(m.group('url'), base_dir, assets)}{m.group('q')})"
+
+    return CSS_URL.sub(repl, css)
+
+
+def rewrite_html_urls(html: str, assets: dict[str, str]) -> str:
+    def attr_repl(m):
+        return f"{m.group('attr')}{m.group('q')}{rewrite_url(m.group('url'), '', assets)}{m.group('q')}"
+
+    def srcset_repl(m):
+        candidates = []
+        for candidate in m.group("url").split(","):
+            parts = candidate.strip().split(None, 1)
+            if parts:
+                parts[0] = rewrite_url(parts[0], "", assets)
+            candidates.append(" ".join(parts))
+        return f"{m.group('attr')}{m.group('q')}{', '.join(candidates)}{m.group('q')}"
+
+    html = HTML_URL_ATTR.sub(attr_repl, html)
+    html = HTML_SRCSET_ATTR.sub(srcset_repl, html)
+    return rewrite_css_urls(html, "", assets)
+
+
+# ---- Minification ----
+
+def minify_css(css: str) -> str:
+    css = CSS_COMMENT.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};,>])\s*", r"\1", css)
+    css = re.sub(r":\s+", ":", css)
+    css = css.replace(";}", "}")
+    return css.strip()
+
+
+# A "/" after one of these starts a regex literal rather than a division
+JS_KEYWORDS_BEFORE_EXPRESSION = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw", "case", "do", "else", "yield", "await",
+}
+
+
+def js_line_states(js: str) -> list[str]:
+    """Lexical state at the start of each line of js.
+
+    "code", or "template", "string" or "comment" when the line continues a
+    template literal, a backslash-continued string or a block comment. Strings,
+    regex literals and ${...} nesting are tracked so a backtick or comment
+    marker inside them is not mistaken for the real thing.
+    """
+    states = ["code"]
+    frames = [0]  # open braces per code frame; None marks a template literal
+    mode = "code"
+    quote_char = ""
+    regex_ok = True
+    i, n = 0, len(js)
+    while i < n:
+        ch = js[i]
+        nxt = js[i + 1] if i + 1 < n else ""
+        if ch == "\n":
+            # Strings and regex literals cannot span lines: resync if one was left open
+            if mode in ("line_comment", "string", "regex", "regex_class"):
+                mode = "code"
+            states.append({"template": "template", "block_comment": "comment"}.get(mode, "code"))
+        elif mode == "line_comment":
+            pass
+        elif mode == "block_comment":
+            if ch == "*" and nxt == "/":
+                mode = "code"
+                i += 1
+        elif ch == "\\" and mode != "code":
+            if nxt == "\n":
+                states.append("template" if mode == "template" else "string")
+            i += 1
+        elif mode == "string":
+            if ch == quote_char:
+                mode = "code"
+                regex_ok = False
+        elif mode == "template":
+            if ch == "`":
+                frames.pop()
+                mode = "code"
+                regex_ok = False
+            elif ch == "$" and nxt == "{":
+                frames.append(0)
+                mode = "code"
+                regex_ok = True
+                i += 1
+        elif mode == "regex_class":
+            if ch == "]":
+                mode = "regex"
+        elif mode == "regex":
+            if ch == "[":
+                mode = "regex_class"
+            elif ch == "/":
+                mode = "code"
+                regex_ok = False
+        elif ch == "/" and nxt == "/":
+            mode = "line_comment"
+        elif ch == "/" and nxt == "*":
+            mode = "block_comment"
+            i += 1
+        elif ch == "/" and regex_ok:
+            mode = "regex"
+        elif ch in "'\"":
+            mode = "string"
+            quote_char = ch
+        elif ch == "`":
+            frames.append(None)
+            mode = "template"
+        elif ch == "}" and frames[-1] == 0 and len(frames) > 1:
+            # End of a ${...} substitution
+            frames.pop()
+            mode = "template"
+        elif ch.isalnum() or ch in "_$":
+            start = i
+            while i < n and (js[i].isalnum() or js[i] in "_$"):
+                i += 1
+            regex_ok = js[start:i] in JS_KEYWORDS_BEFORE_EXPRESSION
+            continue
+        elif not ch.isspace():
+            if ch == "{":
+                frames[-1] += 1
+            elif ch == "}":
+                frames[-1] -= 1
+            regex_ok = ch not in ")]}"
+        i += 1
+    return states
+
+
+def minify_js(js: str) -> str:
+    """Conservative JS minification: drop indentation, blank lines and full-line comments.
+
+    Newlines are kept so automatic semicolon insertion is unaffected, and lines
+    inside multi-line template literals are left exactly as written.
+    """
+    lines = js.split("\n")
+    states = js_line_states(js)
+    out = []
+    for index, line in enumerate(lines):
+        state = states[index]
+        if state in ("template", "string"):
+            out.append(line)
+            continue
+        if state == "comment":
+            if "*/" not in line:
+                continue
+            line = line.split("*/", 1)[1]
+        # Whitespace at the end of the line belongs to a template literal that continues
+        continues = index + 1 < len(lines) and states[index + 1] != "code"
+        stripped = line.lstrip() if continues else line.strip()
+        if not stripped or stripped.startswith("//"):
+            continue
+        if stripped.startswith("/*") and continues and states[index + 1] == "comment":
+            continue
+        out.append(stripped)
+    return "\n".join(out)
+
+
+def minify_html(html: str) -> str:
+    pieces = []
+    pos = 0
+    for m in RAW_BLOCK.finditer(html):
+        pieces.append(collapse_markup(html[pos:m.start()]))
+        open_tag, tag, body, close_tag = m.group(1), m.group(2).lower(), m.group(3), m.group(4)
+        if tag == "style":
+            body = minify_css(body)
+        elif tag == "script" and "src=" not in open_tag.lower():
+            type_match = re.search(r"""type\s*=\s*["']?([^"'\s>]+)""", open_tag, re.IGNORECASE)
+            if (type_match.group(1).lower() if type_match else "") in JS_TYPES:
+                body = minify_js(body)
+        pieces.append(open_tag + body + close_tag)
+        pos = m.end()
+    pieces.append(collapse_markup(html[pos:]))
+    return "".join(pieces)
+
+
+def collapse_markup(markup: str) -> str:
+    markup = HTML_COMMENT.sub("", markup)
+    return re.sub(r"\s+", " ", markup)
+
+
+# ---- Build ----
+
+def build(repo_root: Path) -> int:
+    build_root = repo_root / BUILD_DIR
+    if build_root.exists():
+        shutil.rmtree(build_root)
+    (build_root / "pages").mkdir(parents=True)
+
+    asset_paths = find_assets(repo_root)
+    assets: dict[str, str] = {}
+    files: dict[str, str] = {}
+
+    # Plain files first so CSS rewriting can see their hashed names
+    css_paths = [p for p in asset_paths if p.lower().endswith(".css")]
+    for rel in asset_paths:
+        if rel in css_paths:
+            continue
+        hashed = hashed_name(rel, content_hash((repo_root / rel).read_bytes()))
+        assets[rel] = hashed
+        files[hashed] = rel
+
+    rewritten_css = 0
+    for rel in css_paths:
+        original = (repo_root / rel).read_bytes()
+        css = original.decode("utf-8", errors="surrogateescape")
+        new_css = rewrite_css_urls(css, posixpath.dirname(rel), assets)
+        if new_css == css:
+            data, source = original, rel
+        else:
+            data = new_css.encode("utf-8", errors="surrogateescape")
+            source = f"{BUILD_DIR}/static/{rel}"
+            (repo_root / source).parent.mkdir(parents=True, exist_ok=True)
+            (repo_root / source).write_bytes(data)
+            rewritten_css += 1
+        hashed = hashed_name(rel, content_hash(data))
+        assets[rel] = hashed
+        files[hashed] = source
+
+    pages = {}
+    total_before = 0
+    total_after = 0
+    for page in sorted(repo_root.glob("*.html")):
+        html = page.read_text(encoding="utf-8")
+        built = minify_html(rewrite_html_urls(html, assets))
+        out = build_root / "pages" / page.name
+        out.write_text(built, encoding="utf-8")
+        pages[page.name] = f"{BUILD_DIR}/pages/{page.name}"
+        before, after = len(html.encode("utf-8")), len(built.encode("utf-8"))
+        total_before += before
+        total_after += after
+        print(f"OK   {page.name}  {format_kb(before)} -> {format_kb(after)}")
+
+    manifest = {"version": 1, "assets": assets, "files": files, "pages": pages}
+    (build_root / MANIFEST_NAME).write_text(json.dumps(manifest, indent=1, ensure_ascii=False), encoding="utf-8")
+
+    saved = total_before - total_after
+    pct = (saved / total_before * 100) if total_before else 0
+    print("\nSummary")
+    print(f"- Fingerprinted: {len(assets)} file(s) ({rewritten_css} CSS rewritten)")
+    print(f"- Pages:         {len(pages)}  {format_kb(total_before)} -> {format_kb(total_after)} ({pct:.1f}% smaller)")
+    print(f"- Manifest:      {BUILD_DIR}/{MANIFEST_NAME}")
+    return 0
+
+
+def main() -> int:
+    repo_root = Path(__file__).resolve().parents[1]
+    os.chdir(repo_root)
+    return build(repo_root)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,243 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from smtp_sink import start_sink
+
+
+# Email path load test.
+#
+# Starts tools/smtp_sink.py in-process (optionally slow or failing), points
+# app.py at it with a fresh SQLite database, and drives
+#
+#   POST /api/submit-admission                  2 emails each (admin notice + confirmation)
+#   POST /api/admin/applications/<id>/approve   1 email each
+#   POST /api/admin/contacts/<id>/reply         1 email each
+#
+# at the given concurrency. It then waits for the outbox workers to deliver
+# everything. Reports request throughput and p50/p99 latency per endpoint,
+# delivered messages/sec, delivery lag, and retry/dead-letter counts. Exits 1
+# if a request failed or the outbox did not drain, so it can gate a release.
+#
+# Usage:
+#   python tools/email_load_test.py
+#   python tools/email_load_test.py --requests 500 --concurrency 16 --workers 4 \
+#       --latency 0.01 --connect-latency 0.2 --tempfail-rate 0.05 --reject-rate 0.01
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def format_ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}ms"
+
+
+def run_phase(clients: list, jobs: list, call) -> tuple[list[float], int, float]:
+    """Run call(client, job) for every job across one thread per client.
+
+    Returns (latencies of successful requests, failed request count, elapsed seconds).
+    """
+    remaining = iter(jobs)
+    lock = threading.Lock()
+    latencies = []
+    failures = []
+
+    def worker(client):
+        while True:
+            with lock:
+                job = next(remaining, None)
+            if job is None:
+                return
+            started = time.perf_counter()
+            response = call(client, job)
+            elapsed = time.perf_counter() - started
+            with lock:
+                if response.status_code == 200:
+                    latencies.append(elapsed)
+                else:
+                    failures.append((response.status_code, response.get_data(as_text=True)[:200]))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    for status, body in failures[:3]:
+        print(f"  FAIL {status}: {body}")
+    return latencies, len(failures), elapsed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the admission/approval/reply email paths")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent clients")
+    parser.add_argument("--workers", type=int, default=2, help="outbox worker threads (EMAIL_OUTBOX_WORKERS)")
+    parser.add_argument("--batch", type=int, default=20, help="messages claimed per worker batch")
+    parser.add_argument("--backoff", type=float, default=0.5, help="first retry delay in seconds")
+    parser.add_argument("--max-attempts", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="sink: seconds per SMTP command")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="sink: seconds per session")
+    parser.add_argument("--tempfail-rate", type=float, default=0.0, help="sink: fraction refused with 451")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="sink: fraction refused with 550")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="sink: fraction of dropped connections")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--drain-timeout", type=float, default=120, help="seconds to wait for delivery")
+    parser.add_argument("--database-url", default=None, help="default: a new SQLite file in a temp dir")
+    args = parser.parse_args()
+
+    sink = start_sink(
+        latency=args.latency, connect_latency=args.connect_latency,
+        tempfail_rate=args.tempfail_rate, reject_rate=args.reject_rate, drop_rate=args.drop_rate, seed=args.seed,
+    )
+    workdir = tempfile.mkdtemp(prefix="viu-email-load-")
+
+    # Configure app.py before importing it (the .env file does not override these)
+    os.environ.update({
+        "DATABASE_URL": args.database_url or f"sqlite:///{workdir}/load.db",
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(sink.server_address[1]),
+        "MAIL_USE_TLS": "False",
+        "MAIL_USE_SSL": "False",
+        "MAIL_USERNAME": "load@example.com",
+        "MAIL_PASSWORD": "load",
+        "ADMIN_EMAIL": "admin@example.com",
+        "ADMIN_USERNAME": "load-admin",
+        "ADMIN_PASSWORD": "load-password",
+        "ADMIN_CACHE_PATH": f"{workdir}/admin-cache.sqlite3",
+        "EMAIL_OUTBOX_WORKERS": str(args.workers),
+        "EMAIL_OUTBOX_BATCH": str(args.batch),
+        "EMAIL_OUTBOX_POLL_INTERVAL": "0.2",
+        "EMAIL_OUTBOX_BACKOFF_BASE": str(args.backoff),
+        "EMAIL_OUTBOX_MAX_ATTEMPTS": str(args.max_attempts),
+        "SMTP_POOL_SIZE": str(args.workers),
+    })
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    import app as viu
+
+    viu.init_db()
+    n = args.requests
+    print(f"{n} request(s) per endpoint, concurrency {args.concurrency}, {args.workers} outbox worker(s)")
+    print(f"SMTP sink: {format_ms(args.connect_latency)}/session, {format_ms(args.latency)}/command, "
+          f"tempfail {args.tempfail_rate:.0%}, reject {args.reject_rate:.0%}, drop {args.drop_rate:.0%}")
+
+    # Contacts to reply to are created directly; only the replies are measured
+    with viu.app.app_context():
+        contacts = [
+            viu.ContactSubmission(name=f"Load {i}", email=f"contact{i}@example.com", subject="سوال", message="پیغام")
+            for i in range(n)
+        ]
+        viu.db.session.add_all(contacts)
+        viu.bump_counters(viu.contact_counts("new", n))
+        viu.db.session.commit()
+        contact_ids = [contact.id for contact in contacts]
+
+    clients = []
+    for _ in range(args.concurrency):
+        client = viu.app.test_client()
+        login = client.post("/api/admin/login", json={"username": "load-admin", "password": "load-password"})
+        if login.status_code != 200:
+            print(f"Admin login failed: {login.status_code} {login.get_data(as_text=True)[:200]}")
+            return 1
+        clients.append(client)
+
+    application_ids = []
+    ids_lock = threading.Lock()
+
+    def submit(client, i):
+        response = client.post("/api/submit-admission", json={
+            "firstName": "طالب",
+            "lastName": f"علم {i}",
+            "fatherName": "والد",
+            "cnic": f"{35200 + i // 10_000_000:05d}-{i % 10_000_000:07d}-1",
+            "email": f"student{i}@example.com",
+            "phone": "+923001234567",
+            "dateOfBirth": "2000-01-01",
+            "gender": "male",
+            "address": "Lahore",
+            "education": "matric",
+            "course": "quran",
+        })
+        if response.status_code == 200:
+            with ids_lock:
+                application_ids.append(response.get_json()["application_id"])
+        return response
+
+    phases = {}
+    load_started = time.perf_counter()
+    phases["submit_admission"] = run_phase(clients, list(range(n)), submit)
+    phases["approve_application"] = run_phase(
+        clients, list(application_ids),
+        lambda client, app_id: client.post(f"/api/admin/applications/{app_id}/approve"),
+    )
+    phases["reply_to_contact"] = run_phase(
+        clients, contact_ids,
+        lambda client, contact_id: client.post(
+            f"/api/admin/contacts/{contact_id}/reply", json={"reply_message": "آپ کے سوال کا جواب"}
+        ),
+    )
+    load_finished = time.perf_counter()
+
+    # Wait for the outbox to empty: nothing pending (including retries not yet due)
+    with viu.app.app_context():
+        deadline = time.perf_counter() + args.drain_timeout
+        while True:
+            outbox = viu.email_outbox.stats()
+            if outbox["pending"] == 0 or time.perf_counter() > deadline:
+                break
+            time.sleep(0.1)
+        drained = time.perf_counter()
+
+        table = viu.EmailOutbox.__table__
+        attempts = viu.db.session.execute(
+            viu.db.select(table.c.status, table.c.attempts, viu.db.func.count())
+            .group_by(table.c.status, table.c.attempts).order_by(table.c.status, table.c.attempts)
+        ).all()
+        lags = [
+            (sent_at - created_at).total_seconds()
+            for created_at, sent_at in viu.db.session.execute(
+                viu.db.select(table.c.created_at, table.c.sent_at).where(table.c.status == "sent")
+            )
+        ]
+        outbox = viu.email_outbox.stats()
+
+    print("\nRequests")
+    failed_total = 0
+    for name, (latencies, failed, elapsed) in phases.items():
+        failed_total += failed
+        rate = len(latencies) / elapsed if elapsed else 0.0
+        print(f"- {name:<20} {len(latencies):5d} ok, {failed} failed  {rate:7.1f} req/s  "
+              f"p50 {format_ms(percentile(latencies, 0.5))}  p99 {format_ms(percentile(latencies, 0.99))}  "
+              f"max {format_ms(max(latencies, default=0.0))}")
+
+    delivered = outbox["sent"]
+    total = drained - load_started
+    print("\nEmail")
+    print(f"- Delivered:  {delivered} in {total:.2f}s ({delivered / total:.1f} msg/s), "
+          f"outbox empty {drained - load_finished:.2f}s after the last request")
+    print(f"- Pending:    {outbox['pending']}   Dead: {outbox['dead']}")
+    print(f"- Lag:        p50 {format_ms(percentile(lags, 0.5))}  p99 {format_ms(percentile(lags, 0.99))}  "
+          f"(queued -> accepted by the server)")
+    print("- Attempts:   " + ", ".join(f"{status} after {tries}: {count}" for status, tries, count in attempts))
+    print(f"- Workers:    {outbox['workers']}")
+    print(f"- SMTP pool:  {viu.smtp_pool.stats()}")
+    print(f"- SMTP sink:  {sink.stats.snapshot()}")
+
+    sink.shutdown()
+    if failed_total or outbox["pending"]:
+        print("\nFAILED: " + ("requests failed" if failed_total else "outbox did not drain in time"))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,14 +1,37 @@
+import hashlib
+import json
 import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from PIL import Image
+from urllib.parse import quote
 
+from PIL import Image, ImageOps, features
 
-def format_mb(num_bytes: int) -> str:
-    return f"{num_bytes / (1024 * 1024):.2f}MB"
 
+# Responsive image generator.
+#
+# For every source image under SOURCE_DIRS this writes several widths in
+# WebP, AVIF (when Pillow has AVIF support) and the source's own format to
+# OUTPUT_DIR, leaving the originals untouched. Work runs on a process pool
+# across all cores, and sources whose content hash (or size+mtime) matches the
+# previous run are skipped, so reruns are nearly instant.
+#
+# OUTPUT_DIR/manifest.json lists every variant and ready-made srcset strings;
+# app.py reads it to pick the best variant per request.
+#
+# Usage:
+#   python tools/optimize_images.py
+
+SOURCE_DIRS = ["assets/img", "Images", "Teacher Data"]
+SOURCE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+OUTPUT_DIR = "assets/img/_responsive"
+MANIFEST_NAME = "manifest.json"
+SKIP_PARTS = {"_originals", "_responsive"}
+
+# Candidate widths; each image also gets one variant at its (capped) full width
+WIDTHS = (480, 768, 1200, 1600, 1920)
 
 # Tuned for typical full-width backgrounds + card images on a Bootstrap site.
-# We keep filenames and extensions the same (overwrite in-place) but back up originals.
 DEFAULT_MAX_EDGE = 1920
 MAX_EDGE_OVERRIDES = {
     # Very large hero backgrounds
@@ -37,83 +60,206 @@ MAX_EDGE_OVERRIDES = {
     "Doraarab.jpg": 1400,
 }
 
-# JPEG output settings
+# Output settings
 JPEG_QUALITY = 78
+WEBP_QUALITY = 75
+AVIF_QUALITY = 50
+
+FORMATS = ["avif", "webp"] if features.check("avif") else ["webp"]
+FORMAT_EXTENSIONS = {"avif": ".avif", "webp": ".webp", "jpeg": ".jpg", "png": ".png"}
+
+# Changing any output setting invalidates every previous result; a changed
+# MAX_EDGE_OVERRIDES entry only invalidates that image (see process_image)
+SETTINGS_KEY = json.dumps([WIDTHS, DEFAULT_MAX_EDGE, JPEG_QUALITY, WEBP_QUALITY, AVIF_QUALITY, FORMATS])
+
+
+def format_mb(num_bytes: int) -> str:
+    return f"{num_bytes / (1024 * 1024):.2f}MB"
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def target_widths(width: int, max_edge: int) -> list[int]:
+    full = min(width, max_edge)
+    return sorted({w for w in WIDTHS if w < full} | {full})
+
+
+def source_format(path: Path) -> str:
+    return {".png": "png", ".webp": "webp"}.get(path.suffix.lower(), "jpeg")
 
 
-def optimize_jpeg(src_path: Path, backup_root: Path) -> tuple[int, int]:
-    """Return (before_bytes, after_bytes)."""
-    before_bytes = src_path.stat().st_size
+def variant_path(rel: str, width: int, fmt: str) -> str:
+    # Keep the source extension: foo.jpg and foo.png must not share foo-480w.webp
+    return f"{OUTPUT_DIR}/{rel}-{width}w{FORMAT_EXTENSIONS[fmt]}"
 
-    rel = src_path.relative_to(src_path.parents[2]) if len(src_path.parents) >= 2 else src_path.name
-    backup_path = backup_root / rel
-    backup_path.parent.mkdir(parents=True, exist_ok=True)
-    if not backup_path.exists():
-        backup_path.write_bytes(src_path.read_bytes())
 
-    with Image.open(src_path) as im:
-        im = im.convert("RGB")
-        max_edge = MAX_EDGE_OVERRIDES.get(src_path.name, DEFAULT_MAX_EDGE)
-        w, h = im.size
-        scale = min(1.0, max_edge / max(w, h))
-        if scale < 1.0:
-            new_size = (max(1, int(w * scale)), max(1, int(h * scale)))
-            im = im.resize(new_size, Image.Resampling.LANCZOS)
+def save_variant(im: Image.Image, dest: Path, fmt: str) -> None:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(dest.name + ".tmp")
+    if fmt == "jpeg":
+        im.convert("RGB").save(tmp_path, format="JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    elif fmt == "png":
+        im.save(tmp_path, format="PNG", optimize=True)
+    elif fmt == "webp":
+        im.save(tmp_path, format="WEBP", quality=WEBP_QUALITY, method=5)
+    else:
+        im.save(tmp_path, format="AVIF", quality=AVIF_QUALITY)
+    os.replace(tmp_path, dest)
 
-        tmp_path = src_path.with_suffix(src_path.suffix + ".tmp")
-        im.save(
-            tmp_path,
-            format="JPEG",
-            quality=JPEG_QUALITY,
-            optimize=True,
-            progressive=True,
-        )
 
-    os.replace(tmp_path, src_path)
-    after_bytes = src_path.stat().st_size
-    return before_bytes, after_bytes
+def process_image(repo_root: str, rel: str, previous: dict | None) -> tuple[str, dict, bool]:
+    """Return (rel, manifest entry, changed). Runs in a worker process."""
+    root = Path(repo_root)
+    src = root / rel
+    st = src.stat()
+    max_edge = MAX_EDGE_OVERRIDES.get(src.name, DEFAULT_MAX_EDGE)
+    # A WebP source's own format is already in FORMATS
+    formats = list(dict.fromkeys(FORMATS + [source_format(src)]))
+
+    if (previous and previous.get("settings") == SETTINGS_KEY and previous.get("max_edge") == max_edge
+            and {v["format"] for v in previous["variants"]} == set(formats)):
+        outputs_exist = all((root / v["path"]).exists() for v in previous["variants"])
+        if outputs_exist and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+            return rel, previous, False
+        digest = file_hash(src)
+        if outputs_exist and previous.get("hash") == digest:
+            return rel, dict(previous, size=st.st_size, mtime_ns=st.st_mtime_ns), False
+    else:
+        digest = file_hash(src)
+
+    variants = []
+    with Image.open(src) as opened:
+        im = ImageOps.exif_transpose(opened)
+        if im.mode not in ("RGB", "RGBA"):
+            im = im.convert("RGBA" if "transparency" in im.info or im.mode in ("LA", "PA") else "RGB")
+        width, height = im.size
+        for w in target_widths(width, max_edge):
+            h = max(1, round(height * w / width))
+            resized = im if w == width else im.resize((w, h), Image.Resampling.LANCZOS)
+            for fmt in formats:
+                out_rel = variant_path(rel, w, fmt)
+                save_variant(resized, root / out_rel, fmt)
+                variants.append({
+                    "path": out_rel,
+                    "width": w,
+                    "height": h,
+                    "format": fmt,
+                    "bytes": (root / out_rel).stat().st_size,
+                })
+
+    entry = {
+        "hash": digest,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "settings": SETTINGS_KEY,
+        "max_edge": max_edge,
+        "width": width,
+        "height": height,
+        "bytes": st.st_size,
+        "variants": variants,
+        "srcset": build_srcsets(variants),
+    }
+    return rel, entry, True
+
+
+def build_srcsets(variants: list[dict]) -> dict[str, str]:
+    srcsets = {}
+    for fmt in {v["format"] for v in variants}:
+        candidates = sorted((v for v in variants if v["format"] == fmt), key=lambda v: v["width"])
+        srcsets[fmt] = ", ".join(f"/{quote(v['path'])} {v['width']}w" for v in candidates)
+    return srcsets
+
+
+def find_sources(repo_root: Path) -> list[str]:
+    sources = []
+    for name in SOURCE_DIRS:
+        root = repo_root / name
+        if not root.is_dir():
+            continue
+        for p in sorted(root.rglob("*")):
+            if p.is_file() and p.suffix.lower() in SOURCE_EXTENSIONS and not SKIP_PARTS.intersection(p.parts):
+                sources.append(p.relative_to(repo_root).as_posix())
+    return sources
+
+
+def load_manifest(path: Path) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("images", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def remove_stale_outputs(repo_root: Path, old: dict, new: dict) -> int:
+    keep = {v["path"] for entry in new.values() for v in entry["variants"]}
+    removed = 0
+    for entry in old.values():
+        for v in entry.get("variants", []):
+            if v["path"] not in keep and (repo_root / v["path"]).exists():
+                (repo_root / v["path"]).unlink()
+                removed += 1
+    return removed
 
 
 def main() -> int:
     repo_root = Path(__file__).resolve().parents[1]
-    img_dir = repo_root / "assets" / "img"
-    if not img_dir.exists():
-        print(f"ERROR: image directory not found: {img_dir}")
-        return 2
+    manifest_path = repo_root / OUTPUT_DIR / MANIFEST_NAME
+    previous = load_manifest(manifest_path)
 
-    backup_root = repo_root / "assets" / "img" / "_originals"
-
-    jpgs = sorted([p for p in img_dir.rglob("*.jpg") if "_originals" not in p.parts])
-    if not jpgs:
-        print("No .jpg images found to optimize.")
+    sources = find_sources(repo_root)
+    if not sources:
+        print("No images found to optimize.")
         return 0
 
-    total_before = 0
-    total_after = 0
-    changed = 0
+    workers = os.cpu_count() or 1
+    print(f"Processing {len(sources)} image(s) from {', '.join(SOURCE_DIRS)} on {workers} worker(s)...")
+    print(f"Formats: {', '.join(FORMATS)} + original")
 
-    print(f"Optimizing {len(jpgs)} JPG(s) under {img_dir}...")
+    images = {}
+    changed = 0
+    failed = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(process_image, str(repo_root), rel, previous.get(rel)): rel for rel in sources}
+        for future in as_completed(futures):
+            rel = futures[future]
+            try:
+                rel, entry, was_changed = future.result()
+            except Exception as e:
+                print(f"SKIP {rel}: {e}")
+                failed += 1
+                if rel in previous:
+                    images[rel] = previous[rel]
+                continue
+            images[rel] = entry
+            if was_changed:
+                changed += 1
+                smallest = min(v["bytes"] for v in entry["variants"])
+                print(f"OK   {rel}  {format_mb(entry['bytes'])} -> {len(entry['variants'])} variant(s), smallest {format_mb(smallest)}")
 
-    for p in jpgs:
-        try:
-            before, after = optimize_jpeg(p, backup_root)
-        except Exception as e:
-            print(f"SKIP {p.relative_to(repo_root)}: {e}")
-            continue
+    removed = remove_stale_outputs(repo_root, previous, images)
 
-        total_before += before
-        total_after += after
-        if after != before:
-            changed += 1
-        print(f"OK   {p.relative_to(repo_root)}  {format_mb(before)} -> {format_mb(after)}")
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_name(manifest_path.name + ".tmp")
+    tmp_path.write_text(
+        json.dumps({"version": 1, "images": dict(sorted(images.items()))}, indent=1, ensure_ascii=False),
+        encoding="utf-8",
+    )
+    os.replace(tmp_path, manifest_path)
 
-    savings = total_before - total_after
-    pct = (savings / total_before * 100) if total_before else 0
+    total_source = sum(e["bytes"] for e in images.values())
+    total_variants = sum(v["bytes"] for e in images.values() for v in e["variants"])
     print("\nSummary")
-    print(f"- Changed: {changed}/{len(jpgs)}")
-    print(f"- Total:   {format_mb(total_before)} -> {format_mb(total_after)}")
-    print(f"- Saved:   {format_mb(savings)} ({pct:.1f}%)")
-    print(f"- Backup:  {backup_root.relative_to(repo_root)}")
+    print(f"- Regenerated: {changed}/{len(sources)} ({len(sources) - changed - failed} unchanged, {failed} failed)")
+    print(f"- Sources:     {format_mb(total_source)}")
+    print(f"- Variants:    {format_mb(total_variants)} across all widths and formats")
+    print(f"- Removed:     {removed} stale variant(s)")
+    print(f"- Manifest:    {manifest_path.relative_to(repo_root)}")
 
     return 0
 
@@ -0,0 +1,163 @@
+import gzip
+import os
+import sys
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Writes .gz (and .br when the brotli package is installed) sidecars next to
+# every compressible file the site serves. app.py picks the best sidecar per
+# request from Accept-Encoding and ignores sidecars older than their source.
+#
+# Usage:
+#   python tools/precompress.py          # create/refresh sidecars
+#   python tools/precompress.py --clean  # remove all sidecars
+
+# Same list as COMPRESSIBLE_EXTENSIONS in app.py (WOFF/WOFF2 are already compressed)
+COMPRESSIBLE_EXTENSIONS = {
+    ".html", ".css", ".js", ".mjs", ".json", ".map", ".svg", ".txt", ".xml",
+    ".ttf", ".otf", ".eot", ".ico",
+}
+
+# Directories served by app.py, plus the top-level HTML pages
+STATIC_DIRS = [
+    "assets",
+    "static",
+    "mehr-nastaliq-web-font-v2.0",
+    "mehr nastaliq web font v 2.0",
+    "jameel-noori-nastaleeq",
+    "build",
+]
+
+SKIP_PARTS = {"_originals", "scss"}
+
+# Files smaller than this gain nothing from compression
+MIN_BYTES = 512
+
+# Keep a sidecar only if it saves at least this fraction of the original
+MIN_SAVING = 0.05
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+
+def format_kb(num_bytes: int) -> str:
+    return f"{num_bytes / 1024:.1f}KB"
+
+
+def find_sources(repo_root: Path) -> list[Path]:
+    sources = sorted(repo_root.glob("*.html"))
+    for name in STATIC_DIRS:
+        root = repo_root / name
+        if not root.is_dir():
+            continue
+        for p in sorted(root.rglob("*")):
+            if (
+                p.is_file()
+                and p.suffix.lower() in COMPRESSIBLE_EXTENSIONS
+                and not SKIP_PARTS.intersection(p.parts)
+            ):
+                sources.append(p)
+    return sources
+
+
+def write_sidecar(src: Path, data: bytes, suffix: str, encoded: bytes) -> int:
+    """Write one sidecar atomically; return its size, or 0 if not worth keeping."""
+    sidecar = src.with_name(src.name + suffix)
+    if len(encoded) > len(data) * (1 - MIN_SAVING):
+        if sidecar.exists():
+            sidecar.unlink()
+        return 0
+
+    tmp_path = sidecar.with_name(sidecar.name + ".tmp")
+    tmp_path.write_bytes(encoded)
+    os.replace(tmp_path, sidecar)
+    return len(encoded)
+
+
+def is_fresh(src: Path, suffix: str) -> bool:
+    sidecar = src.with_name(src.name + suffix)
+    try:
+        return sidecar.stat().st_mtime_ns >= src.stat().st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def compress_file(src: Path) -> tuple[int, int, int]:
+    """Return (original_bytes, gzip_bytes, brotli_bytes); 0 means no sidecar written."""
+    data = src.read_bytes()
+    if len(data) < MIN_BYTES:
+        return len(data), 0, 0
+
+    gz_bytes = 0
+    if not is_fresh(src, ".gz"):
+        gz_bytes = write_sidecar(src, data, ".gz", gzip.compress(data, GZIP_LEVEL, mtime=0))
+
+    br_bytes = 0
+    if brotli is not None and not is_fresh(src, ".br"):
+        br_bytes = write_sidecar(src, data, ".br", brotli.compress(data, quality=BROTLI_QUALITY))
+
+    return len(data), gz_bytes, br_bytes
+
+
+def clean(sources: list[Path]) -> int:
+    removed = 0
+    for src in sources:
+        for suffix in (".gz", ".br"):
+            sidecar = src.with_name(src.name + suffix)
+            if sidecar.exists():
+                sidecar.unlink()
+                removed += 1
+    return removed
+
+
+def main() -> int:
+    repo_root = Path(__file__).resolve().parents[1]
+    sources = find_sources(repo_root)
+
+    if "--clean" in sys.argv[1:]:
+        print(f"Removed {clean(sources)} sidecar(s)")
+        return 0
+
+    if brotli is None:
+        print("brotli package not installed; writing .gz sidecars only (pip install brotli)")
+
+    print(f"Precompressing {len(sources)} file(s)...")
+    total_before = 0
+    total_gz = 0
+    total_br = 0
+    written = 0
+
+    for p in sources:
+        try:
+            before, gz_bytes, br_bytes = compress_file(p)
+        except OSError as e:
+            print(f"SKIP {p.relative_to(repo_root)}: {e}")
+            continue
+
+        if not gz_bytes and not br_bytes:
+            continue
+        written += 1
+        total_before += before
+        total_gz += gz_bytes
+        total_br += br_bytes
+        parts = [f"gz {format_kb(gz_bytes)}" if gz_bytes else None, f"br {format_kb(br_bytes)}" if br_bytes else None]
+        print(f"OK   {p.relative_to(repo_root)}  {format_kb(before)} -> {', '.join(x for x in parts if x)}")
+
+    print("\nSummary")
+    print(f"- Updated: {written}/{len(sources)} (others fresh, tiny or incompressible)")
+    if written:
+        print(f"- Source:  {format_kb(total_before)}")
+        print(f"- Gzip:    {format_kb(total_gz)}")
+        if brotli is not None:
+            print(f"- Brotli:  {format_kb(total_br)}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
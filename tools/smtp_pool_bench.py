@@ -0,0 +1,122 @@
+import argparse
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from smtp_sink import start_sink
+
+
+# SMTP connection pool benchmark.
+#
+# Sends the same messages two ways against tools/smtp_sink.py (started
+# in-process with a simulated per-session handshake cost):
+#
+#   per-message - Flask-Mail's mail.send(), one new session per message
+#   pooled      - app.py's SMTPConnectionPool, the path the outbox workers use
+#
+# and reports messages/sec and how many sessions and logins each needed.
+#
+# Usage:
+#   python tools/smtp_pool_bench.py
+#   python tools/smtp_pool_bench.py --messages 1000 --threads 8 --connect-latency 0.2
+
+
+def run_threads(threads: int, count: int, send) -> float:
+    """Call send(i) for i in range(count) across threads; return elapsed seconds."""
+    next_index = iter(range(count))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            send(i)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark per-message SMTP sessions against the pool")
+    parser.add_argument("--messages", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--connect-latency", type=float, default=0.1, help="simulated handshake seconds per session")
+    parser.add_argument("--latency", type=float, default=0.002, help="simulated seconds per SMTP command")
+    parser.add_argument("--max-messages", type=int, default=100, help="pool: messages per session before recycling")
+    args = parser.parse_args()
+
+    sink = start_sink(latency=args.latency, connect_latency=args.connect_latency)
+    port = sink.server_address[1]
+
+    # Point app.py at the sink before importing it (the .env file does not override these)
+    os.environ.update({
+        "MAIL_SERVER": "127.0.0.1",
+        "MAIL_PORT": str(port),
+        "MAIL_USE_TLS": "False",
+        "MAIL_USE_SSL": "False",
+        "MAIL_USERNAME": "bench@example.com",
+        "MAIL_PASSWORD": "bench",
+        "DATABASE_URL": "sqlite://",
+        "EMAIL_OUTBOX_WORKERS": "0",
+    })
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+    from flask_mail import Message
+    import app as viu
+
+    def message(i: int) -> Message:
+        return Message(
+            subject=f"Benchmark {i}",
+            sender="bench@example.com",
+            recipients=[f"student{i}@example.com"],
+            body="السلام علیکم\n\n" + "Benchmark message body.\n" * 20,
+        )
+
+    print(f"{args.messages} message(s), {args.threads} thread(s), "
+          f"{args.connect_latency * 1000:.0f}ms per session, {args.latency * 1000:.1f}ms per command")
+
+    results = {}
+
+    def per_message(i: int) -> None:
+        with viu.app.app_context():
+            viu.mail.send(message(i))
+
+    before = sink.stats.snapshot()
+    elapsed = run_threads(args.threads, args.messages, per_message)
+    after = sink.stats.snapshot()
+    results["per-message"] = (elapsed, after["sessions"] - before["sessions"], after["logins"] - before["logins"])
+
+    pool = viu.SMTPConnectionPool(args.threads, args.max_messages, max_idle=60, timeout=30)
+
+    def pooled(i: int) -> None:
+        with viu.app.app_context():
+            pool.send(message(i))
+
+    before = sink.stats.snapshot()
+    elapsed = run_threads(args.threads, args.messages, pooled)
+    pool.close()
+    after = sink.stats.snapshot()
+    results["pooled"] = (elapsed, after["sessions"] - before["sessions"], after["logins"] - before["logins"])
+
+    print("\nSummary")
+    for name, (elapsed, sessions, logins) in results.items():
+        print(f"- {name + ':':<13} {args.messages / elapsed:8.1f} msg/s  {elapsed:6.2f}s  "
+              f"{sessions} session(s), {logins} login(s)")
+    speedup = results["per-message"][0] / results["pooled"][0]
+    print(f"- Speedup:      {speedup:.1f}x")
+    print(f"- Pool:         {pool.stats()}")
+
+    sink.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
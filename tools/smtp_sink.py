@@ -0,0 +1,190 @@
+import argparse
+import random
+import socketserver
+import threading
+import time
+
+
+# Local SMTP stand-in for benchmarks and load tests.
+#
+# Accepts any login and any message, throws the message away and counts it.
+# Optional delays imitate a remote server: --connect-latency is paid once per
+# session (the TCP/STARTTLS/login round trips of a real server), --latency on
+# every command. --max-messages closes a session with 421 after that many
+# messages, like providers that cap messages per connection.
+#
+# Failure injection, each a fraction of messages:
+#   --tempfail-rate  recipient refused with 451 (retry later)
+#   --reject-rate    recipient refused with 550 (permanent)
+#   --drop-rate      connection dropped without a reply at MAIL FROM
+#
+# Other tools import start_sink() to run it in-process.
+#
+# Usage:
+#   python tools/smtp_sink.py --port 2525 --connect-latency 0.1 --latency 0.005
+#   MAIL_SERVER=127.0.0.1 MAIL_PORT=2525 MAIL_USE_TLS=False python app.py
+
+
+class SinkStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sessions = 0
+        self.logins = 0
+        self.messages = 0
+        self.tempfailed = 0
+        self.rejected = 0
+        self.dropped = 0
+
+    def add(self, name: str, count: int = 1) -> None:
+        with self.lock:
+            setattr(self, name, getattr(self, name) + count)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "sessions": self.sessions,
+                "logins": self.logins,
+                "messages": self.messages,
+                "tempfailed": self.tempfailed,
+                "rejected": self.rejected,
+                "dropped": self.dropped,
+            }
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    def reply(self, line: str) -> None:
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def pause(self) -> None:
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def handle(self) -> None:
+        sink = self.server
+        sink.stats.add("sessions")
+        if sink.connect_latency:
+            time.sleep(sink.connect_latency)
+        self.reply("220 smtp-sink ready")
+        messages = 0
+
+        while True:
+            line = self.rfile.readline(4096)
+            if not line:
+                return
+            command = line.decode("utf-8", errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            self.pause()
+
+            if verb == "EHLO":
+                self.wfile.write(b"250-smtp-sink\r\n250-AUTH PLAIN\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n")
+            elif verb == "HELO":
+                self.reply("250 smtp-sink")
+            elif verb == "AUTH":
+                sink.stats.add("logins")
+                self.reply("235 2.7.0 Authentication successful")
+            elif verb == "MAIL":
+                if sink.max_messages and messages >= sink.max_messages:
+                    self.reply("421 4.7.0 Too many messages for this session, closing")
+                    return
+                if sink.roll(sink.drop_rate):
+                    sink.stats.add("dropped")
+                    return
+                self.reply("250 2.1.0 OK")
+            elif verb == "RCPT":
+                if sink.roll(sink.tempfail_rate):
+                    sink.stats.add("tempfailed")
+                    self.reply("451 4.3.0 Temporary failure, try again later")
+                elif sink.roll(sink.reject_rate):
+                    sink.stats.add("rejected")
+                    self.reply("550 5.1.1 Mailbox unavailable")
+                else:
+                    self.reply("250 2.1.5 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                while True:
+                    data = self.rfile.readline(65536)
+                    if not data or data == b".\r\n":
+                        break
+                messages += 1
+                sink.stats.add("messages")
+                self.reply("250 2.0.0 Queued")
+            elif verb == "QUIT":
+                self.reply("221 2.0.0 Bye")
+                return
+            elif verb in ("RSET", "NOOP"):
+                self.reply("250 2.0.0 OK")
+            else:
+                self.reply("502 5.5.2 Command not implemented")
+
+
+class SMTPSink(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self, address, latency: float = 0.0, connect_latency: float = 0.0, max_messages: int = 0,
+        tempfail_rate: float = 0.0, reject_rate: float = 0.0, drop_rate: float = 0.0, seed: int | None = None,
+    ):
+        super().__init__(address, SMTPSinkHandler)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.max_messages = max_messages
+        self.tempfail_rate = tempfail_rate
+        self.reject_rate = reject_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = SinkStats()
+
+    def roll(self, rate: float) -> bool:
+        if not rate:
+            return False
+        with self.random_lock:
+            return self.random.random() < rate
+
+
+def start_sink(host: str = "127.0.0.1", port: int = 0, **options) -> SMTPSink:
+    """Serve in a background thread; port 0 picks a free port (see sink.server_address)."""
+    sink = SMTPSink((host, port), **options)
+    threading.Thread(target=sink.serve_forever, name="smtp-sink", daemon=True).start()
+    return sink
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local SMTP sink that accepts and discards mail")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2525)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every command")
+    parser.add_argument("--connect-latency", type=float, default=0.0, help="seconds added once per session")
+    parser.add_argument("--max-messages", type=int, default=0, help="messages per session before 421 (0 = no limit)")
+    parser.add_argument("--tempfail-rate", type=float, default=0.0, help="fraction of recipients refused with 451")
+    parser.add_argument("--reject-rate", type=float, default=0.0, help="fraction of recipients refused with 550")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of messages whose connection is dropped")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for repeatable failures")
+    args = parser.parse_args()
+
+    sink = start_sink(
+        args.host, args.port,
+        latency=args.latency, connect_latency=args.connect_latency, max_messages=args.max_messages,
+        tempfail_rate=args.tempfail_rate, reject_rate=args.reject_rate, drop_rate=args.drop_rate, seed=args.seed,
+    )
+    print(f"SMTP sink listening on {args.host}:{sink.server_address[1]}, Ctrl+C to stop")
+    last = None
+    try:
+        while True:
+            time.sleep(5)
+            current = sink.stats.snapshot()
+            if current != last:
+                print(", ".join(f"{name} {value}" for name, value in current.items()))
+                last = current
+    except KeyboardInterrupt:
+        pass
+    sink.shutdown()
+    print("\nSummary")
+    for name, value in sink.stats.snapshot().items():
+        print(f"- {name.capitalize() + ':':<12} {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
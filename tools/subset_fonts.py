@@ -0,0 +1,209 @@
+import hashlib
+import html
+import os
+from pathlib import Path
+
+from fontTools import subset
+from fontTools.ttLib import TTFont
+
+
+# Urdu/Arabic web font subsetter.
+#
+# Scans every page (and the scripts that inject text) for the characters the
+# site actually uses, then writes WOFF2 subsets of each web font split by
+# unicode-range, plus assets/css/fonts.css with the matching @font-face rules:
+#
+#   latin   - the font's Latin/punctuation glyphs (small, always complete)
+#   urdu    - the whole Arabic and Arabic Supplement blocks, plus any other
+#             Arabic-script characters found in the pages
+#   arabic  - Extended-A and the presentation forms, fetched only if a page
+#             needs them
+#
+# Joining and mark positioning only work within one font file, so every base
+# letter and diacritic a user can type goes in the urdu subset, not just the
+# ones the pages use: names and messages typed on an Arabic keyboard (heh,
+# alef with hamza, ...) would otherwise render unjoined.
+#
+# The browser downloads a subset only when the page contains a character in
+# its unicode-range, so first render needs just latin + urdu. Fonts whose
+# source file is missing keep a plain @font-face pointing at the original.
+#
+# Requires: pip install fonttools brotli
+#
+# Usage:
+#   python tools/subset_fonts.py
+
+# (family, slug, source font)
+FONTS = [
+    ("Mehr Nastaliq Web", "mehr-nastaliq-web", "mehr-nastaliq-web-font-v2.0/Mehr_Nastaliq_Web-v.2.0.ttf"),
+    (
+        "Jameel Noori Nastaleeq",
+        "jameel-noori-nastaleeq",
+        "jameel-noori-nastaleeq/Jameel-Noori-Nastaleeq-Regular/Jameel-Noori-Nastaleeq-Regular.ttf",
+    ),
+]
+
+# Files whose text is rendered with these fonts
+SCAN_GLOBS = ["*.html", "assets/js/*.js", "static/js/*.js"]
+
+OUTPUT_DIR = "assets/fonts/subset"
+CSS_PATH = "assets/css/fonts.css"
+
+# The urdu subset always holds these blocks whole (see above)
+URDU_RANGES = [
+    (0x0600, 0x06FF),  # Arabic
+    (0x0750, 0x077F),  # Arabic Supplement
+]
+ARABIC_RANGES = URDU_RANGES + [
+    (0x08A0, 0x08FF),  # Arabic Extended-A
+    (0xFB50, 0xFDFF),  # Presentation Forms-A
+    (0xFE70, 0xFEFF),  # Presentation Forms-B
+]
+
+# Characters every Urdu page needs even if the scan misses them
+URDU_ALWAYS = {
+    0x200C, 0x200D, 0x200E, 0x200F,  # ZWNJ, ZWJ, LRM, RLM
+}
+
+for lo, hi in URDU_RANGES:
+    URDU_ALWAYS.update(range(lo, hi + 1))
+
+FONT_FACE = """@font-face {{
+  font-family: "{family}";
+  src: {src};
+  font-weight: normal;
+  font-style: normal;
+  font-display: swap;{range}
+}}
+"""
+
+
+def format_kb(num_bytes: int) -> str:
+    return f"{num_bytes / 1024:.1f}KB"
+
+
+def is_arabic(cp: int) -> bool:
+    return cp in URDU_ALWAYS or any(lo <= cp <= hi for lo, hi in ARABIC_RANGES)
+
+
+def used_codepoints(repo_root: Path) -> set[int]:
+    used = set()
+    for pattern in SCAN_GLOBS:
+        for p in sorted(repo_root.glob(pattern)):
+            text = html.unescape(p.read_text(encoding="utf-8", errors="ignore"))
+            used.update(ord(ch) for ch in text)
+    return used
+
+
+def unicode_range(codepoints: set[int]) -> str:
+    """Compress codepoints into a unicode-range value (U+600-6FF, U+2026, ...)."""
+    parts = []
+    run_start = prev = None
+    for cp in sorted(codepoints):
+        if prev is not None and cp == prev + 1:
+            prev = cp
+            continue
+        if run_start is not None:
+            parts.append(f"U+{run_start:X}" if run_start == prev else f"U+{run_start:X}-{prev:X}")
+        run_start = prev = cp
+    if run_start is not None:
+        parts.append(f"U+{run_start:X}" if run_start == prev else f"U+{run_start:X}-{prev:X}")
+    return ", ".join(parts)
+
+
+def split_subsets(cmap: set[int], used: set[int]) -> list[tuple[str, set[int]]]:
+    arabic = {cp for cp in cmap if is_arabic(cp)}
+    urdu = arabic & (used | URDU_ALWAYS)
+    subsets = [
+        ("latin", cmap - arabic),
+        ("urdu", urdu),
+        ("arabic", arabic - urdu),
+    ]
+    return [(name, cps) for name, cps in subsets if cps]
+
+
+def write_subset(source: Path, codepoints: set[int], dest: Path) -> int:
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["*"]  # Nastaliq shaping needs every GSUB/GPOS feature
+    options.hinting = False
+    options.desubroutinize = True
+    options.name_IDs = ["*"]
+    options.notdef_outline = True
+
+    font = TTFont(source)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = dest.with_name(dest.name + ".tmp")
+    font.flavor = "woff2"
+    font.save(tmp_path)
+    os.replace(tmp_path, dest)
+    return dest.stat().st_size
+
+
+def relative_url(path: str) -> str:
+    return os.path.relpath(path, os.path.dirname(CSS_PATH)).replace(os.sep, "/")
+
+
+def main() -> int:
+    repo_root = Path(__file__).resolve().parents[1]
+    used = used_codepoints(repo_root)
+    print(f"Scanned pages: {len(used)} distinct character(s), {sum(1 for cp in used if is_arabic(cp))} Arabic-script")
+
+    css = [
+        "/* Generated by tools/subset_fonts.py - do not edit. Re-run after adding pages or text. */\n",
+    ]
+    written = set()
+    preload = []
+
+    for family, slug, source_rel in FONTS:
+        source = repo_root / source_rel
+        local = f'local("{family}")'
+        if not source.exists():
+            print(f"SKIP {family}: {source_rel} not found, keeping the original @font-face")
+            src = f'{local},\n       url("{relative_url(source_rel)}") format("truetype")'
+            css.append(FONT_FACE.format(family=family, src=src, range=""))
+            continue
+
+        original = source.stat().st_size
+        cmap = set(TTFont(source).getBestCmap())
+        for name, codepoints in split_subsets(cmap, used):
+            out_rel = f"{OUTPUT_DIR}/{slug}-{name}.woff2"
+            size = write_subset(source, codepoints, repo_root / out_rel)
+            written.add(out_rel)
+            src = f'{local},\n       url("{relative_url(out_rel)}") format("woff2")'
+            css.append(FONT_FACE.format(family=family, src=src, range=f"\n  unicode-range: {unicode_range(codepoints)};"))
+            if name == "urdu":
+                preload.append(out_rel)
+            print(f"OK   {out_rel}  {len(codepoints)} char(s), {format_kb(size)} (source {format_kb(original)})")
+
+    # Drop subsets of fonts or ranges that no longer exist
+    out_dir = repo_root / OUTPUT_DIR
+    if out_dir.is_dir():
+        for p in out_dir.glob("*.woff2"):
+            if p.relative_to(repo_root).as_posix() not in written:
+                p.unlink()
+                print(f"DEL  {p.relative_to(repo_root).as_posix()}")
+
+    css_path = repo_root / CSS_PATH
+    data = "\n".join(css).encode("utf-8")
+    tmp_path = css_path.with_name(css_path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, css_path)
+
+    print("\nSummary")
+    print(f"- Subsets: {len(written)} file(s) in {OUTPUT_DIR}")
+    print(f"- CSS:     {CSS_PATH} ({hashlib.sha256(data).hexdigest()[:10]})")
+    if preload:
+        print("- Preload the Urdu subset in page <head>s before fonts.css:")
+        for rel in preload:
+            print(f'    <link rel="preload" as="font" type="font/woff2" href="{rel}" crossorigin>')
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())